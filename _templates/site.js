@@ -0,0 +1,118 @@
+// 所有页面共用的脚本：构建时压缩并按内容哈希命名，页面用 defer 加载
+
+// 深色模式
+function toggleTheme() {
+  const body = document.body;
+  const themeToggle = document.getElementById('themeToggle');
+
+  if (body.getAttribute('data-theme') === 'dark') {
+    body.removeAttribute('data-theme');
+    themeToggle.removeAttribute('data-theme');
+    localStorage.setItem('theme', 'light');
+  } else {
+    body.setAttribute('data-theme', 'dark');
+    themeToggle.setAttribute('data-theme', 'dark');
+    localStorage.setItem('theme', 'dark');
+  }
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+  const savedTheme = localStorage.getItem('theme');
+  if (savedTheme === 'dark') {
+    document.body.setAttribute('data-theme', 'dark');
+    const themeToggle = document.getElementById('themeToggle');
+    if (themeToggle) {
+      themeToggle.setAttribute('data-theme', 'dark');
+    }
+  }
+});
+
+// 文章目录：目录在构建时生成，这里只负责高亮当前章节和移动端的展开收起
+document.addEventListener('DOMContentLoaded', function() {
+  const tocLinks = document.querySelectorAll('.table-of-contents-list a');
+  if (tocLinks.length === 0) {
+    return;
+  }
+
+  function updateActiveState(targetId) {
+    tocLinks.forEach(link => {
+      link.classList.toggle('active', link.getAttribute('data-target') === targetId);
+    });
+  }
+
+  function highlightCurrentSection() {
+    const headings = document.querySelectorAll('.post-content h1[id], .post-content h2[id], .post-content h3[id], .post-content h4[id], .post-content h5[id], .post-content h6[id]');
+    if (headings.length === 0 || !('IntersectionObserver' in window)) {
+      return;
+    }
+
+    // 标题进入视口顶部 100px 以下、上方 30% 的区域时视为当前章节
+    const observer = new IntersectionObserver(function(entries) {
+      entries.forEach(entry => {
+        if (entry.isIntersecting) {
+          updateActiveState(entry.target.id);
+        }
+      });
+    }, {
+      rootMargin: '-100px 0px -70% 0px'
+    });
+
+    headings.forEach(heading => observer.observe(heading));
+  }
+
+  function initMobileTOC() {
+    const toggle = document.getElementById('toc-toggle');
+    const overlay = document.getElementById('toc-overlay');
+    const mobile = document.getElementById('toc-mobile');
+    const close = document.getElementById('toc-close');
+    if (!toggle || !overlay || !mobile || !close) {
+      return;
+    }
+
+    function openTOC() {
+      overlay.classList.add('active');
+      mobile.classList.add('active');
+      document.body.style.overflow = 'hidden';
+    }
+
+    function closeTOC() {
+      overlay.classList.remove('active');
+      mobile.classList.remove('active');
+      document.body.style.overflow = '';
+    }
+
+    toggle.addEventListener('click', openTOC);
+    overlay.addEventListener('click', closeTOC);
+    close.addEventListener('click', closeTOC);
+
+    mobile.addEventListener('click', function(e) {
+      if (e.target.tagName === 'A') {
+        closeTOC();
+      }
+    });
+  }
+
+  function initSmoothScroll() {
+    document.addEventListener('click', function(e) {
+      if (e.target.matches('.table-of-contents-list a')) {
+        e.preventDefault();
+        const targetId = e.target.getAttribute('data-target');
+        const targetElement = document.getElementById(targetId);
+
+        if (targetElement) {
+          updateActiveState(targetId);
+
+          const offsetTop = targetElement.offsetTop - 80;
+          window.scrollTo({
+            top: offsetTop,
+            behavior: 'smooth'
+          });
+        }
+      }
+    });
+  }
+
+  highlightCurrentSection();
+  initMobileTOC();
+  initSmoothScroll();
+});
@@ -0,0 +1,202 @@
+// 站内搜索
+// 索引由 generate_all_posts.py 在构建时生成到 /assets/search/，
+// 这里的分词规则必须和 sitegen/search.py 保持一致。
+// 页面上只下载 docs.json 和查询词所在的分片。
+(function() {
+  const INDEX_URL = '/assets/search/';
+  const TOKEN_RE = /[a-z0-9]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+/g;
+  const MAX_RESULTS = 20;
+
+  let docsPromise = null;
+  const shardCache = {};
+
+  function tokenize(text) {
+    const terms = [];
+    const runs = text.normalize('NFKC').toLowerCase().match(TOKEN_RE) || [];
+    runs.forEach(run => {
+      if (run < '\u3040') {
+        // 英文单词只保留两个字母以上的，数字全部保留
+        if (run.length > 1 || /^\d+$/.test(run)) {
+          terms.push(run);
+        }
+      } else if (run.length === 1) {
+        terms.push(run);
+      } else {
+        for (let i = 0; i < run.length - 1; i++) {
+          terms.push(run.slice(i, i + 2));
+        }
+      }
+    });
+    return Array.from(new Set(terms));
+  }
+
+  function loadJSON(url) {
+    return fetch(url).then(response => {
+      if (!response.ok) {
+        throw new Error(url + ': ' + response.status);
+      }
+      return response.json();
+    });
+  }
+
+  function loadDocs() {
+    if (!docsPromise) {
+      docsPromise = loadJSON(INDEX_URL + 'docs.json');
+    }
+    return docsPromise;
+  }
+
+  function shardOf(term, count) {
+    return (term.codePointAt(0) % count).toString(16).padStart(2, '0');
+  }
+
+  function loadShard(name) {
+    if (!shardCache[name]) {
+      // 没有任何词落在这个分片时文件不存在，当作空分片
+      shardCache[name] = loadJSON(INDEX_URL + 'terms-' + name + '.json').catch(() => ({}));
+    }
+    return shardCache[name];
+  }
+
+  // 一个查询词的得分：{文档 id: 分数}。postings 是 [id 增量, 词频, ...]
+  function scoreTerm(shard, term, prefix, docCount) {
+    const scores = {};
+    const matched = prefix
+      ? Object.keys(shard).filter(key => key.startsWith(term))
+      : (shard[term] ? [term] : []);
+
+    matched.forEach(key => {
+      const postings = shard[key];
+      const df = postings.length / 2;
+      const idf = Math.log(1 + (docCount - df + 0.5) / (df + 0.5));
+      let docId = 0;
+      for (let i = 0; i < postings.length; i += 2) {
+        docId += postings[i];
+        const score = (1 + Math.log(postings[i + 1])) * idf;
+        scores[docId] = Math.max(scores[docId] || 0, score);
+      }
+    });
+    return scores;
+  }
+
+  // 所有查询词都要出现（AND），得分相加。最后一个英文词和单个汉字按前缀匹配，
+  // 输入到一半也能出结果
+  function search(query) {
+    const terms = tokenize(query);
+    if (!terms.length) {
+      return Promise.resolve([]);
+    }
+
+    return loadDocs().then(index => {
+      const names = Array.from(new Set(terms.map(term => shardOf(term, index.shards))));
+      return Promise.all(names.map(loadShard)).then(shards => {
+        const byName = {};
+        names.forEach((name, i) => { byName[name] = shards[i]; });
+
+        // 删除的文档在 docs 里留下空位，文档数以 count 为准
+        const docCount = index.count || index.docs.length;
+        let total = null;
+        terms.forEach((term, i) => {
+          const prefix = term.length === 1 || (i === terms.length - 1 && /^[a-z0-9]/.test(term));
+          const scores = scoreTerm(byName[shardOf(term, index.shards)], term, prefix, docCount);
+          if (total === null) {
+            total = scores;
+          } else {
+            const merged = {};
+            Object.keys(total).forEach(docId => {
+              if (docId in scores) {
+                merged[docId] = total[docId] + scores[docId];
+              }
+            });
+            total = merged;
+          }
+        });
+
+        return Object.keys(total)
+          .map(docId => ({ doc: index.docs[docId], score: total[docId] }))
+          .sort((a, b) => b.score - a.score || b.doc[3].localeCompare(a.doc[3]))
+          .slice(0, MAX_RESULTS)
+          .map(result => {
+            const [kind, title, url, date, snippet] = result.doc;
+            return { kind, title, url, date, snippet };
+          });
+      });
+    });
+  }
+
+  function renderResults(container, results, query) {
+    container.textContent = '';
+    if (!query.trim()) {
+      return;
+    }
+    if (!results.length) {
+      const empty = document.createElement('p');
+      empty.className = 'search-empty';
+      empty.textContent = '没有找到相关内容';
+      container.appendChild(empty);
+      return;
+    }
+
+    results.forEach(result => {
+      const link = document.createElement('a');
+      link.className = 'search-result';
+      link.href = result.url;
+      if (result.kind === 'thought') {
+        link.target = '_blank';
+        link.rel = 'noopener';
+      }
+
+      const title = document.createElement('span');
+      title.className = 'search-result-title';
+      title.textContent = (result.kind === 'thought' ? '动态 · ' : '') + result.title;
+
+      const date = document.createElement('span');
+      date.className = 'search-result-date';
+      date.textContent = result.date;
+
+      const snippet = document.createElement('span');
+      snippet.className = 'search-result-snippet';
+      snippet.textContent = result.snippet;
+
+      link.append(title, date, snippet);
+      container.appendChild(link);
+    });
+  }
+
+  document.addEventListener('DOMContentLoaded', function() {
+    const input = document.querySelector('[data-search-input]');
+    const container = document.querySelector('[data-search-results]');
+    if (!input || !container) {
+      return;
+    }
+
+    let timer = null;
+    let latest = 0;
+
+    function run() {
+      const query = input.value;
+      const ticket = ++latest;
+      search(query).then(results => {
+        // 只显示最后一次输入的结果
+        if (ticket === latest) {
+          renderResults(container, results, query);
+        }
+      }).catch(error => {
+        console.error('搜索失败:', error);
+      });
+    }
+
+    input.addEventListener('input', function() {
+      clearTimeout(timer);
+      timer = setTimeout(run, 150);
+    });
+
+    const params = new URLSearchParams(window.location.search);
+    if (params.get('q')) {
+      input.value = params.get('q');
+      run();
+    }
+  });
+
+  window.siteSearch = search;
+})();
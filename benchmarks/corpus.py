@@ -0,0 +1,179 @@
+"""
+合成测试语料：文章、即刻 RSS feed、图片，以及离线使用的本地 HTTP 服务
+
+所有内容由固定的随机种子生成，同样的参数每次得到完全相同的语料，
+不同时间的基准测试结果可以直接对比。
+"""
+import random
+import struct
+import threading
+import zlib
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+ZH_WORDS = [
+    '今天', '读书', '生活', '产品', '设计', '思考', '时间', '朋友', '城市', '咖啡',
+    '工作', '电影', '音乐', '旅行', '记录', '写作', '学习', '习惯', '周末', '家人',
+    '春天', '夜晚', '窗外', '一点点', '慢慢地', '突然', '觉得', '因为', '所以', '但是',
+]
+EN_WORDS = [
+    'github', 'python', 'jekyll', 'notion', 'markdown', 'design', 'product', 'arc',
+    'browser', 'ai', 'workflow', 'reading', 'notes', 'api', 'rss',
+]
+TAGS = ['读书', '生活', '产品', '思考', '工具', 'AI', '电影', '旅行']
+
+START_DATE = datetime(2020, 1, 1, 9, 0, tzinfo=timezone(timedelta(hours=8)))
+
+
+def make_png(width=64, height=48, seed=0):
+    """生成一张真实可解码的 RGB PNG，seed 不同内容就不同"""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    color = bytes(((seed * 37) % 256, (seed * 91) % 256, (seed * 53) % 256))
+    rows = b''.join(b'\x00' + color * width for _ in range(height))
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(rows))
+            + chunk(b'IEND', b''))
+
+
+def sentence(rng):
+    words = [rng.choice(EN_WORDS) if rng.random() < 0.1 else rng.choice(ZH_WORDS)
+             for _ in range(rng.randint(6, 16))]
+    text = ''.join(f' {w} ' if w.isascii() else w for w in words).strip()
+    roll = rng.random()
+    if roll < 0.05:
+        text += f'，见 [链接](https://example.com/{rng.randint(1, 999)})'
+    elif roll < 0.10:
+        text = f'**{text}**'
+    elif roll < 0.15:
+        text += f'，用 `{rng.choice(EN_WORDS)}` 就行'
+    return text + rng.choice('。！？')
+
+
+def paragraph(rng):
+    return ''.join(sentence(rng) for _ in range(rng.randint(2, 6)))
+
+
+def post_markdown(rng, index, date):
+    """一篇带 Front Matter 的文章：标题、段落、列表、引用、代码块混排"""
+    title = f'{rng.choice(ZH_WORDS)}{rng.choice(ZH_WORDS)}的第 {index} 篇笔记'
+    tags = ' '.join(rng.sample(TAGS, rng.randint(1, 3)))
+    parts = [
+        '---',
+        'layout: post',
+        f'title: "{title}"',
+        'author: "小草庐"',
+        f'date: {date:%Y-%m-%d}',
+        f'tags: {tags}',
+        '---',
+        '',
+    ]
+    for section in range(rng.randint(2, 5)):
+        parts.append(f'## 第 {section + 1} 部分 {rng.choice(ZH_WORDS)}')
+        parts.append('')
+        for _ in range(rng.randint(1, 4)):
+            parts.append(paragraph(rng))
+            parts.append('')
+        roll = rng.random()
+        if roll < 0.3:
+            parts.extend(f'- {sentence(rng)}' for _ in range(rng.randint(2, 5)))
+            parts.append('')
+        elif roll < 0.45:
+            parts.append(f'> {sentence(rng)}')
+            parts.append('')
+        elif roll < 0.55:
+            parts.extend(['```python', 'def hello():', '    return "小草庐"', '```', ''])
+    return '\n'.join(parts)
+
+
+def write_posts(posts_dir, count, seed=0):
+    """在 posts_dir 下生成 count 篇文章，返回文件路径列表（按文件名排序）"""
+    rng = random.Random(seed)
+    posts_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for index in range(count):
+        date = START_DATE + timedelta(hours=index * 7)
+        path = posts_dir / f'{date:%Y-%m-%d}-post-{index}.md'
+        path.write_text(post_markdown(rng, index, date), encoding='utf-8')
+        paths.append(path)
+    return sorted(paths)
+
+
+def rss_feed(count, image_base, seed=0, max_images=3):
+    """生成 RSSHub 格式的即刻 feed：count 条动态，按时间倒序
+
+    每条动态带 0 到 max_images 张图片，图片地址是 {image_base}/<条目>-<序号>.png。
+    返回 (feed 字节串, 图片总数)。
+    """
+    rng = random.Random(seed)
+    items = []
+    total_images = 0
+    for index in range(count):
+        date = START_DATE + timedelta(minutes=index * 37)
+        images = ''.join(f'<img src="{image_base}/{index}-{k}.png">'
+                         for k in range(rng.randint(0, max_images)))
+        total_images += images.count('<img')
+        description = f'<p>{escape(paragraph(rng))}</p>{images}'
+        items.append(
+            '<item>'
+            f'<title>{escape(sentence(rng))}</title>'
+            f'<description><![CDATA[{description}]]></description>'
+            f'<pubDate>{format_datetime(date)}</pubDate>'
+            f'<link>https://m.okjike.com/originalPosts/{index:08x}</link>'
+            '</item>'
+        )
+    items.reverse()
+    feed = ('<?xml version="1.0" encoding="UTF-8"?>'
+            '<rss version="2.0"><channel><title>即刻动态</title>'
+            + ''.join(items)
+            + '</channel></rss>')
+    return feed.encode('utf-8'), total_images
+
+
+class FeedServer:
+    """本地 HTTP 服务，代替 RSSHub 镜像和图片 CDN
+
+    GET /jike/user/<任意 ID> 返回 feed，GET /img/<名字>.png 返回一张 PNG，
+    不同的名字返回不同的内容。作为上下文管理器使用，退出时关闭服务。
+    """
+
+    def __init__(self, feed=b''):
+        self.feed = feed
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith('/jike/user/'):
+                    self._send(server.feed, 'application/rss+xml; charset=utf-8')
+                elif self.path.startswith('/img/'):
+                    seed = zlib.crc32(self.path.encode('utf-8'))
+                    self._send(make_png(seed=seed), 'image/png')
+                else:
+                    self.send_error(404)
+
+            def _send(self, body, content_type):
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._httpd.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self._httpd.server_address[1]}'
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
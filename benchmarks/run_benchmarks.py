@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+站点构建和即刻同步的基准测试
+
+用合成语料（benchmarks/corpus.py）分别测量每个阶段：
+- 构建：parse_front_matter、读整个文件再解析、只读元数据、markdown_to_html、
+  generate_post_page、搜索索引（完整构建和改动一篇后的增量更新）
+- 同步：RSS 下载、流式解析、去重、合并写入分片、图片并发下载
+
+feed 和图片由本地 HTTP 服务提供，全程离线。每个阶段先关闭 tracemalloc 计时
+（取最快一次），再单独运行一次测量内存峰值和分配情况。CPython 没有总分配次数
+计数器，这里用 tracemalloc 统计运行后仍存活的内存块数，用 gc 触发次数反映
+容器对象的分配量。
+
+结果保存为 JSON，--compare 与之前的结果逐项对比，耗时超过阈值时返回 1。
+
+用法：
+    python benchmarks/run_benchmarks.py [--sizes 100,10000,100000] [--repeat 3]
+        [--output FILE] [--compare OLD.json] [--threshold 0.2]
+
+默认只跑 100 条的规模；10⁴ 条约需几分钟，10⁵ 条的构建阶段需要更久。
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.corpus import FeedServer, rss_feed, write_posts  # noqa: E402
+from generate_all_posts import generate_post_page, parse_front_matter  # noqa: E402
+from jike_sync import config, downloader, parser, store  # noqa: E402
+from sitegen.frontmatter import read_front_matter  # noqa: E402
+from sitegen.markdown import markdown_to_html  # noqa: E402
+from sitegen.search import SearchIndex, document, plain_text  # noqa: E402
+
+RESULTS_DIR = PROJECT_ROOT / '.build' / 'benchmarks'
+# 图片下载阶段最多下载多少张，避免 10⁵ 规模时测试时间失控
+MAX_DOWNLOADS = 500
+# 两次耗时都低于这个值（秒）的阶段不判定变慢，毫秒级的波动没有意义
+MIN_COMPARE_SECONDS = 0.005
+
+
+def measure(run, repeat):
+    """运行 repeat 次取最快一次，再开着 tracemalloc 跑一次统计内存"""
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    collections_before = sum(stat['collections'] for stat in gc.get_stats())
+    tracemalloc.start()
+    result = run()
+    _, peak = tracemalloc.get_traced_memory()
+    retained = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+    tracemalloc.stop()
+    collections = sum(stat['collections'] for stat in gc.get_stats()) - collections_before
+    del result
+
+    return {
+        'seconds': best,
+        'peak_bytes': peak,
+        'retained_blocks': retained,
+        'gc_collections': collections,
+    }
+
+
+def build_stages(size, work_dir):
+    """构建阶段：返回 [(名称, 条目数, 字节数, 运行函数)]"""
+    paths = write_posts(work_dir / '_posts', size)
+    texts = [path.read_text(encoding='utf-8') for path in paths]
+    parsed = [parse_front_matter(text) for text in texts]
+    html_pages = [markdown_to_html(body) for _, body in parsed]
+    total_bytes = sum(len(text.encode('utf-8')) for text in texts)
+
+    def front_matter():
+        return [parse_front_matter(text) for text in texts]
+
+    def read_full():
+        # 读整个文件再拆分，和 metadata 比较，两者都包含打开文件的开销
+        return [parse_front_matter(path.read_text(encoding='utf-8')) for path in paths]
+
+    def metadata():
+        # 只读到 Front Matter 结束
+        return [read_front_matter(path) for path in paths]
+
+    def markdown():
+        return [markdown_to_html(body) for _, body in parsed]
+
+    def page():
+        return [generate_post_page(path, fm, body) for path, (fm, body) in zip(paths, parsed)]
+
+    search_docs = {f'/{i}.html': document('post', fm.get('title', ''), f'/{i}.html', fm.get('date', ''),
+                                          plain_text(html))
+                   for i, ((fm, _), html) in enumerate(zip(parsed, html_pages))}
+    edited_key = next(iter(search_docs))
+    edited = document('post', '改过的标题', edited_key, '2024-01-01', plain_text(html_pages[0]) + ' 新增的一段')
+
+    def search_index():
+        # 没有缓存：从空索引完整构建
+        with tempfile.TemporaryDirectory() as tmp:
+            index = SearchIndex(Path(tmp) / 'cache', Path(tmp) / 'out')
+            index.update(search_docs, set(search_docs))
+            index.save()
+        return search_docs
+
+    search_base = SearchIndex(work_dir / 'search' / 'cache', work_dir / 'search' / 'out')
+    search_base.update(search_docs, set(search_docs))
+    search_base.save()
+
+    def search_update():
+        # 已有索引上改动一篇文章：只改写这篇文章的词所在的分片，再改回去
+        index = SearchIndex(search_base.cache_dir, search_base.out_dir)
+        index.update({edited_key: edited}, set(search_docs))
+        index.update({edited_key: search_docs[edited_key]}, set(search_docs))
+        index.save()
+        return index
+
+    return [
+        ('front_matter', size, total_bytes, front_matter),
+        ('read_full', size, total_bytes, read_full),
+        ('metadata', size, total_bytes, metadata),
+        ('markdown', size, total_bytes, markdown),
+        ('page', size, total_bytes, page),
+        ('search_index', size, total_bytes, search_index),
+        ('search_update', 1, 0, search_update),
+    ]
+
+
+def sync_stages(size, work_dir, server):
+    """同步阶段：返回 [(名称, 条目数, 字节数, 运行函数)]"""
+    feed, _ = rss_feed(size, f'{server.url}/img')
+    server.feed = feed
+    feed_url = f'{server.url}/jike/user/benchmark'
+
+    def parse_feed():
+        thoughts = []
+        for item in parser.iter_rss_items([feed]):
+            thought, image_urls = parser.item_to_thought(item)
+            if thought is not None:
+                thoughts.append((thought, image_urls))
+        return thoughts
+
+    parsed = parse_feed()
+    thoughts = [thought for thought, _ in parsed]
+    download_jobs = [(id(thought), url) for thought, urls in parsed for url in urls][:MAX_DOWNLOADS]
+    counter = iter(range(10 ** 9))
+
+    def fetch():
+        with urllib.request.urlopen(feed_url, timeout=60) as response:
+            return response.read()
+
+    def dedup():
+        # 每条动态先查一次、登记一次，再整体重复登记一遍（全部命中去重）
+        thought_store = store.ThoughtStore(str(work_dir / f'dedup-{next(counter)}'))
+        for thought in thoughts:
+            if not thought_store.contains(thought):
+                thought_store.add(thought)
+        for thought in thoughts:
+            thought_store.add(thought)
+        return thought_store
+
+    def merge_dump():
+        thought_store = store.ThoughtStore(str(work_dir / f'shards-{next(counter)}'))
+        for thought in thoughts:
+            thought_store.add(thought)
+        return thought_store.flush()
+
+    def download():
+        return downloader.download_images(download_jobs, max_workers=config.DOWNLOAD_CONCURRENCY,
+                                          per_host=config.DOWNLOAD_PER_HOST)
+
+    return [
+        ('rss_fetch', size, len(feed), fetch),
+        ('rss_parse', size, len(feed), parse_feed),
+        ('dedup', size, 0, dedup),
+        ('merge_dump', size, 0, merge_dump),
+        ('download', len(download_jobs), 0, download),
+    ]
+
+
+def run_size(size, repeat, server):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        stages = build_stages(size, work_dir) + sync_stages(size, work_dir, server)
+        print()
+        for name, items, total_bytes, run in stages:
+            stats = measure(run, repeat)
+            stats['items'] = items
+            stats['items_per_second'] = items / stats['seconds'] if stats['seconds'] else 0
+            if total_bytes:
+                stats['mb_per_second'] = total_bytes / 1024 / 1024 / stats['seconds']
+            results[name] = stats
+            print_row(name, stats)
+        print()
+    return results
+
+
+def print_row(name, stats):
+    throughput = f"{stats['items_per_second']:10.0f} 条/s"
+    if 'mb_per_second' in stats:
+        throughput += f" {stats['mb_per_second']:7.2f} MB/s"
+    else:
+        throughput += ' ' * 13
+    print(f"  {name:<13} {stats['seconds'] * 1000:10.1f} ms {throughput}"
+          f"  峰值 {stats['peak_bytes'] / 1024 / 1024:7.1f} MB"
+          f"  存活块 {stats['retained_blocks']:>8}  gc {stats['gc_collections']:>5}")
+
+
+def compare(old, new, threshold):
+    """逐项对比耗时，返回回退的项目数"""
+    regressions = 0
+    print()
+    print(f"与 {old.get('created', '之前的结果')} 对比（阈值 {threshold:.0%}）:")
+    for size, stages in new['results'].items():
+        for name, stats in stages.items():
+            before = old.get('results', {}).get(size, {}).get(name)
+            if not before or not before['seconds']:
+                continue
+            change = stats['seconds'] / before['seconds'] - 1
+            noisy = max(stats['seconds'], before['seconds']) < MIN_COMPARE_SECONDS
+            mark = ''
+            if noisy:
+                pass
+            elif change > threshold:
+                mark = '  ⚠️  变慢'
+                regressions += 1
+            elif change < -threshold:
+                mark = '  ✓ 变快'
+            print(f"  {size:>7} {name:<13} {before['seconds'] * 1000:10.1f} ms -> "
+                  f"{stats['seconds'] * 1000:10.1f} ms  {change:+7.1%}{mark}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='站点构建和即刻同步的基准测试')
+    parser.add_argument('--sizes', default='100',
+                        help='逗号分隔的语料规模（条目数），如 100,10000,100000，默认 100')
+    parser.add_argument('--repeat', type=int, default=3, help='每个阶段运行次数，取最快一次')
+    parser.add_argument('--output', type=Path, help='结果 JSON 路径，默认 .build/benchmarks/<时间>.json')
+    parser.add_argument('--compare', type=Path, help='与之前保存的结果 JSON 对比')
+    parser.add_argument('--threshold', type=float, default=0.2, help='判定变慢的相对阈值（默认 0.2）')
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'results': {},
+    }
+
+    with FeedServer() as server:
+        for size in sizes:
+            print(f"语料规模: {size} 条")
+            report['results'][str(size)] = run_size(size, args.repeat, server)
+
+    output = args.output or RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    print()
+    print(f"结果已保存: {output}")
+
+    if args.compare:
+        old = json.loads(args.compare.read_text(encoding='utf-8'))
+        regressions = compare(old, report, args.threshold)
+        if regressions:
+            print(f"⚠️  {regressions} 个阶段变慢超过 {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,59 +1,70 @@
 #!/usr/bin/env python3
 """
 为所有_posts中的文章生成HTML页面
+
+所有输出（文章页、列表页、静态资源、搜索索引、feed 和它们的预压缩副本）都写到
+_output/，不提交到仓库；--serve 预览时 _output/ 里没有的文件从仓库目录提供。
+
+需要 Python 3.11 或更新版本（Markdown 转换器的正则用到了占有量词）。
 """
+import argparse
+import hashlib
+import json
 import os
 import re
+import sys
+import time
 import yaml
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
+from zoneinfo import ZoneInfo
 
-def parse_front_matter(content):
-    """解析Front Matter"""
-    if not content.startswith('---'):
-        return {}, content
-    
-    parts = content.split('---', 2)
-    if len(parts) < 3:
-        return {}, content
-    
-    try:
-        front_matter = yaml.safe_load(parts[1])
-        content = parts[2].strip()
-        return front_matter, content
-    except:
-        return {}, content
-
-def markdown_to_html(content):
-    """简单的Markdown到HTML转换"""
-    # 处理标题
-    content = re.sub(r'^### (.*)$', r'<h3>\1</h3>', content, flags=re.MULTILINE)
-    content = re.sub(r'^## (.*)$', r'<h2>\1</h2>', content, flags=re.MULTILINE)
-    content = re.sub(r'^# (.*)$', r'<h1>\1</h1>', content, flags=re.MULTILINE)
-    
-    # 处理粗体
-    content = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', content)
-    content = re.sub(r'_(.*?)_', r'<em>\1</em>', content)
-    
-    # 处理引用
-    content = re.sub(r'^> (.*)$', r'<blockquote><p>\1</p></blockquote>', content, flags=re.MULTILINE)
-    
-    # 处理段落
-    paragraphs = content.split('\n\n')
-    html_paragraphs = []
-    for p in paragraphs:
-        p = p.strip()
-        if p and not p.startswith('<') and not p.startswith('#'):
-            # 处理换行
-            p = p.replace('\n', '<br>')
-            html_paragraphs.append(f'<p>{p}</p>')
-        else:
-            html_paragraphs.append(p)
-    
-    return '\n\n'.join(html_paragraphs)
+import sitegen
+from sitegen import assets, compress, devserver, feeds, fonts, listing, profiling
+from sitegen.frontmatter import MetadataCache, split_front_matter
+from sitegen.markdown import Headings, markdown_to_html, render_toc
+from sitegen.search import SearchIndex, document, plain_text
+from sitegen.template import TEMPLATES_DIR, load_template
 
-def generate_post_page(post_file, front_matter, content):
-    """生成文章页面HTML"""
+# 增量构建清单：记录每篇文章的源文件哈希、模板版本和输出路径
+MANIFEST_PATH = Path('.build') / 'manifest.json'
+# 搜索索引的缓存：每篇文档的 id、哈希和词频，不放进清单
+SEARCH_CACHE_DIR = Path('.build') / 'search'
+# 只读元数据时的 Front Matter 缓存
+METADATA_CACHE_PATH = Path('.build') / 'front_matter.json'
+# 各 feed 条目序列化结果的缓存
+FEED_CACHE_PATH = Path('.build') / 'feed_entries.json'
+MANIFEST_VERSION = 3
+
+SITEGEN_DIR = Path(__file__).resolve().parent / 'sitegen'
+
+# 构建输出目录（相对仓库根目录，和清单里记录的路径一致）
+OUTPUT_DIR = Path(os.path.relpath(sitegen.OUTPUT_DIR))
+# 搜索索引的输出目录，以及参与索引的即刻动态数据
+SEARCH_DIR = OUTPUT_DIR / 'assets' / 'search'
+DATA_DIR = Path('_data')
+
+# 站点配置：首页每页文章数、站点地址和 feed 条数
+CONFIG_PATH = Path('_config.yml')
+# feed 收录的条数：文章和 jekyll-feed 一样默认 10 篇（_config.yml 的 feed.posts_limit）
+FEED_POSTS_LIMIT = 10
+FEED_THOUGHTS_LIMIT = 30
+# _config.yml 没有设置 timezone 时，日期按这个时区解释
+DEFAULT_TIMEZONE = 'Asia/Shanghai'
+
+# --watch 监视的目录：文章、页面模板、静态资源（构建产物都在 _output/，不在这些目录里）
+POSTS_DIR = Path('_posts')
+WATCH_DIRS = [POSTS_DIR, TEMPLATES_DIR, Path('assets')]
+# 轮询间隔（秒）：加上合并改动的等待和重建，保存到页面刷新在 100 ms 以内
+WATCH_INTERVAL = 0.03
+
+def parse_front_matter(content, path='<string>'):
+    """解析Front Matter，返回 (元数据, 正文)；格式错误时抛出带文件名和行号的 FrontMatterError"""
+    return split_front_matter(content, path)
+
+def post_page_values(front_matter, content):
+    """计算文章模板的插槽值"""
     title = front_matter.get('title', 'Untitled')
     author = front_matter.get('author', '小草庐')
     date = front_matter.get('date', datetime.now().strftime('%Y-%m-%d'))
@@ -68,306 +79,585 @@ def generate_post_page(post_file, front_matter, content):
     except:
         formatted_date = date
     
-    # 转换Markdown内容
-    html_content = markdown_to_html(content)
-    
-    # 生成HTML
-    html = f'''<!DOCTYPE html>
-<html lang="zh-CN">
-
-<head>
-  <meta charset="UTF-8">
-  <meta name="viewport" content="width=device-width, initial-scale=1.0">
-  <title>{title} | 小草庐 | A Tiny House</title>
-  <meta name="description" content="{title}">
-
-  <!-- CSS -->
-  <link rel="stylesheet" href="../assets/main.css">
-  <link rel="stylesheet" href="../assets/custom.css">
-  <link rel="stylesheet" href="https://fonts.googleapis.com/css?family=Libre+Baskerville:400,400i,700">
-  <link rel="stylesheet" href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&family=Noto+Sans+SC:wght@400;500;600;700&display=swap">
-
-  <!-- Favicon -->
-  <link rel="icon" type="image/png" sizes="32x32" href="../assets/favicon-32x32.png">
-  <link rel="icon" type="image/png" sizes="16x16" href="../assets/favicon-16x16.png">
-  <link rel="apple-touch-icon" sizes="180x180" href="../assets/apple-touch-icon.png">
-
-  <!-- Dark Mode Script -->
-  <script>
-    function toggleTheme() {{
-      const body = document.body;
-      const themeToggle = document.getElementById('themeToggle');
-      
-      if (body.getAttribute('data-theme') === 'dark') {{
-        body.removeAttribute('data-theme');
-        themeToggle.removeAttribute('data-theme');
-        localStorage.setItem('theme', 'light');
-      }} else {{
-        body.setAttribute('data-theme', 'dark');
-        themeToggle.setAttribute('data-theme', 'dark');
-        localStorage.setItem('theme', 'dark');
-      }}
-    }}
-
-    document.addEventListener('DOMContentLoaded', function() {{
-      const savedTheme = localStorage.getItem('theme');
-      if (savedTheme === 'dark') {{
-        document.body.setAttribute('data-theme', 'dark');
-        const themeToggle = document.getElementById('themeToggle');
-        if (themeToggle) {{
-          themeToggle.setAttribute('data-theme', 'dark');
-        }}
-      }}
-    }});
-  </script>
-</head>
-
-<body>
-  <nav class="nav">
-    <div class="nav-container">
-      <a href="../" class="nav-title">A Tiny House</a>
-      <ul>
-        <li><a href="../">Posts</a></li>
-        <li><a href="../about">About</a></li>
-        <li><a href="../tags">Tags</a></li>
-      </ul>
-      <button class="theme-toggle" onclick="toggleTheme()" id="themeToggle">
-        <div class="theme-toggle-slider"></div>
-      </button>
-    </div>
-  </nav>
-
-  <main>
-    <article class="post">
-      <div class="post-info">
-        <span>Written by</span>
-        {author}
-        <br>
-        <span>on&nbsp;</span><time datetime="{date}">{formatted_date}</time>
-      </div>
-
-      <h1 class="post-title">{title}</h1>
-      <div class="post-line"></div>
-
-      <div class="post-content">
-        {html_content}
-      </div>
-    </article>
-  </main>
-
-  <!-- 桌面端目录 -->
-  <div class="table-of-contents" id="toc">
-    <div class="table-of-contents-title">目录</div>
-    <ul class="table-of-contents-list" id="toc-list">
-      <!-- 目录内容将通过JavaScript生成 -->
-    </ul>
-  </div>
-
-  <!-- 移动端目录按钮 -->
-  <button class="toc-toggle" id="toc-toggle">
-    <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
-      <line x1="3" y1="6" x2="21" y2="6"></line>
-      <line x1="3" y1="12" x2="21" y2="12"></line>
-      <line x1="3" y1="18" x2="21" y2="18"></line>
-    </svg>
-  </button>
-
-  <!-- 移动端目录覆盖层 -->
-  <div class="toc-overlay" id="toc-overlay"></div>
-
-  <!-- 移动端目录 -->
-  <div class="toc-mobile" id="toc-mobile">
-    <button class="toc-close" id="toc-close">&times;</button>
-    <div class="table-of-contents-title">目录</div>
-    <ul class="table-of-contents-list" id="toc-mobile-list">
-      <!-- 目录内容将通过JavaScript生成 -->
-    </ul>
-  </div>
-
-  <div class="pagination">
-    <a href="#" class="top">Top</a>
-  </div>
-
-  <footer>
-    <span>
-      &copy; <time datetime="2024">2024</time> 小草庐. Made with Jekyll using the <a href="https://github.com/chesterhow/tale/">Tale</a> theme.
-    </span>
-  </footer>
-
-  <!-- 目录功能JavaScript -->
-  <script>
-    document.addEventListener('DOMContentLoaded', function() {{
-      function generateTOC() {{
-        const headings = document.querySelectorAll('.post-content h1, .post-content h2, .post-content h3, .post-content h4, .post-content h5, .post-content h6');
-        const tocList = document.getElementById('toc-list');
-        const tocMobileList = document.getElementById('toc-mobile-list');
-        
-        if (headings.length === 0) {{
-          document.getElementById('toc').style.display = 'none';
-          document.getElementById('toc-toggle').style.display = 'none';
-          return;
-        }}
-
-        let tocHTML = '';
-        let currentLevel = 0;
-        
-        headings.forEach((heading, index) => {{
-          const level = parseInt(heading.tagName.charAt(1));
-          const id = `heading-${{index}}`;
-          heading.id = id;
-          
-          const text = heading.textContent.trim();
-          const link = `<a href="#${{id}}" data-target="${{id}}">${{text}}</a>`;
-          
-          if (level > currentLevel) {{
-            tocHTML += '<ul>';
-            currentLevel = level;
-          }} else if (level < currentLevel) {{
-            for (let i = level; i < currentLevel; i++) {{
-              tocHTML += '</ul>';
-            }}
-            currentLevel = level;
-          }}
-          
-          tocHTML += `<li>${{link}}</li>`;
-        }});
-        
-        for (let i = 0; i < currentLevel; i++) {{
-          tocHTML += '</ul>';
-        }}
-        
-        tocList.innerHTML = tocHTML;
-        tocMobileList.innerHTML = tocHTML;
-      }}
-
-      function updateActiveState(targetId) {{
-        document.querySelectorAll('.table-of-contents-list a').forEach(link => {{
-          link.classList.remove('active');
-          if (link.getAttribute('data-target') === targetId) {{
-            link.classList.add('active');
-          }}
-        }});
-      }}
-
-      function highlightCurrentSection() {{
-        const headings = document.querySelectorAll('.post-content h1, .post-content h2, .post-content h3, .post-content h4, .post-content h5, .post-content h6');
-        
-        function updateActiveLink() {{
-          let current = '';
-          
-          headings.forEach(heading => {{
-            const rect = heading.getBoundingClientRect();
-            if (rect.top <= 100) {{
-              current = heading.id;
-            }}
-          }});
-          
-          if (current) {{
-            updateActiveState(current);
-          }}
-        }}
-        
-        window.addEventListener('scroll', updateActiveLink);
-        updateActiveLink();
-      }}
-
-      function initMobileTOC() {{
-        const toggle = document.getElementById('toc-toggle');
-        const overlay = document.getElementById('toc-overlay');
-        const mobile = document.getElementById('toc-mobile');
-        const close = document.getElementById('toc-close');
-        
-        function openTOC() {{
-          overlay.classList.add('active');
-          mobile.classList.add('active');
-          document.body.style.overflow = 'hidden';
-        }}
-        
-        function closeTOC() {{
-          overlay.classList.remove('active');
-          mobile.classList.remove('active');
-          document.body.style.overflow = '';
-        }}
-        
-        toggle.addEventListener('click', openTOC);
-        overlay.addEventListener('click', closeTOC);
-        close.addEventListener('click', closeTOC);
-        
-        mobile.addEventListener('click', function(e) {{
-          if (e.target.tagName === 'A') {{
-            closeTOC();
-          }}
-        }});
-      }}
-
-      function initSmoothScroll() {{
-        document.addEventListener('click', function(e) {{
-          if (e.target.matches('.table-of-contents-list a')) {{
-            e.preventDefault();
-            const targetId = e.target.getAttribute('data-target');
-            const targetElement = document.getElementById(targetId);
-            
-            if (targetElement) {{
-              updateActiveState(targetId);
-              
-              const offsetTop = targetElement.offsetTop - 80;
-              window.scrollTo({{
-                top: offsetTop,
-                behavior: 'smooth'
-              }});
-            }}
-          }}
-        }});
-      }}
-
-      generateTOC();
-      highlightCurrentSection();
-      initMobileTOC();
-      initSmoothScroll();
-    }});
-  </script>
-</body>
-</html>'''
-    
-    return html
+    # 转换Markdown内容，同时收集标题生成目录
+    headings = Headings()
+    html_content = markdown_to_html(content, headings)
+
+    return {
+        'title': title,
+        'author': author,
+        'date': date,
+        'formatted_date': formatted_date,
+        'content': html_content,
+        'toc': render_toc(headings),
+        # 没有标题时隐藏目录和移动端目录按钮
+        'toc_style': '' if headings.items else ' style="display: none"',
+        # 内联的关键 CSS 和带指纹的样式表、脚本、图标地址
+        **assets.page_values('post'),
+    }
+
+def generate_post_page(post_file, front_matter, content):
+    """生成文章页面HTML"""
+    return load_template('post.html').render(**post_page_values(front_matter, content))
+
+def output_path_for(post_file):
+    """根据文章文件名计算输出路径 _output/YYYY/MM/DD/<title>.html"""
+    date_part = post_file.name[:10]  # YYYY-MM-DD
+    title_part = post_file.name[11:-3]  # 去掉日期和.md
+    safe_title = re.sub(r'[^\w\-]', '-', title_part.lower())
+
+    year, month, day = date_part.split('-')
+    return OUTPUT_DIR / year / month / day / f'{safe_title}.html'
+
+def url_for_output(output_path):
+    """输出文件对应的站内 URL"""
+    return devserver.url_for(os.path.relpath(output_path, OUTPUT_DIR))
+
+def file_hash(path):
+    """计算文件内容的 SHA-256"""
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+def template_version():
+    """模板版本：生成器、sitegen 源码、模板文件和静态资源的哈希，改动后全部文章需要重建"""
+    sources = ([Path(__file__)] + sorted(SITEGEN_DIR.glob('*.py')) + sorted(TEMPLATES_DIR.glob('*'))
+               + assets.source_files())
+    digest = hashlib.sha256()
+    for source in sources:
+        digest.update(source.read_bytes())
+    # 子集字体随文章里的字符变化，页面里引用的字体地址也跟着变
+    digest.update(fonts.head_html().encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def load_manifest():
+    """读取构建清单，不存在或损坏时返回空清单"""
+    try:
+        with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {'version': MANIFEST_VERSION, 'posts': {}}
+
+def save_manifest(manifest):
+    """原子写入构建清单（紧凑格式，每次构建都要写，越小越快）"""
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = MANIFEST_PATH.with_suffix('.tmp')
+    # json.dumps 走 C 实现的编码器，json.dump 写文件时逐块用纯 Python 编码，大清单慢十倍
+    text = json.dumps(manifest, ensure_ascii=False, separators=(',', ':'))
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+def is_up_to_date(post_file, entry, version):
+    """判断文章是否无需重建
+
+    mtime 和大小都没变时直接信任清单，不读文件；
+    否则重新计算内容哈希，只是 touch 过的文件不会触发重建。
+    """
+    if not entry or entry.get('template_version') != version:
+        return False
+    if not Path(entry['output']).exists():
+        return False
+
+    stat = post_file.stat()
+    if entry.get('mtime_ns') == stat.st_mtime_ns and entry.get('size') == stat.st_size:
+        return True
+    if file_hash(post_file) == entry.get('source_hash'):
+        entry['mtime_ns'] = stat.st_mtime_ns
+        entry['size'] = stat.st_size
+        return True
+    return False
+
+def remove_output(output_path):
+    """删除过期的输出文件和它的预压缩副本，并清理空的日期目录"""
+    output_path = Path(output_path)
+    compress.remove_siblings(output_path)
+    try:
+        output_path.unlink()
+    except FileNotFoundError:
+        return False
+
+    parent = output_path.parent
+    for _ in range(3):  # DD / MM / YYYY
+        try:
+            parent.rmdir()
+        except OSError:
+            break
+        parent = parent.parent
+    return True
+
+def build_post(post_file):
+    """构建单篇文章，返回输出路径、源文件哈希、搜索索引文档和列表页摘要"""
+    # 读取文件内容
+    raw = Path(post_file).read_bytes()
+    content = raw.decode('utf-8')
+    profiling.count('bytes_read', len(raw))
+
+    # 解析Front Matter
+    with profiling.span('parse', post=post_file.name):
+        front_matter, content = parse_front_matter(content, post_file)
+    # 和 Jekyll 一样，Front Matter 没写日期时用文件名里的日期
+    front_matter.setdefault('date', post_file.name[:10])
+
+    # 创建目录结构
+    output_path = output_path_for(post_file)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # 生成并压缩 HTML
+    with profiling.span('convert', post=post_file.name):
+        values = post_page_values(front_matter, content)
+    with profiling.span('render', post=post_file.name):
+        data = compress.minify_html(load_template('post.html').render(**values)).encode('utf-8')
+        output_path.write_bytes(data)
+        profiling.count('bytes_written', len(data))
+
+    # 顺便从渲染好的正文生成搜索文档和列表页摘要，不必再转换一次
+    url = url_for_output(output_path)
+    with profiling.span('index', post=post_file.name):
+        search_doc = document('post', values['title'], url,
+                              values['date'], plain_text(values['content']))
+        summary = listing.post_summary(front_matter, content, values, url, markdown_to_html)
+
+    return output_path, hashlib.sha256(raw).hexdigest(), search_doc, summary
+
+def manifest_entry(post_file, output_path, source_hash, version, summary):
+    """构建成功后记入清单的条目"""
+    stat = post_file.stat()
+    return {
+        'source_hash': source_hash,
+        'template_version': version,
+        'output': output_path.as_posix(),
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'summary': summary,
+    }
+
+def write_search_index(index, post_keys, post_docs):
+    """增量更新搜索索引，返回 (文档数, 更新的文件数)
+
+    post_docs 是这次重建的文章的文档，其余文章沿用索引里的；即刻动态只重新
+    读取改动过的数据文件。不在 post_keys 里的文章从索引中删除。
+    """
+    with profiling.span('parse', source='thoughts'):
+        thought_docs, thought_keys = index.thought_documents(DATA_DIR)
+    with profiling.span('write', target='search_index'):
+        written = index.update({**post_docs, **thought_docs}, set(post_keys) | thought_keys)
+        index.save()
+    return len(index), written
+
+def site_config():
+    """读取 _config.yml，不存在或格式错误时返回空配置"""
+    try:
+        with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+    except (OSError, yaml.YAMLError):
+        return {}
+    return config if isinstance(config, dict) else {}
+
+def per_page():
+    """首页每页的文章数，和 Jekyll 一样读取 _config.yml 的 paginate"""
+    try:
+        return max(1, int(site_config().get('paginate') or 10))
+    except (TypeError, ValueError):
+        return 10
+
+def post_content_html(post_file):
+    """文章正文的 HTML，feed 条目缓存失效时才调用"""
+    _, content = parse_front_matter(Path(post_file).read_text(encoding='utf-8'), post_file)
+    return markdown_to_html(content)
+
+def write_feeds(entries):
+    """用清单里的摘要生成文章和即刻动态的 feed，只取最新的若干条，返回 (改写的 feed 数, 序列化的条目数)
+
+    条目的序列化结果缓存在 .build/ 里，只有新增或改动的文章才重新读取和转换正文。
+    """
+    config = site_config()
+    author = config.get('author')
+    feed_config = config.get('feed') if isinstance(config.get('feed'), dict) else {}
+    site = {
+        'url': str(config.get('url') or '/').rstrip('/') + '/',
+        'title': str(config.get('title') or ''),
+        'description': str(config.get('description') or ''),
+        'author': str((author.get('name') if isinstance(author, dict) else author) or ''),
+    }
+    try:
+        tz = ZoneInfo(str(config.get('timezone') or DEFAULT_TIMEZONE))
+        posts_limit = max(1, int(feed_config.get('posts_limit') or FEED_POSTS_LIMIT))
+    except (ValueError, TypeError, KeyError):
+        tz = ZoneInfo(DEFAULT_TIMEZONE)
+        posts_limit = FEED_POSTS_LIMIT
+
+    # 构建失败的文章（清单里 template_version 为空）等修好后再进 feed
+    summaries = {entry['summary']['url']: (key, entry) for key, entry in entries.items()
+                 if entry.get('summary') and entry.get('template_version') and not entry['summary']['hidden']}
+    posts = []
+    for summary in listing.sort_posts([entry['summary'] for _, entry in summaries.values()])[:posts_limit]:
+        key, entry = summaries[summary['url']]
+        # 模板版本包含 Markdown 转换器的源码，转换规则变了条目也要重新序列化
+        digest = hashlib.sha256(f"{entry['source_hash']}:{entry['template_version']}:{site['url']}".encode('utf-8'))
+        posts.append(feeds.post_entry(key, summary, digest.hexdigest(), site['url'], tz,
+                                      lambda key=key: post_content_html(key)))
+
+    with profiling.span('parse', source='thoughts'):
+        thoughts = [feeds.thought_entry(thought, site['url'], tz)
+                    for thought in feeds.recent_thoughts(DATA_DIR, FEED_THOUGHTS_LIMIT)]
+    with profiling.span('write', target='feeds'):
+        return feeds.write_feeds({'posts': posts, 'thoughts': thoughts}, site, FEED_CACHE_PATH, OUTPUT_DIR)
+
+def write_listing(entries, previous, version):
+    """用清单里缓存的文章摘要生成首页分页、标签页和标签云，不再读取任何文章
+
+    previous 是上次写入的 {页面: [输入哈希, 内容哈希]}，只有输入或模板版本 version
+    变了的页面才重新渲染。返回 (这次的哈希表, 写入的页面, 删除的页面)。
+    """
+    summaries = [entry['summary'] for entry in entries.values() if entry.get('summary')]
+    with profiling.span('render', target='listing'):
+        pages = listing.plan_pages(summaries, per_page())
+    with profiling.span('write', target='listing'):
+        return listing.write_pages(pages, previous, version, OUTPUT_DIR)
+
+def precompress_outputs(manifest):
+    """为文章页、列表页、静态资源、搜索索引和 feed 写出 .gz / .br，mtime 和大小记入清单，返回压缩的文件数"""
+    paths = [entry['output'] for entry in manifest['posts'].values()]
+    paths.extend(OUTPUT_DIR / key for key in manifest.get('listing', {}))
+    paths.extend(sorted(Path(os.path.relpath(assets.BUILD_DIR)).glob('*')))
+    paths.extend(sorted(SEARCH_DIR.glob('*.json')))
+    paths.extend(feeds.feed_paths(OUTPUT_DIR))
+    with profiling.span('write', target='precompress'):
+        manifest['compressed'], count = compress.precompress(paths, manifest.get('compressed', {}))
+    return count
+
+def _build_post_safe(post_file):
+    """在工作进程中构建文章，把异常转换为错误信息，避免一篇失败中断整批"""
+    try:
+        output_path, source_hash, search_doc, summary = build_post(post_file)
+        return post_file, output_path, source_hash, search_doc, summary, None
+    except Exception as e:
+        return post_file, None, None, None, None, f'{type(e).__name__}: {e}'
+
+def _build_post_traced(post_file):
+    """开启性能记录时在工作进程中使用：连同本进程记录的 span 一起交回主进程"""
+    return _build_post_safe(post_file), profiling.drain()
+
+def render_posts(post_files, jobs=1):
+    """渲染一批文章，按输入顺序逐个产出 (文件, 输出路径, 源哈希, 搜索文档, 摘要, 错误)
+
+    jobs > 1 时把解析和渲染分发到多个进程；结果顺序与 post_files 一致，
+    输出日志在串行和并行模式下完全相同。
+    """
+    if jobs <= 1 or len(post_files) <= 1:
+        for post_file in post_files:
+            yield _build_post_safe(post_file)
+        return
+
+    chunksize = max(1, len(post_files) // (jobs * 4))
+    traced = profiling.enabled()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=profiling.init_worker,
+                             initargs=(traced,)) as executor:
+        if not traced:
+            yield from executor.map(_build_post_safe, post_files, chunksize=chunksize)
+            return
+        for result, drained in executor.map(_build_post_traced, post_files, chunksize=chunksize):
+            profiling.merge(drained)
+            yield result
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='为 _posts 中的文章生成 HTML 页面')
+    parser.add_argument('--incremental', action='store_true',
+                        help='增量构建：只重建有改动或新增的文章，并清理已删除文章的页面')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='并行渲染的进程数，0 表示使用全部 CPU（默认 1）')
+    parser.add_argument('--scan-metadata', action='store_true',
+                        help='只读取所有文章的 Front Matter（不读正文、不生成页面），报告格式错误')
+    parser.add_argument('--watch', action='store_true',
+                        help='构建后继续监视 _posts、_templates 和 assets，改动后只重建受影响的页面')
+    parser.add_argument('--serve', type=int, nargs='?', const=4000, metavar='PORT',
+                        help='监视的同时启动本地预览服务（默认端口 4000），页面随改动自动刷新')
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.serve is not None:
+        args.watch = True
+    if args.watch:
+        # 常驻模式下启动时也只重建有改动的文章
+        args.incremental = True
+    return args
+
+def build_site(args):
+    """按命令行参数构建所有文章，返回退出码"""
+    posts_dir = POSTS_DIR
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
+    # 先生成带指纹的样式表、脚本、图标和子集字体，页面里引用的是它们的地址
+    with profiling.span('write', target='assets'):
+        written, stale = assets.write_bundle()
+    print(f"静态资源: 更新 {written} 个文件，清理 {stale} 个旧版本")
+    critical = assets.bundle()['critical']
+    print("内联的关键 CSS: " + "，".join(f"{kind} {len(css.encode('utf-8')) / 1024:.1f} KB"
+                                    for kind, css in critical.items()))
+    with profiling.span('write', target='fonts'):
+        font_state, font_files = fonts.build_fonts()
+    if font_state is None:
+        print("字体: 没有 fontTools 或 _fonts/ 中没有源字体，继续使用 Google Fonts")
+    else:
+        size = sum(face['size'] for face in font_state['faces'])
+        print(f"字体: {font_state['characters']} 个字符，{len(font_state['faces'])} 个子集"
+              f"（{font_state['flavor']}，共 {size / 1024:.0f} KB），重新生成 {font_files} 个")
+        for face in font_state['faces']:
+            weight = face['weight']
+            label = f'{weight[0]}-{weight[1]}' if isinstance(weight, list) else weight
+            print(f"  - 字重 {label}: {face['size'] / 1024:.0f} KB")
+
+    version = template_version()
+
+    manifest = load_manifest()
+    old_entries = manifest['posts']
+    new_entries = {}
+    search_index = SearchIndex(SEARCH_CACHE_DIR, SEARCH_DIR)
+    search_docs = {}
+    skipped = 0
+
+    # 找出需要重建的文章
+    pending = []
+    with profiling.span('scan'):
+        for post_file in sorted(posts_dir.glob('*.md')):
+            key = post_file.as_posix()
+            entry = old_entries.get(key)
+
+            # 搜索索引里没有的文章（比如索引缓存被删掉了）也要重建一次
+            if (args.incremental and is_up_to_date(post_file, entry, version)
+                    and key in search_index and 'summary' in entry):
+                new_entries[key] = entry
+                skipped += 1
+            else:
+                pending.append(post_file)
+    profiling.count('cache_hits', skipped)
 
-def main():
-    """主函数"""
-    posts_dir = Path('_posts')
-    
     # 处理所有文章
-    for post_file in posts_dir.glob('*.md'):
+    built = 0
+    failed = []
+    for post_file, output_path, source_hash, search_doc, summary, error in render_posts(pending, jobs):
+        key = post_file.as_posix()
         print(f"处理文章: {post_file}")
-        
-        # 读取文件内容
-        with open(post_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # 解析Front Matter
-        front_matter, content = parse_front_matter(content)
-        
-        # 生成HTML
-        html = generate_post_page(post_file, front_matter, content)
-        
-        # 确定输出路径
-        date_part = post_file.name[:10]  # YYYY-MM-DD
-        title_part = post_file.name[11:-3]  # 去掉日期和.md
-        safe_title = re.sub(r'[^\w\-]', '-', title_part.lower())
-        
-        # 创建目录结构
-        year, month, day = date_part.split('-')
-        output_dir = Path(year) / month / day
-        output_dir.mkdir(parents=True, exist_ok=True)
-        
-        output_path = output_dir / f'{safe_title}.html'
-        
-        # 写入文件
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(html)
-        
+
+        if error:
+            print(f"❌ 构建失败: {post_file}: {error}")
+            failed.append(post_file)
+            # 保留旧页面，但让下次增量构建重试
+            if key in old_entries:
+                new_entries[key] = dict(old_entries[key], template_version=None)
+            continue
+
         print(f"生成页面: {output_path}")
-    
+        new_entries[key] = manifest_entry(post_file, output_path, source_hash, version, summary)
+        search_docs[key] = search_doc
+        built += 1
+
+    profiling.count('posts_built', built)
+
+    # 清理已删除或改名文章留下的旧页面
+    live_outputs = {entry['output'] for entry in new_entries.values()}
+    removed = 0
+    for entry in old_entries.values():
+        if entry['output'] not in live_outputs and remove_output(entry['output']):
+            print(f"删除过期页面: {entry['output']}")
+            removed += 1
+
+    listing_hashes, listing_written, listing_removed = write_listing(new_entries, manifest.get('listing', {}), version)
+    for path in listing_removed:
+        print(f"删除过期列表页: {path}")
+    print(f"列表页: {len(listing_hashes)} 个，更新 {len(listing_written)} 个")
+
+    feeds_written, serialized = write_feeds(new_entries)
+    print(f"Feed: {len(feeds.feed_paths())} 个，更新 {feeds_written} 个，序列化 {serialized} 条")
+
+    doc_count, written = write_search_index(search_index, new_entries, search_docs)
+    print(f"搜索索引: {doc_count} 篇文档，更新 {written} 个文件")
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'posts': new_entries,
+        'listing': listing_hashes,
+        'compressed': manifest.get('compressed', {}),
+    }
+    compressed = precompress_outputs(manifest)
+    print(f"预压缩: 更新 {compressed} 个文件（{' + '.join(compress.formats())}）")
+
+    with profiling.span('write', target='manifest'):
+        save_manifest(manifest)
+
+    if args.incremental:
+        print(f"增量构建: 重建 {built} 篇，跳过 {skipped} 篇，清理 {removed} 个过期页面")
+    if failed:
+        print(f"⚠️  {len(failed)} 篇文章构建失败")
+        return 1
     print("所有文章构建完成！")
+    return 0
+
+def scan_metadata():
+    """--scan-metadata：读取全部文章的元数据，有格式错误时返回 1"""
+    start = time.perf_counter()
+    cache = MetadataCache(METADATA_CACHE_PATH)
+    with profiling.span('parse', target='front_matter'):
+        metadata, errors = cache.load_all(sorted(POSTS_DIR.glob('*.md')))
+    cache.save()
+    elapsed = (time.perf_counter() - start) * 1000
+
+    for error in errors:
+        print(f"❌ {error}")
+    tags = {tag for front_matter in metadata.values() for tag in listing.post_tags(front_matter)}
+    print(f"元数据: {len(metadata)} 篇文章，{len(tags)} 个标签，用时 {elapsed:.1f} ms")
+    if errors:
+        print(f"⚠️  {len(errors)} 篇文章的 Front Matter 有错误")
+        return 1
+    return 0
+
+def rebuild_changed(changed, removed, manifest, search_docs, font_chars=None):
+    """按监视到的改动重建页面，更新内存中的清单，返回需要刷新的 URL
+
+    重建的文章的搜索文档放进 search_docs，等改动告一段落后再写入索引。
+
+    模板或样式表、共用脚本改动时清掉缓存，重新生成资源并重建所有文章；
+    文章改动只重建这一篇；其他静态资源不需要构建，直接刷新。
+    font_chars 是当前子集字体覆盖的字符（不自托管字体时为 None）：改动的文章
+    用到了新字符时重新生成子集，字体地址变了就重建所有文章。
+    重建过文章后再用摘要生成列表页，只有内容变了的列表页会被重写和刷新。
+    """
+    entries = manifest['posts']
+    urls = []
+    posts = set()
+    template_changed = False
+    asset_sources = {source.resolve() for source in assets.source_files()}
+    for path in changed | removed:
+        path = Path(path)
+        if path.parent == POSTS_DIR and path.suffix == '.md':
+            posts.add(path)
+        elif TEMPLATES_DIR in path.resolve().parents or path.resolve() in asset_sources:
+            template_changed = True
+        else:
+            urls.append(devserver.url_for(path))
+
+    if template_changed:
+        load_template.cache_clear()
+        assets.clear()
+        assets.write_bundle()
+        posts.update(Path(key) for key in entries)
+        posts.update(POSTS_DIR.glob('*.md'))
+
+    def build(post_files, version):
+        for post_file in sorted(post_files):
+            key = post_file.as_posix()
+            if not post_file.exists():
+                entry = entries.pop(key, None)
+                if entry and remove_output(entry['output']):
+                    print(f"删除页面: {entry['output']}")
+                continue
+            try:
+                output_path, source_hash, search_doc, summary = build_post(post_file)
+            except Exception as e:
+                print(f"❌ 构建失败: {post_file}: {type(e).__name__}: {e}")
+                continue
+            old = entries.get(key)
+            if old and old['output'] != output_path.as_posix():
+                remove_output(old['output'])
+            entries[key] = manifest_entry(post_file, output_path, source_hash, version, summary)
+            search_docs[key] = search_doc
+            urls.append(url_for_output(output_path))
+
+    version = template_version()
+    build(posts, version)
+
+    if font_chars is not None and posts:
+        new_chars = set()
+        for post_file in posts:
+            if post_file.exists():
+                new_chars.update(post_file.read_text(encoding='utf-8', errors='ignore'))
+        new_chars = {c for c in new_chars if c.isprintable()} - font_chars
+        if new_chars:
+            font_chars.update(new_chars)
+            head = fonts.head_html()
+            fonts.build_fonts()
+            if fonts.head_html() != head:
+                print(f"字体: 新增 {len(new_chars)} 个字符，重新生成子集并重建所有文章")
+                version = template_version()
+                build(set(POSTS_DIR.glob('*.md')), version)
+
+    if posts:
+        hashes, written, listing_removed = write_listing(entries, manifest.get('listing', {}), version)
+        manifest['listing'] = hashes
+        urls.extend(listing_url(path) for path in written + listing_removed)
+    return urls
+
+def listing_url(path):
+    """列表页 index.html 对应的目录 URL"""
+    return devserver.url_for(path.parent) + '/' if path.parent != Path('.') else '/'
+
+def write_deferred(manifest, search_index, search_docs):
+    """--watch 模式下推迟到空闲时的工作：搜索索引、feed、预压缩和清单"""
+    write_search_index(search_index, manifest['posts'], search_docs)
+    search_docs.clear()
+    write_feeds(manifest['posts'])
+    precompress_outputs(manifest)
+    save_manifest(manifest)
+
+def watch_site(args):
+    """--watch / --serve：常驻进程，文章和模板留在内存里，改动后只重建受影响的页面"""
+    manifest = load_manifest()
+    search_index = SearchIndex(SEARCH_CACHE_DIR, SEARCH_DIR)
+    search_docs = {}
+    # 自托管字体时记下子集覆盖的字符，改动的文章用到新字符时再重新生成
+    font_chars = set(fonts.site_characters()) if fonts.load_state().get('faces') else None
+    reload = devserver.LiveReload()
+    server = None
+    if args.serve is not None:
+        server = devserver.serve(OUTPUT_DIR, args.serve, reload, fallback=Path('.'))
+        print(f"🌐 预览: http://localhost:{args.serve}/")
+    watcher = devserver.Watcher(WATCH_DIRS)
+    print(f"👀 监视 {', '.join(os.path.relpath(d) for d in WATCH_DIRS)} 的改动（Ctrl+C 退出）")
+
+    dirty = False
+    try:
+        for changed, removed in watcher.watch(WATCH_INTERVAL):
+            if not changed and not removed:
+                # 改动告一段落后再写搜索索引、feed、预压缩和清单，不占用预览的时间
+                if dirty:
+                    write_deferred(manifest, search_index, search_docs)
+                    dirty = False
+                continue
+
+            start = time.perf_counter()
+            urls = rebuild_changed(changed, removed, manifest, search_docs, font_chars)
+            if not urls:
+                continue
+            clients = reload.notify(urls)
+            dirty = True
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"⚡ 更新 {len(urls)} 个页面，用时 {elapsed:.0f} ms，通知 {clients} 个页面刷新")
+    except KeyboardInterrupt:
+        print()
+        print("停止监视")
+        if dirty:
+            write_deferred(manifest, search_index, search_docs)
+    finally:
+        if server is not None:
+            server.shutdown()
+    return 0
+
+def main(argv=None):
+    """主函数"""
+    args = parse_args(argv)
+    profiling.enable_from_args(args)
+    try:
+        if args.scan_metadata:
+            return scan_metadata()
+        with profiling.span('build'):
+            status = build_site(args)
+    finally:
+        profiling.finish()
+    if args.watch:
+        return watch_site(args)
+    return status
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
@@ -0,0 +1,24 @@
+"""
+即刻动态同步
+
+从 RSSHub 获取即刻用户（以及 feeds.yml 中登记的其他 feed）的动态，下载图片，
+按月写入 _data/<stream>/。
+
+- config：默认配置和文件位置
+- feeds：feed 注册表
+- pool：HTTP keep-alive 连接池和限速
+- session：多次同步共享的连接池和缓存
+- fetcher：镜像竞速、条件请求、流式读取
+- parser：RSS 流式解析，转换为 thoughts 记录
+- downloader / images：图片并发下载、格式识别和压缩
+- files：原子写入等文件工具
+- store：按月分片存储、按内容寻址的图片存储、运行日志
+- merger：填回图片、合并去重
+- runner：同步一个 feed，sync() 可以在同一进程里反复调用
+- scheduler：多个 feed 并发同步
+- cli：命令行入口（python -m jike_sync）
+"""
+from jike_sync.runner import sync
+from jike_sync.scheduler import sync_feeds
+
+__all__ = ['sync', 'sync_feeds']
@@ -0,0 +1,5 @@
+import sys
+
+from jike_sync.cli import main
+
+sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+命令行入口：python -m jike_sync 或 python scripts/sync_jike_simple.py
+"""
+import argparse
+import os
+
+from jike_sync import config, runner
+from jike_sync.feeds import jike_feed, load_feeds
+from jike_sync.scheduler import sync_feeds
+from jike_sync.session import Session
+from sitegen import profiling
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='从 RSSHub 同步动态到 _data/<stream>/')
+    parser.add_argument('--feeds', metavar='PATH',
+                        help='feed 注册表，默认仓库根目录的 feeds.yml')
+    parser.add_argument('--feed', dest='feed_names', action='append', metavar='NAME',
+                        help='只同步注册表中的这些 feed，可重复指定')
+    parser.add_argument('--user', dest='users', action='append', metavar='USER_ID',
+                        help='直接同步这些即刻用户到 thoughts 流（不读注册表），可重复指定')
+    parser.add_argument('--source', dest='sources', action='append', metavar='URL',
+                        help='RSSHub 实例地址，可重复指定，代替内置的镜像列表')
+    parser.add_argument('--jobs', type=int, default=config.FEED_CONCURRENCY,
+                        help=f'同时同步的流数（默认 {config.FEED_CONCURRENCY}）')
+    parser.add_argument('--concurrency', type=int, default=config.DOWNLOAD_CONCURRENCY,
+                        help=f'每个 feed 图片下载的总并发数（默认 {config.DOWNLOAD_CONCURRENCY}）')
+    parser.add_argument('--per-host', type=int, default=config.DOWNLOAD_PER_HOST,
+                        help=f'单个主机的下载并发数（默认 {config.DOWNLOAD_PER_HOST}）')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='只获取和解析，列出会新增的动态，不下载图片也不写入任何文件')
+    parser.add_argument('--print-paths', action='store_true',
+                        help='只列出这些 feed 会改动的数据路径（相对仓库根目录），供 git add 使用')
+    profiling.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def select_feeds(args, paths):
+    """命令行指定的 feed：--user 优先，否则读注册表（可用 --feed 筛选）"""
+    if args.users:
+        return [jike_feed(user_id) for user_id in args.users]
+
+    feeds = load_feeds(args.feeds or paths.feeds_file)
+    if args.feed_names:
+        known = {feed.name for feed in feeds}
+        missing = [name for name in args.feed_names if name not in known]
+        if missing:
+            raise ValueError(f"注册表中没有这些 feed: {', '.join(missing)}")
+        feeds = [feed for feed in feeds if feed.name in args.feed_names]
+    return feeds
+
+
+def data_paths(feeds, paths):
+    """同步会改动的路径：每个流的分片目录、图片目录和旧版单文件（迁移后删除）"""
+    result = []
+    for stream in dict.fromkeys(feed.stream for feed in feeds):
+        for path in (paths.shard_dir(stream), paths.images_dir(stream), paths.legacy_file(stream)):
+            if path:
+                result.append(os.path.relpath(path, paths.root))
+    return result
+
+
+def exit_code(results):
+    """失败返回 1；所有镜像都不可用时在 GitHub Actions 中返回 0，等待下次定时重试"""
+    statuses = {result['status'] for result in results}
+    if runner.FAILED in statuses:
+        return 1
+    if runner.UNAVAILABLE in statuses:
+        if os.getenv('GITHUB_ACTIONS'):
+            print("⚠️  GitHub Actions: 优雅退出，等待下次重试")
+            return 0
+        return 1
+    return 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = config.Paths()
+    try:
+        feeds = select_feeds(args, paths)
+    except (OSError, ValueError) as e:
+        print(f"❌ 读取 feed 注册表失败: {e}")
+        return 1
+    if args.print_paths:
+        for path in data_paths(feeds, paths):
+            print(path)
+        return 0
+    if not feeds:
+        print("⚠️  没有要同步的 feed")
+        return 0
+
+    profiling.enable_from_args(args)
+    try:
+        with profiling.span('sync'), Session(paths) as session:
+            results = sync_feeds(
+                feeds,
+                session,
+                max_workers=args.jobs,
+                sources=args.sources,
+                concurrency=args.concurrency,
+                per_host=args.per_host,
+                dry_run=args.dry_run,
+            )
+    finally:
+        profiling.finish()
+
+    if len(results) > 1:
+        print("📋 各 feed 结果:")
+        for result in results:
+            print(f"  - {result['feed']}: {result['status']}，新增 {result.get('added', 0)} 条")
+        print()
+    if not args.dry_run and any(result['status'] == runner.OK for result in results):
+        print("💡 下一步:")
+        print("  - 本地预览: bundle exec jekyll serve")
+        print("  - 访问: http://localhost:4000/thoughts/")
+    return exit_code(results)
@@ -0,0 +1,79 @@
+"""
+同步的默认配置和文件位置
+
+带环境变量的配置项可以在 GitHub Actions 中调整，命令行参数优先于环境变量。
+"""
+import os
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 图片下载并发：总并发数、单个主机的并发数、每条动态的总时间预算（秒）
+DOWNLOAD_CONCURRENCY = int(os.getenv('JIKE_DOWNLOAD_CONCURRENCY', '8'))
+DOWNLOAD_PER_HOST = int(os.getenv('JIKE_DOWNLOAD_PER_HOST', '4'))
+DOWNLOAD_ITEM_BUDGET = float(os.getenv('JIKE_DOWNLOAD_ITEM_BUDGET', '60'))
+
+# 图片处理：原图最大宽度、响应式版本的宽度和质量、占位图宽度
+IMAGE_MAX_WIDTH = 1600
+IMAGE_VARIANT_WIDTHS = (480, 960)
+IMAGE_VARIANT_QUALITY = 75
+IMAGE_PLACEHOLDER_WIDTH = 16
+
+# 镜像竞速：同时请求的镜像数、追加下一个镜像前的等待时间（秒）
+MIRROR_RACE_WIDTH = int(os.getenv('JIKE_MIRROR_RACE_WIDTH', '2'))
+MIRROR_HEDGE_DELAY = float(os.getenv('JIKE_MIRROR_HEDGE_DELAY', '2'))
+# 镜像健康度：连续失败几次后进入冷却、冷却时长（秒）、延迟平滑系数、无记录时的默认延迟
+MIRROR_FAILURE_THRESHOLD = 3
+MIRROR_COOLDOWN = 6 * 3600
+MIRROR_LATENCY_ALPHA = 0.3
+MIRROR_DEFAULT_LATENCY = 5.0
+
+# 流式读取 RSS 的块大小；连续遇到多少条已有动态后停止解析（兼容置顶动态）
+STREAM_CHUNK_SIZE = 16 * 1024
+EARLY_STOP_KNOWN = int(os.getenv('JIKE_EARLY_STOP_KNOWN', '3'))
+
+# 同时同步的 feed 数（不同的流并发，同一个流内依次进行）
+FEED_CONCURRENCY = int(os.getenv('JIKE_FEED_CONCURRENCY', '4'))
+
+# 多个 RSSHub 镜像源（按优先级排序，实际请求顺序还会参考健康记录）
+RSSHUB_INSTANCES = [
+    "https://rsshub.app",
+    "https://rss.miantiao.me",
+    "https://rss.shab.fun",
+    "https://rsshub.rssforever.com",
+]
+
+
+class Paths:
+    """一个站点目录下同步读写的文件
+
+    每个流（stream）的动态写入 _data/<流>/，图片保存到 assets/<流>/。
+    """
+
+    # 旧版的单文件存储 _data/thoughts.yml，第一次运行时自动迁移
+    LEGACY_STREAM = 'thoughts'
+
+    def __init__(self, root=PROJECT_ROOT):
+        self.root = root
+        self.data_dir = os.path.join(root, '_data')
+        # feed 注册表
+        self.feeds_file = os.path.join(root, 'feeds.yml')
+
+        # 同步缓存（不提交到仓库，GitHub Actions 中由 actions/cache 保存）
+        self.cache_dir = os.path.join(root, '.cache', 'jike-sync')
+        self.fetch_cache_file = os.path.join(self.cache_dir, 'fetch_cache.json')
+        self.mirror_health_file = os.path.join(self.cache_dir, 'mirror_health.json')
+
+    def shard_dir(self, stream):
+        return os.path.join(self.data_dir, stream)
+
+    def images_dir(self, stream):
+        return os.path.join(self.root, 'assets', stream)
+
+    def legacy_file(self, stream):
+        if stream != self.LEGACY_STREAM:
+            return None
+        return os.path.join(self.data_dir, f'{stream}.yml')
+
+    def journal_file(self, feed_name):
+        """每个 feed 一份运行日志，多个 feed 同时同步时互不干扰"""
+        return os.path.join(self.cache_dir, f'journal-{feed_name}.jsonl')
@@ -0,0 +1,125 @@
+"""
+图片并发下载：限制总并发和单主机并发，每条动态共享一个时间预算
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from jike_sync.images import detect_image_type
+from jike_sync.pool import ConnectionPool
+from sitegen import profiling
+
+
+def download_image(pool, url, timeout=30, deadline=None, limiter=None):
+    """通过连接池下载图片，返回图片内容，失败返回 None
+
+    deadline 是 time.monotonic() 的截止时间，超过后放弃下载（包括读取到一半的响应）。
+    """
+    try:
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+            'Referer': 'https://m.okjike.com/'
+        }
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+            if timeout <= 0:
+                print(f"    ✗ 超出时间预算，跳过: {url}")
+                return None
+
+        with pool.open(url, headers, timeout=timeout, limiter=limiter) as response:
+            chunks = []
+            while True:
+                chunk = response.read(64 * 1024)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                if deadline is not None and time.monotonic() > deadline:
+                    print(f"    ✗ 超出时间预算，放弃: {url}")
+                    return None
+            data = b''.join(chunks)
+
+            # 检查是否是有效的图片数据（不是 JSON 错误或 HTML 页面）
+            if detect_image_type(data) is None:
+                try:
+                    json_data = json.loads(data)
+                    if 'error' in json_data:
+                        print(f"    ✗ 图片获取失败: {json_data.get('error')}")
+                        return None
+                except:
+                    pass
+                print(f"    ✗ 不是有效的图片: {url}")
+                return None
+
+            return data
+
+    except Exception as e:
+        print(f"    ✗ 下载失败: {e}")
+        return None
+
+
+def download_images(jobs, max_workers=8, per_host=4, item_budget=60, on_result=None, pool=None, limiter=None):
+    """并发下载图片
+
+    jobs: [(item_key, url)]，item_key 相同的图片属于同一条动态，
+    共享 item_budget 秒的总时间预算（从这条动态的第一张图片开始下载时计时）。
+    同一主机最多 per_host 个并发连接。返回 {url: 图片内容或 None}。
+    on_result(url, 图片内容或 None) 在下载线程中每完成一张调用一次。
+    pool 是共用的连接池，没有传入时这一批下载单独用一个；limiter 限制请求速率。
+    """
+    results = {}
+    if not jobs:
+        return results
+
+    own_pool = pool is None
+    pool = pool or ConnectionPool()
+    lock = threading.Lock()
+    host_slots = {}
+    deadlines = {}
+
+    def host_slot(url):
+        host = urlparse(url).netloc
+        with lock:
+            if host not in host_slots:
+                host_slots[host] = threading.BoundedSemaphore(per_host)
+            return host_slots[host]
+
+    def item_deadline(item_key):
+        with lock:
+            if item_key not in deadlines:
+                deadlines[item_key] = time.monotonic() + item_budget
+            return deadlines[item_key]
+
+    def run(job):
+        item_key, url = job
+        with host_slot(url):
+            data = download_image(pool, url, deadline=item_deadline(item_key), limiter=limiter)
+        if on_result is not None:
+            on_result(url, data)
+        return data
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for job, data in zip(jobs, executor.map(run, jobs)):
+                results[job[1]] = data
+    finally:
+        if own_pool:
+            pool.close()
+
+    return results
+
+
+def plan_downloads(thought_images, image_store):
+    """列出需要下载的图片 [(item_key, url)]：图片索引里没有的 URL，同一个 URL 只下载一次"""
+    jobs = []
+    queued = set()
+    for thought, image_urls in thought_images:
+        item_key = id(thought)
+        for img_url in image_urls:
+            if img_url not in queued and image_store.lookup(img_url) is None:
+                queued.add(img_url)
+                jobs.append((item_key, img_url))
+            else:
+                profiling.count('image_cache_hits')
+    return jobs
@@ -0,0 +1,75 @@
+"""
+feed 注册表：要同步哪些 feed、写入哪个动态流（见仓库根目录的 feeds.yml）
+"""
+import re
+
+import yaml
+
+from jike_sync import config
+
+NAME_RE = re.compile(r'^[a-z0-9][a-z0-9_-]*$')
+DEFAULT_STREAM = 'thoughts'
+# 图片保存在 assets/<stream>/，这些目录已经被构建产物和站点资源占用
+RESERVED_STREAMS = frozenset({'build', 'search', 'js', 'css', 'fonts'})
+
+
+class Feed:
+    """一个要同步的 feed
+
+    route 是 RSSHub 路由（如 /jike/user/<ID>），依次尝试 sources 中的实例；
+    url 是完整的 RSS 地址，直接请求。两者必须且只能设置一个。
+    """
+
+    def __init__(self, name, route=None, url=None, stream=DEFAULT_STREAM, sources=None, rate=None):
+        if not NAME_RE.match(str(name)):
+            raise ValueError(f'feed 名称只能包含小写字母、数字、- 和 _: {name!r}')
+        if not NAME_RE.match(str(stream)):
+            raise ValueError(f'feed {name}: stream 只能包含小写字母、数字、- 和 _: {stream!r}')
+        if stream in RESERVED_STREAMS:
+            raise ValueError(f'feed {name}: stream 不能用 {stream!r}，assets/{stream}/ 另有用途')
+        if (route is None) == (url is None):
+            raise ValueError(f'feed {name}: route 和 url 必须且只能设置一个')
+        self.name = name
+        self.route = route
+        self.url = url
+        self.stream = stream
+        self.sources = list(sources) if sources else None
+        self.rate = float(rate) if rate else None
+
+    def candidates(self, default_sources=None):
+        """要尝试的实例（url 型 feed 只有它自己）"""
+        if self.url:
+            return [self.url]
+        return list(self.sources or default_sources or config.RSSHUB_INSTANCES)
+
+    def feed_url(self, candidate):
+        return candidate if self.url else candidate.rstrip('/') + self.route
+
+    def __repr__(self):
+        return f'Feed({self.name!r}, stream={self.stream!r})'
+
+
+def jike_feed(user_id, stream=DEFAULT_STREAM):
+    """即刻用户的 RSSHub feed"""
+    return Feed(f'jike-{user_id.lower()}', route=f'/jike/user/{user_id}', stream=stream)
+
+
+def load_feeds(path):
+    """读取注册表，返回 [Feed]；名称重复或字段不对时抛出 ValueError"""
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = yaml.safe_load(f) or []
+
+    feeds = []
+    names = set()
+    for entry in entries:
+        if not isinstance(entry, dict) or 'name' not in entry:
+            raise ValueError(f'{path}: 每个 feed 都需要 name: {entry!r}')
+        unknown = set(entry) - {'name', 'route', 'url', 'stream', 'sources', 'rate'}
+        if unknown:
+            raise ValueError(f"{path}: feed {entry['name']} 有未知字段 {', '.join(sorted(unknown))}")
+        feed = Feed(**entry)
+        if feed.name in names:
+            raise ValueError(f'{path}: feed 名称重复: {feed.name}')
+        names.add(feed.name)
+        feeds.append(feed)
+    return feeds
@@ -0,0 +1,231 @@
+"""
+获取 RSS：多个 RSSHub 镜像对冲请求，按健康记录排序，带条件请求缓存
+"""
+import json
+import os
+import queue
+import threading
+import time
+import urllib.error
+
+from jike_sync.config import (
+    MIRROR_COOLDOWN,
+    MIRROR_DEFAULT_LATENCY,
+    MIRROR_FAILURE_THRESHOLD,
+    MIRROR_LATENCY_ALPHA,
+    STREAM_CHUNK_SIZE,
+)
+from jike_sync.files import atomic_write
+from sitegen import profiling
+
+
+def load_fetch_cache(cache_file):
+    """读取 RSS 条件请求缓存：{url: {etag, last_modified, body_file}}"""
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_fetch_cache(cache_file, cache):
+    """原子写入 RSS 条件请求缓存"""
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    with atomic_write(cache_file) as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2)
+
+
+def conditional_headers(cache_entry):
+    """根据缓存的校验信息生成 If-None-Match / If-Modified-Since 请求头"""
+    headers = {}
+    if cache_entry.get('etag'):
+        headers['If-None-Match'] = cache_entry['etag']
+    if cache_entry.get('last_modified'):
+        headers['If-Modified-Since'] = cache_entry['last_modified']
+    return headers
+
+
+def load_mirror_health(health_file):
+    """读取镜像健康记录：{instance: {latency, successes, failures, consecutive_failures, last_failure}}"""
+    try:
+        with open(health_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def record_mirror_result(health, instance, ok, latency):
+    """更新镜像的成功率和延迟（指数滑动平均），ok 为 None 时只记录延迟"""
+    h = health.setdefault(instance, {'latency': None, 'successes': 0, 'failures': 0, 'consecutive_failures': 0})
+    previous = h['latency'] if h['latency'] is not None else latency
+    h['latency'] = round(previous * (1 - MIRROR_LATENCY_ALPHA) + latency * MIRROR_LATENCY_ALPHA, 3)
+    if ok is None:
+        return
+    if ok:
+        h['successes'] += 1
+        h['consecutive_failures'] = 0
+    else:
+        h['failures'] += 1
+        h['consecutive_failures'] += 1
+        h['last_failure'] = time.time()
+
+
+def rank_mirrors(instances, health):
+    """按健康度排序镜像：连续失败的镜像在冷却期内排到最后，其余按平均延迟排序"""
+    now = time.time()
+
+    def key(item):
+        index, instance = item
+        h = health.get(instance, {})
+        failures = h.get('consecutive_failures', 0)
+        cooling = (failures >= MIRROR_FAILURE_THRESHOLD
+                   and now - h.get('last_failure', 0) < MIRROR_COOLDOWN)
+        latency = h.get('latency') or MIRROR_DEFAULT_LATENCY
+        return (cooling, latency * (1 + failures), index)
+
+    return [instance for _, instance in sorted(enumerate(instances), key=key)]
+
+
+def race_mirrors(instances, fetch_one, health, initial=2, hedge_delay=2.0, discard=None):
+    """对冲请求多个镜像，返回第一个有效结果 (instance, result)，全部失败返回 (None, None)
+
+    先同时请求排名前 initial 个镜像；任何一个失败，或者 hedge_delay 秒内没有结果，
+    就再加一个镜像。拿到第一个有效结果后立即返回，没用上的结果（包括胜出之后才
+    返回的）交给 discard 释放，比如关闭响应、把连接还给连接池。
+    返回前把每个镜像的结果和延迟写入 health；胜出时还没返回、并且已经比胜出者
+    等得更久的镜像按超时记一次失败（只是慢的镜像冷却后会重新排回前面）。
+    """
+    results = queue.Queue()
+    pending = list(instances)
+    started = {}
+    lock = threading.Lock()
+    finished = False
+
+    def release(result):
+        if discard is None or result is None:
+            return
+        try:
+            discard(result)
+        except Exception:
+            pass
+
+    def worker(instance):
+        try:
+            outcome = (instance, fetch_one(instance), None)
+        except Exception as e:
+            outcome = (instance, None, e)
+        with lock:
+            late = finished
+            if not late:
+                results.put(outcome)
+        if late:
+            release(outcome[1])
+
+    def launch():
+        instance = pending.pop(0)
+        print(f"  尝试: {instance}")
+        started[instance] = time.monotonic()
+        threading.Thread(target=worker, args=(instance,), daemon=True).start()
+
+    for _ in range(min(initial, len(pending))):
+        launch()
+
+    running = len(started)
+    while running:
+        try:
+            instance, result, error = results.get(timeout=hedge_delay if pending else None)
+        except queue.Empty:
+            launch()
+            running += 1
+            continue
+
+        running -= 1
+        latency = time.monotonic() - started.pop(instance)
+        if error is None:
+            record_mirror_result(health, instance, True, latency)
+            with lock:
+                finished = True
+            # 和胜出者几乎同时返回、还在队列里的结果照常记录，然后释放
+            while True:
+                try:
+                    other_instance, other, other_error = results.get_nowait()
+                except queue.Empty:
+                    break
+                waited = time.monotonic() - started.pop(other_instance)
+                record_mirror_result(health, other_instance, other_error is None, waited)
+                release(other)
+            for slow_instance, start in started.items():
+                waited = time.monotonic() - start
+                if waited > latency:
+                    record_mirror_result(health, slow_instance, False, waited)
+                    print(f"  ✗ 放弃: {slow_instance}（已等待 {waited:.1f}s）")
+            return instance, result
+
+        record_mirror_result(health, instance, False, latency)
+        print(f"  ✗ 失败: {instance}: {error}")
+        if pending:
+            launch()
+            running += 1
+
+    return None, None
+
+
+def stream_response(response, first_chunk, body_path, state):
+    """边读响应边写入缓存文件；完整读完后 state['complete'] 置为 True
+
+    body_path 为 None 时只读取不保存（--dry-run）。
+    """
+    if body_path is not None:
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+    f = open(body_path, 'wb') if body_path is not None else None
+    try:
+        chunk = first_chunk
+        while chunk:
+            if f is not None:
+                f.write(chunk)
+            profiling.count('bytes_fetched', len(chunk))
+            yield chunk
+            chunk = response.read(STREAM_CHUNK_SIZE)
+        state['complete'] = True
+    finally:
+        if f is not None:
+            f.close()
+        response.close()
+
+
+def read_file_chunks(path):
+    """按块读取本地文件"""
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def open_feed(pool, url, cache_entry, timeout=15, limiter=None):
+    """通过连接池请求一个 feed，返回 ('ok', (缓存条目, 响应, 第一块数据)) 或 ('not_modified', None)
+
+    只读第一块数据确认是 RSS，剩下的由调用方边读边解析。
+    """
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+    }
+    headers.update(conditional_headers(cache_entry))
+
+    try:
+        response = pool.open(url, headers, timeout=timeout, limiter=limiter)
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return 'not_modified', None
+        raise
+
+    first_chunk = response.read(STREAM_CHUNK_SIZE)
+    # 有的镜像出错时返回 200 的 HTML 页面
+    if b'<rss' not in first_chunk[:2048] and b'<feed' not in first_chunk[:2048]:
+        response.close()
+        raise ValueError('响应不是 RSS')
+    return 'ok', ({
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+    }, response, first_chunk)
@@ -0,0 +1,160 @@
+"""
+图片格式识别和处理
+
+Pillow 是可选依赖：没有安装时跳过图片压缩和多尺寸生成，只记录宽高。
+"""
+import base64
+import io
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+from jike_sync.config import (
+    IMAGE_MAX_WIDTH,
+    IMAGE_PLACEHOLDER_WIDTH,
+    IMAGE_VARIANT_QUALITY,
+    IMAGE_VARIANT_WIDTHS,
+)
+from jike_sync.files import atomic_write
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = ImageOps = None
+
+
+def detect_image_type(data):
+    """根据文件头判断图片格式，不是图片返回 None"""
+    if data[:3] == b'\xff\xd8\xff':
+        return 'jpeg'
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        return 'png'
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    if data[4:8] == b'ftyp' and data[8:12] in (b'avif', b'avis'):
+        return 'avif'
+    return None
+
+
+def read_image_size(data, kind):
+    """不依赖 Pillow 读取图片宽高，无法识别时返回 None"""
+    try:
+        if kind == 'png':
+            return struct.unpack('>II', data[16:24])
+        if kind == 'gif':
+            return struct.unpack('<HH', data[6:10])
+        if kind == 'webp':
+            chunk = data[12:16]
+            if chunk == b'VP8 ':
+                w, h = struct.unpack('<HH', data[26:30])
+                return w & 0x3fff, h & 0x3fff
+            if chunk == b'VP8L':
+                bits = int.from_bytes(data[21:25], 'little')
+                return (bits & 0x3fff) + 1, ((bits >> 14) & 0x3fff) + 1
+            if chunk == b'VP8X':
+                return int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+        if kind == 'jpeg':
+            pos = 2
+            while pos + 9 < len(data):
+                if data[pos] != 0xff:
+                    return None
+                marker = data[pos + 1]
+                length = struct.unpack('>H', data[pos + 2:pos + 4])[0]
+                # SOF0-SOF15，排除 DHT(C4)、JPG(C8)、DAC(CC)
+                if 0xc0 <= marker <= 0xcf and marker not in (0xc4, 0xc8, 0xcc):
+                    h, w = struct.unpack('>HH', data[pos + 5:pos + 9])
+                    return w, h
+                pos += 2 + length
+    except struct.error:
+        pass
+    return None
+
+
+def image_variant_formats():
+    """当前 Pillow 支持输出的响应式图片格式"""
+    if Image is None:
+        return []
+    Image.init()
+    return [fmt for fmt in ('AVIF', 'WEBP') if fmt in Image.SAVE]
+
+
+def optimize_image(path, web_path):
+    """处理一张新下载的图片，返回写入 thought 的元数据
+
+    去掉 EXIF 等元数据并限制原图宽度，生成多种宽度的 WebP/AVIF 版本和一张
+    极小的模糊占位图（data URI）。没有安装 Pillow 时只记录宽高。
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    kind = detect_image_type(data)
+    meta = {'src': web_path}
+
+    # 动图和 AVIF 原样保留
+    if Image is None or kind in ('gif', 'avif'):
+        size = read_image_size(data, kind)
+        if size and all(size):
+            meta['width'], meta['height'] = size
+        return meta
+
+    with Image.open(io.BytesIO(data)) as original:
+        im = ImageOps.exif_transpose(original)
+        if im.mode not in ('RGB', 'RGBA'):
+            im = im.convert('RGBA' if 'transparency' in im.info or im.mode in ('LA', 'PA') else 'RGB')
+        if im.width > IMAGE_MAX_WIDTH:
+            im = im.resize((IMAGE_MAX_WIDTH, round(im.height * IMAGE_MAX_WIDTH / im.width)), Image.LANCZOS)
+
+        # 重新编码原图，不传 exif / icc_profile，元数据随之去掉
+        with atomic_write(path, 'wb') as f:
+            if kind == 'jpeg':
+                im.convert('RGB').save(f, 'JPEG', quality=85, optimize=True, progressive=True)
+            elif kind == 'png':
+                im.save(f, 'PNG', optimize=True)
+            else:
+                im.save(f, 'WEBP', quality=82)
+        meta['width'], meta['height'] = im.size
+
+        stem, _ = os.path.splitext(path)
+        web_stem, _ = os.path.splitext(web_path)
+        widths = [w for w in IMAGE_VARIANT_WIDTHS if w < im.width] + [im.width]
+        srcset = {}
+        for fmt in image_variant_formats():
+            ext = fmt.lower()
+            entries = []
+            for width in widths:
+                variant = im if width == im.width else im.resize((width, round(im.height * width / im.width)), Image.LANCZOS)
+                with atomic_write(f'{stem}-{width}w.{ext}', 'wb') as f:
+                    variant.save(f, fmt, quality=IMAGE_VARIANT_QUALITY)
+                entries.append(f'{web_stem}-{width}w.{ext} {width}w')
+            srcset[ext] = ', '.join(entries)
+        if srcset:
+            meta['srcset'] = srcset
+
+        # 模糊占位图：宽 16px 的低质量 WebP/JPEG，直接内联在数据里
+        thumb = im.copy()
+        thumb.thumbnail((IMAGE_PLACEHOLDER_WIDTH, IMAGE_PLACEHOLDER_WIDTH * 4))
+        buffer = io.BytesIO()
+        if 'WEBP' in Image.SAVE:
+            thumb.save(buffer, 'WEBP', quality=30)
+            mime = 'image/webp'
+        else:
+            thumb.convert('RGB').save(buffer, 'JPEG', quality=30)
+            mime = 'image/jpeg'
+        meta['placeholder'] = f'data:{mime};base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+    return meta
+
+
+def optimize_images(jobs, max_workers=4):
+    """并发处理图片，jobs: [(本地路径, 网页路径)]，返回 {本地路径: 元数据}"""
+    def run(job):
+        path, web_path = job
+        try:
+            return optimize_image(path, web_path)
+        except Exception as e:
+            print(f"    ✗ 图片处理失败，保留原图: {path}: {e}")
+            return {'src': web_path}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip((path for path, _ in jobs), executor.map(run, jobs)))
@@ -0,0 +1,48 @@
+"""
+合并：把下载好的图片填回新动态，再登记到分片存储（去重）
+"""
+import os
+
+from sitegen import profiling
+
+
+def pending_optimizations(thought_images, image_store):
+    """列出已保存但还没有元数据的图片 [(本地路径, 网页路径)]
+
+    包括上次运行在保存之后、处理之前中断的图片。
+    """
+    jobs = []
+    queued = set()
+    for thought, image_urls in thought_images:
+        for img_url in image_urls:
+            img_filename = image_store.lookup(img_url)
+            if img_filename and not image_store.has_meta(img_filename) and img_filename not in queued:
+                queued.add(img_filename)
+                jobs.append((os.path.join(image_store.images_dir, img_filename), image_store.web_path(img_filename)))
+    return jobs
+
+
+def attach_images(thought_images, image_store):
+    """按原始顺序填回每条动态的 images 和 image_meta，下载失败的图片跳过"""
+    for thought, image_urls in thought_images:
+        images = []
+        metas = []
+        for img_url in image_urls:
+            img_filename = image_store.lookup(img_url)
+            if img_filename:
+                images.append(image_store.web_path(img_filename))
+                metas.append(image_store.meta(img_filename))
+        if images:
+            thought['images'] = images
+            thought['image_meta'] = metas
+
+
+def merge_thoughts(store, thoughts):
+    """登记新动态，返回实际新增的条数（已存在的跳过）"""
+    new_count = 0
+    with profiling.span('merge'):
+        for thought in thoughts:
+            if store.add(thought):
+                new_count += 1
+    profiling.count('thoughts_new', new_count)
+    return new_count
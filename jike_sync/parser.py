@@ -0,0 +1,132 @@
+"""
+RSS 解析：流式读取 feed，把每个 <item> 转换为一条 thoughts 记录
+"""
+import re
+import xml.etree.ElementTree as ET
+from email.utils import parsedate_to_datetime
+from html.parser import HTMLParser
+
+
+class HTMLStripper(HTMLParser):
+    """移除 HTML 标签"""
+    def __init__(self):
+        super().__init__()
+        self.reset()
+        self.strict = False
+        self.convert_charrefs= True
+        self.text = []
+
+    def handle_data(self, d):
+        self.text.append(d)
+
+    def get_text(self):
+        return ''.join(self.text)
+
+
+def strip_html(html):
+    """清理 HTML 标签"""
+    s = HTMLStripper()
+    s.feed(html)
+    return s.get_text()
+
+
+def extract_images_from_description(description_text):
+    """从 description 中提取图片 URL"""
+    if not description_text:
+        return []
+
+    # 查找所有 img 标签中的 src
+    img_pattern = r'<img[^>]+src=["\']([^"\']+)["\']'
+    images = re.findall(img_pattern, description_text)
+
+    # 过滤掉非图片链接
+    valid_images = []
+    for img in images:
+        # 确保是有效的图片 URL
+        if img and (img.startswith('http') or img.startswith('//')):
+            # 如果是协议相对 URL，补全协议
+            if img.startswith('//'):
+                img = 'https:' + img
+            valid_images.append(img)
+
+    return valid_images
+
+
+def iter_rss_items(chunks):
+    """流式解析 RSS，每读完一个 <item> 就产出它，处理完后从树上摘掉释放内存"""
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    stack = []
+
+    def drain():
+        for event, elem in parser.read_events():
+            if event == 'start':
+                stack.append(elem)
+                continue
+            stack.pop()
+            if elem.tag == 'item':
+                yield elem
+                if stack:
+                    stack[-1].remove(elem)
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from drain()
+    parser.close()
+    yield from drain()
+
+
+def thought_key(t):
+    """使用日期+时间+内容前100字符作为唯一标识"""
+    return f"{t.get('date', '')}_{t.get('time', '')}_{t.get('content', '')[:100]}"
+
+
+def item_to_thought(item):
+    """把 RSS <item> 转换为 thought，返回 (thought, [图片 URL])
+
+    缺少日期或内容的条目返回 (None, [])。
+    """
+    thought = {}
+    image_urls = []
+
+    # 日期时间
+    pub_date = item.find('pubDate')
+    if pub_date is not None and pub_date.text:
+        try:
+            # 解析 RSS 日期格式: Mon, 25 Oct 2025 10:30:00 +0800
+            dt = parsedate_to_datetime(pub_date.text)
+            thought['date'] = dt.strftime('%Y-%m-%d')
+            thought['time'] = dt.strftime('%H:%M')
+        except:
+            pass
+
+    # 内容和图片
+    description = item.find('description')
+    if description is not None and description.text:
+        description_text = description.text
+
+        # 提取图片
+        image_urls = extract_images_from_description(description_text)
+
+        # 提取文本内容
+        content = strip_html(description_text)
+        content = re.sub(r'\s+', ' ', content).strip()
+        if content:
+            thought['content'] = content
+
+    # 标题
+    title = item.find('title')
+    if title is not None and title.text:
+        title_text = title.text.strip()
+        # 如果标题不是内容的开头部分，则作为话题
+        content = thought.get('content', '')
+        if title_text and content and not content.startswith(title_text[:20]):
+            thought['topic'] = title_text
+
+    # 链接
+    link = item.find('link')
+    if link is not None and link.text:
+        thought['source_link'] = link.text
+
+    if 'date' in thought and 'content' in thought:
+        return thought, image_urls
+    return None, []
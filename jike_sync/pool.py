@@ -0,0 +1,215 @@
+"""
+HTTP keep-alive 连接池和限速
+
+urllib.request.urlopen 每个请求都新建连接（HTTPS 还要重新握手）。这里按
+(协议, 主机, 端口) 保留读完的连接给下一个请求复用，多个 feed、多张图片
+共用一个连接池。接口和 urlopen 保持一致：2xx 返回响应对象，其余状态码
+抛出 urllib.error.HTTPError，自动跟随重定向。
+
+和 urlopen 一样遵守 HTTP_PROXY / HTTPS_PROXY / NO_PROXY 环境变量：http 请求
+把完整 URL 发给代理，https 请求通过代理的 CONNECT 隧道，代理地址里的用户名
+和密码用 Basic 认证发给代理。
+"""
+import base64
+import http.client
+import ssl
+import threading
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import unquote, urljoin, urlsplit
+
+from sitegen import profiling
+
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 5
+# 出错响应的响应体不超过这个大小时读完，连接可以继续复用
+DRAIN_LIMIT = 64 * 1024
+
+
+class RateLimiter:
+    """令牌桶限速：平均每秒最多 rate 个请求，最多连续 burst 个"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # 先预订一个令牌，不够时在锁外等到令牌补齐
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0
+        if delay:
+            profiling.count('rate_limited')
+            time.sleep(delay)
+
+
+class PooledResponse:
+    """连接池返回的响应：读完并关闭后连接回到池里，没读完就关闭连接"""
+
+    def __init__(self, pool, key, conn, raw, url):
+        self._pool = pool
+        self._key = key
+        self._conn = conn
+        self._raw = raw
+        self.url = url
+        self.status = raw.status
+        self.reason = raw.reason
+        self.headers = raw.headers
+
+    def read(self, amt=None):
+        return self._raw.read(amt)
+
+    def close(self):
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        if self._raw.isclosed() and not self._raw.will_close:
+            self._pool._release(self._key, conn)
+        else:
+            self._raw.close()
+            conn.close()
+
+    def drain(self):
+        """读完较小的响应体再关闭，让连接可以复用"""
+        length = self._raw.length
+        if length is not None and length <= DRAIN_LIMIT:
+            try:
+                self._raw.read()
+            except (OSError, http.client.HTTPException):
+                pass
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ConnectionPool:
+    """线程安全的 HTTP/HTTPS keep-alive 连接池"""
+
+    def __init__(self, max_idle_per_host=8):
+        self.max_idle_per_host = max_idle_per_host
+        self._idle = {}  # (协议, 主机, 端口) -> [空闲连接]
+        self._lock = threading.Lock()
+        # 加载 CA 证书要几十毫秒，第一次 HTTPS 请求时再创建
+        self._ssl_context = None
+        # 代理设置在创建连接池时读取一次；(协议, 主机, 端口) -> 代理或 None
+        self._proxies = urllib.request.getproxies()
+        self._routes = {}
+
+    def open(self, url, headers=None, timeout=30, limiter=None):
+        """GET 请求 url，用法同 urllib.request.urlopen"""
+        for _ in range(MAX_REDIRECTS + 1):
+            if limiter is not None:
+                limiter.wait()
+            response = self._request(url, headers or {}, timeout)
+            location = response.headers.get('Location')
+            if response.status in REDIRECT_CODES and location:
+                response.drain()
+                url = urljoin(url, location)
+                continue
+            if response.status >= 300:
+                response.drain()
+                raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None)
+            return response
+        raise urllib.error.URLError(f'重定向超过 {MAX_REDIRECTS} 次: {url}')
+
+    def _request(self, url, headers, timeout):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise urllib.error.URLError(f'不支持的协议: {url}')
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        proxy = self._proxy_for(key)
+        if proxy is not None and parts.scheme == 'http':
+            # 经过 http 代理时请求行里是完整的 URL
+            path = f'http://{parts.netloc.rpartition("@")[2]}{path}'
+            if proxy[2]:
+                headers = {**headers, 'Proxy-Authorization': proxy[2]}
+
+        while True:
+            conn, reused = self._acquire(key, timeout)
+            try:
+                conn.request('GET', path, headers=headers)
+                raw = conn.getresponse()
+            except (ConnectionError, http.client.HTTPException):
+                conn.close()
+                # 服务器可能已经关闭了空闲连接，换一个连接重试；新连接失败才算失败
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            return PooledResponse(self, key, conn, raw, url)
+
+    def _acquire(self, key, timeout):
+        with self._lock:
+            idle = self._idle.get(key)
+            conn = idle.pop() if idle else None
+        if conn is not None:
+            profiling.count('connections_reused')
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            return conn, True
+
+        profiling.count('connections_opened')
+        scheme, host, port = key
+        proxy = self._proxy_for(key)
+        if scheme == 'https':
+            with self._lock:
+                if self._ssl_context is None:
+                    self._ssl_context = ssl.create_default_context()
+            if proxy is None:
+                return http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl_context), False
+            conn = http.client.HTTPSConnection(proxy[0], proxy[1], timeout=timeout, context=self._ssl_context)
+            conn.set_tunnel(host, port, headers={'Proxy-Authorization': proxy[2]} if proxy[2] else None)
+            return conn, False
+        if proxy is not None:
+            return http.client.HTTPConnection(proxy[0], proxy[1], timeout=timeout), False
+        return http.client.HTTPConnection(host, port, timeout=timeout), False
+
+    def _proxy_for(self, key):
+        """这个主机要经过的代理 (主机, 端口, Proxy-Authorization 或 None)，直连时返回 None"""
+        try:
+            return self._routes[key]
+        except KeyError:
+            pass
+        scheme, host, port = key
+        proxy = self._proxies.get(scheme)
+        route = None
+        if proxy and not urllib.request.proxy_bypass(host if port is None else f'{host}:{port}'):
+            parts = urlsplit(proxy if '://' in proxy else f'http://{proxy}')
+            auth = None
+            if parts.username is not None:
+                credentials = f'{unquote(parts.username)}:{unquote(parts.password or "")}'
+                auth = 'Basic ' + base64.b64encode(credentials.encode('utf-8')).decode('ascii')
+            route = (parts.hostname, parts.port or 80, auth)
+        with self._lock:
+            self._routes[key] = route
+        return route
+
+    def _release(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            connections = [conn for idle in self._idle.values() for conn in idle]
+            self._idle = {}
+        for conn in connections:
+            conn.close()
@@ -0,0 +1,374 @@
+"""
+一次完整的同步：获取 → 解析 → 下载图片 → 处理图片 → 合并 → 写入分片
+
+sync() 不读写模块级状态，也不会退出进程，结果通过返回值交给调用方，
+同一个进程里可以反复调用（例如定时任务、基准测试）。多个 feed 一起同步
+见 scheduler.sync_feeds()。
+"""
+import hashlib
+import http.client
+import os
+import xml.etree.ElementTree as ET
+
+from jike_sync import config
+from jike_sync.downloader import download_images, plan_downloads
+from jike_sync.fetcher import open_feed, race_mirrors, rank_mirrors, read_file_chunks, stream_response
+from jike_sync.images import Image, image_variant_formats, optimize_images
+from jike_sync.merger import attach_images, merge_thoughts, pending_optimizations
+from jike_sync.parser import item_to_thought, iter_rss_items
+from jike_sync.pool import RateLimiter
+from jike_sync.session import Session
+from jike_sync.store import ImageStore, RunJournal, ThoughtStore, migrate_legacy_thoughts
+from sitegen import profiling
+
+# sync() 返回的状态
+OK = 'ok'
+NOT_MODIFIED = 'not_modified'  # RSS 自上次同步以来没有变化
+EMPTY = 'empty'                # RSS 中没有动态
+UNAVAILABLE = 'unavailable'    # 所有镜像都不可用
+FAILED = 'failed'              # 解析或保存失败
+
+
+def sync(feed, session=None, sources=None,
+         concurrency=config.DOWNLOAD_CONCURRENCY, per_host=config.DOWNLOAD_PER_HOST,
+         dry_run=False):
+    """同步一个 feed，返回结果 dict：
+
+    status（见上面的常量）、feed（名称）、parsed（解析条数）、fresh（未同步过的条数）、
+    added（实际新增条数）、images（新下载的图片数）、shards（写入的分片列表）、
+    thoughts（未同步过的动态）。
+
+    session 提供连接池和共享缓存，没有传入时单独创建一个，用完关闭。
+    sources 代替 RSSHub 型 feed 的默认镜像列表（feed 自己配置了 sources 时除外）。
+    dry_run 时只获取和解析，报告会新增哪些动态，不下载图片、不写任何文件。
+    """
+    if session is None:
+        with Session(config.Paths()) as own_session:
+            return sync(feed, own_session, sources, concurrency, per_host, dry_run)
+
+    paths = session.paths
+    candidates = feed.candidates(sources)
+    limiter = RateLimiter(feed.rate) if feed.rate else None
+    result = {
+        'status': OK, 'feed': feed.name, 'parsed': 0, 'fresh': 0, 'added': 0,
+        'images': 0, 'shards': [], 'thoughts': [],
+    }
+
+    print("="*60)
+    print(f"🚀 动态自动同步: {feed.name}" + ("（试运行，不写入任何文件）" if dry_run else ""))
+    print("="*60)
+    print()
+    print(f"Feed: {feed.route or feed.url}")
+    print(f"写入: {paths.shard_dir(feed.stream)}")
+    if feed.route:
+        print(f"可用镜像: {len(candidates)} 个")
+    print()
+
+    # 打开分片存储（去重时只读取涉及月份的索引）
+    store = ThoughtStore(paths.shard_dir(feed.stream))
+    image_store = ImageStore(paths.images_dir(feed.stream), web_prefix=f'/assets/{feed.stream}')
+    legacy_file = paths.legacy_file(feed.stream)
+    if legacy_file and os.path.exists(legacy_file):
+        if dry_run:
+            print(f"⚠️  存在旧版数据文件 {legacy_file}，试运行不迁移，去重结果可能不准确")
+        else:
+            print(f"📦 迁移旧版数据文件到按月分片...")
+            migrated, skipped = migrate_legacy_thoughts(legacy_file, store)
+            print(f"✓ 已迁移 {migrated} 条动态到 {paths.shard_dir(feed.stream)}")
+            if skipped:
+                print(f"⚠️  {skipped} 条动态没有日期，无法分片，留在 {legacy_file}，补上日期后下次运行再迁移")
+        print()
+
+    # 上次运行中断时，从日志继续，不再重新获取 RSS（试运行不读取也不修改日志）
+    journal = RunJournal(paths.journal_file(feed.name))
+    resumed = journal.recover() if not dry_run else None
+    fetched_entry = None
+    body_state = {'complete': False}
+    truncated = False
+
+    if resumed is not None:
+        print("♻️  发现上次未完成的同步，从运行日志继续...")
+        thought_images = resumed['thoughts']
+        new_thoughts = [thought for thought, _ in thought_images]
+        parsed_count = resumed['parsed']
+        image_store.urls.update(resumed['images'])
+        image_store.images.update(resumed['meta'])
+        if resumed['merge_months']:
+            # 上次已经开始写分片，先按分片内容修复索引，已写入的动态不会重复追加
+            store.repair(resumed['merge_months'])
+        print(f"✓ 待合并 {len(new_thoughts)} 条动态，已保存 {len(resumed['images'])} 张图片")
+        print()
+
+    else:
+        # 尝试从多个源获取 RSS
+        print("📡 正在获取 RSS feed...")
+        mirror_health = session.mirror_health()
+
+        def fetch_from_mirror(instance):
+            url = feed.feed_url(instance)
+            status, fetched = open_feed(session.pool, url, session.cache_entry(url), limiter=limiter)
+            return status, fetched and (url,) + fetched
+
+        def discard_fetch(fetch_result):
+            # 没用上的镜像响应：关闭后连接回到池里或直接断开
+            status, fetched = fetch_result
+            if status == 'ok':
+                fetched[2].close()
+
+        ranked_instances = rank_mirrors(candidates, mirror_health)
+        # 只到拿到第一块数据为止，剩下的响应体在解析时边读边算
+        with profiling.span('fetch'):
+            successful_source, fetch_result = race_mirrors(
+                ranked_instances, fetch_from_mirror, mirror_health,
+                initial=config.MIRROR_RACE_WIDTH, hedge_delay=config.MIRROR_HEDGE_DELAY,
+                discard=discard_fetch,
+            )
+        if not dry_run:
+            session.update_mirror_health(mirror_health, candidates)
+
+        chunks = None
+        if successful_source:
+            status, fetched = fetch_result
+            if status == 'not_modified':
+                profiling.count('fetch_not_modified')
+                print(f"  ✓ 内容未变化 (304)")
+                if store.exists():
+                    print()
+                    print("✓ RSS 自上次同步以来没有变化，跳过解析和保存")
+                    result['status'] = NOT_MODIFIED
+                    return result
+
+                # 本地数据文件不存在时，用缓存的响应体重新生成
+                body_file = session.cache_entry(feed.feed_url(successful_source)).get('body_file')
+                if body_file and os.path.exists(os.path.join(paths.cache_dir, body_file)):
+                    chunks = read_file_chunks(os.path.join(paths.cache_dir, body_file))
+            else:
+                fetch_url, entry, response, first_chunk = fetched
+                body_tmp_path = None
+                if not dry_run:
+                    entry['body_file'] = hashlib.sha1(fetch_url.encode('utf-8')).hexdigest() + '.xml'
+                    body_tmp_path = os.path.join(paths.cache_dir, entry['body_file'] + '.tmp')
+                    fetched_entry = (fetch_url, entry)
+                chunks = stream_response(response, first_chunk, body_tmp_path, body_state)
+                print(f"  ✓ 开始接收数据")
+
+        if chunks is None:
+            print()
+            print("❌ 所有 RSS 源都不可用")
+            print()
+            print("这通常是暂时性问题，可能的原因：")
+            print("  - RSSHub 服务器维护")
+            print("  - 网络连接问题")
+            print("  - 即刻 API 暂时不可用")
+            print()
+            print("💡 建议：")
+            print("  - 稍后会自动重试（每天 19:15）")
+            print("  - 您的历史数据已保存，不会丢失")
+            print("  - 可以稍后手动触发 workflow")
+            print()
+            result['status'] = UNAVAILABLE
+            return result
+
+        print(f"✓ 使用数据源: {successful_source}")
+        print()
+
+        # 边下载边解析 RSS，逐条转换为 thoughts 格式
+        print("🔄 解析 RSS 数据...")
+        new_thoughts = []
+        # [(thought, [图片 URL])]，包括没有图片的新动态，转换完成后统一并发下载
+        thought_images = []
+        parsed_count = 0
+        known_streak = 0
+        stopped_early = False
+
+        # 边接收边解析，耗时包含读取响应体
+        with profiling.span('parse'):
+            items = iter_rss_items(chunks)
+            try:
+                for item in items:
+                    parsed_count += 1
+                    thought, image_urls = item_to_thought(item)
+                    if thought is None:
+                        continue
+
+                    # RSS 按时间倒序，连续遇到已有动态说明后面都已同步过
+                    if store.contains(thought):
+                        known_streak += 1
+                        if known_streak >= config.EARLY_STOP_KNOWN:
+                            stopped_early = True
+                            break
+                        continue
+
+                    known_streak = 0
+                    new_thoughts.append(thought)
+                    thought_images.append((thought, image_urls))
+                    if image_urls:
+                        print(f"  [{thought.get('date')} {thought.get('time')}] 找到 {len(image_urls)} 张图片")
+
+            except ET.ParseError as e:
+                if parsed_count == 0:
+                    print(f"❌ RSS 解析失败: {e}")
+                    result['status'] = FAILED
+                    return result
+                print(f"⚠️  RSS 在第 {parsed_count} 条之后解析失败，只使用已解析的部分: {e}")
+                truncated = True
+
+            except (http.client.IncompleteRead, OSError) as e:
+                # 连接中途断开或超时：已经完整解析的条目照常保存
+                if parsed_count == 0:
+                    print(f"❌ RSS 读取失败: {e!r}")
+                    result['status'] = FAILED
+                    return result
+                print(f"⚠️  RSS 在第 {parsed_count} 条之后读取中断，只使用已解析的部分: {e!r}")
+                truncated = True
+
+            finally:
+                items.close()
+                chunks.close()
+        profiling.count('items_parsed', parsed_count)
+
+        if parsed_count == 0:
+            print("⚠️  RSS 中没有找到动态")
+            result['status'] = EMPTY
+            return result
+
+        if stopped_early:
+            print(f"✓ 解析 {parsed_count} 条后遇到已同步的动态，提前停止")
+        else:
+            print(f"✓ 找到 {parsed_count} 条动态")
+        print()
+
+        if dry_run:
+            download_count = len(plan_downloads(thought_images, image_store))
+            result.update(parsed=parsed_count, fresh=len(new_thoughts), thoughts=new_thoughts)
+            print(f"📝 试运行：{len(new_thoughts)} 条未同步过的动态，需要下载 {download_count} 张图片")
+            for i, t in enumerate(new_thoughts[:10], 1):
+                print(f"  {i}. [{t.get('date')} {t.get('time')}] {t.get('content', '')[:60]}")
+            return result
+
+        # 解析完成后写入运行日志，之后中断可以直接从这里继续
+        journal.start(thought_images, parsed_count)
+
+    # 并发下载图片索引里还没有的 URL，同一个 URL 只下载一次
+    download_jobs = plan_downloads(thought_images, image_store)
+    if download_jobs:
+        print(f"⬇️  并发下载 {len(download_jobs)} 张图片（并发 {concurrency}，单主机 {per_host}）...")
+
+    # 每张图片下载完立即按内容哈希保存并写入运行日志，中断后不必重新下载。
+    # 内容相同的图片只保留一份
+    saved_images = {}  # URL -> (文件名, 本地路径, 是否是新文件)
+
+    def save_download(img_url, data):
+        if data is not None:
+            profiling.count('bytes_downloaded', len(data))
+            saved_images[img_url] = image_store.put(img_url, data)
+            journal.image_saved(img_url, saved_images[img_url][0])
+
+    with profiling.span('download', images=len(download_jobs)):
+        download_images(
+            download_jobs,
+            max_workers=concurrency,
+            per_host=per_host,
+            item_budget=config.DOWNLOAD_ITEM_BUDGET,
+            on_result=save_download,
+            pool=session.pool,
+            limiter=limiter,
+        )
+
+    total_images = sum(1 for _, _, created in saved_images.values() if created)
+    duplicate_images = len(saved_images) - total_images
+
+    # 处理新保存的图片：去元数据、生成多尺寸版本和占位图
+    optimize_jobs = pending_optimizations(thought_images, image_store)
+    if optimize_jobs:
+        if Image is None:
+            print("⚠️  未安装 Pillow，只记录图片尺寸，不生成压缩版本")
+        else:
+            print(f"🖼  处理 {len(optimize_jobs)} 张图片（{', '.join(image_variant_formats()) or '无'} 多尺寸版本）...")
+    with profiling.span('process_images', images=len(optimize_jobs)):
+        processed = optimize_images(optimize_jobs)
+    for img_path, meta in processed.items():
+        image_store.set_meta(os.path.basename(img_path), meta)
+        journal.image_processed(os.path.basename(img_path), meta)
+
+    attach_images(thought_images, image_store)
+
+    print(f"✓ 成功转换 {len(new_thoughts)} 条动态")
+    if total_images > 0:
+        print(f"✓ 下载了 {total_images} 张新图片")
+    if duplicate_images > 0:
+        print(f"✓ {duplicate_images} 张图片与已有图片内容相同，直接复用")
+    print()
+
+    # 合并去重
+    print("🔗 合并数据...")
+    new_count = merge_thoughts(store, new_thoughts)
+
+    print(f"✓ 合并完成")
+    print(f"  新增: {new_count} 条")
+    print()
+
+    # 保存
+    print("💾 保存数据...")
+
+    try:
+        # 先保存图片索引，动态引用的图片一定能在索引里找到
+        with profiling.span('dump'):
+            image_store.save()
+            journal.merging(store.pending_months())
+            touched = store.flush()
+        for shard_path in touched:
+            print(f"✓ 数据已追加到: {shard_path}")
+        if not touched:
+            print("✓ 没有需要写入的分片")
+
+        # 数据保存成功后才记录 ETag，避免中途失败后被 304 跳过
+        if fetched_entry:
+            fetch_url, entry = fetched_entry
+            body_path = os.path.join(paths.cache_dir, entry['body_file'])
+            if body_state['complete']:
+                os.replace(body_path + '.tmp', body_path)
+            else:
+                # 提前停止或读取中断时响应体不完整，不保留
+                if os.path.exists(body_path + '.tmp'):
+                    os.remove(body_path + '.tmp')
+                entry.pop('body_file')
+            # 读取中断时不记录 ETag，下次重新获取后面没读到的动态
+            if not truncated:
+                session.set_cache_entry(fetch_url, entry)
+
+        # 全部完成，删除运行日志
+        journal.clear()
+
+    except Exception as e:
+        print(f"❌ 保存失败: {e}")
+        result['status'] = FAILED
+        return result
+
+    result.update(parsed=parsed_count, fresh=len(new_thoughts), added=new_count,
+                  images=total_images, shards=touched, thoughts=new_thoughts)
+
+    print()
+    print("="*60)
+    print("✅ 同步完成！")
+    print("="*60)
+    print()
+    print(f"📊 统计信息:")
+    print(f"  - RSS 解析: {parsed_count} 条")
+    print(f"  - 未同步过: {len(new_thoughts)} 条")
+    print(f"  - 新增动态: {new_count} 条")
+    print(f"  - 下载图片: {total_images} 张")
+    print(f"  - 写入分片: {len(touched)} 个")
+    print()
+
+    if new_count > 0:
+        print(f"🎉 发现 {new_count} 条新动态！")
+        print()
+        print("最新动态预览:")
+        for i, t in enumerate(new_thoughts[:3], 1):
+            content_preview = t.get('content', '')[:60]
+            print(f"  {i}. [{t.get('date')} {t.get('time')}] {content_preview}...")
+    else:
+        print("✓ 没有新动态")
+
+    return result
@@ -0,0 +1,56 @@
+"""
+多个 feed 并发同步
+
+同一个流（stream）的 feed 共用分片存储和图片索引，按注册表中的顺序依次
+同步；不同的流互不影响，放到线程池里同时进行。所有 feed 共用一个 Session，
+连接在 feed 之间复用。同步 N 个流的总耗时接近最慢的一个，而不是 N 个相加。
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from jike_sync import config, runner
+from jike_sync.session import Session
+from sitegen import profiling
+
+
+def group_by_stream(feeds):
+    """按流分组，保持每个流内 feed 的原始顺序"""
+    groups = {}
+    for feed in feeds:
+        groups.setdefault(feed.stream, []).append(feed)
+    return list(groups.values())
+
+
+def sync_feeds(feeds, session=None, max_workers=config.FEED_CONCURRENCY, **options):
+    """同步多个 feed，按传入顺序返回每个 feed 的结果 dict（见 runner.sync）
+
+    options 原样传给 runner.sync()：sources、concurrency、per_host、dry_run。
+    """
+    if session is None:
+        with Session(config.Paths()) as own_session:
+            return sync_feeds(feeds, own_session, max_workers, **options)
+
+    def run_group(group):
+        results = []
+        for feed in group:
+            with profiling.span('sync_feed', feed=feed.name, stream=feed.stream):
+                try:
+                    results.append(runner.sync(feed, session, **options))
+                except Exception as e:
+                    # 一个 feed 出错不影响其他 feed
+                    print(f"❌ {feed.name} 同步失败: {e}")
+                    results.append({'status': runner.FAILED, 'feed': feed.name})
+            print()
+        return results
+
+    groups = group_by_stream(feeds)
+    by_name = {}
+    if len(groups) == 1:
+        # 只有一个流时直接在当前线程运行，输出不会和其他 feed 交错
+        for result in run_group(groups[0]):
+            by_name[result['feed']] = result
+    else:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            for results in executor.map(run_group, groups):
+                for result in results:
+                    by_name[result['feed']] = result
+    return [by_name[feed.name] for feed in feeds]
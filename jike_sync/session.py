@@ -0,0 +1,53 @@
+"""
+一个进程内多次同步共享的状态
+"""
+import copy
+import threading
+
+from jike_sync.fetcher import load_fetch_cache, load_mirror_health, save_fetch_cache
+from jike_sync.pool import ConnectionPool
+
+
+class Session:
+    """连接池、RSS 条件请求缓存和镜像健康记录
+
+    多个 feed 并发同步时共用一个 Session：连接在 feed 之间复用，缓存和
+    健康记录的读写经过同一把锁，每次更新后整体写回磁盘。
+    """
+
+    def __init__(self, paths):
+        self.paths = paths
+        self.pool = ConnectionPool()
+        self._lock = threading.Lock()
+        self._fetch_cache = load_fetch_cache(paths.fetch_cache_file)
+        self._mirror_health = load_mirror_health(paths.mirror_health_file)
+
+    def cache_entry(self, url):
+        with self._lock:
+            return dict(self._fetch_cache.get(url, {}))
+
+    def set_cache_entry(self, url, entry):
+        with self._lock:
+            self._fetch_cache[url] = entry
+            save_fetch_cache(self.paths.fetch_cache_file, self._fetch_cache)
+
+    def mirror_health(self):
+        """健康记录的副本，镜像竞速时在副本上更新，结束后用 update_mirror_health() 写回"""
+        with self._lock:
+            return copy.deepcopy(self._mirror_health)
+
+    def update_mirror_health(self, health, instances):
+        with self._lock:
+            for instance in instances:
+                if instance in health:
+                    self._mirror_health[instance] = health[instance]
+            save_fetch_cache(self.paths.mirror_health_file, self._mirror_health)
+
+    def close(self):
+        self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,347 @@
+"""
+分片存储：动态按月写入 _data/thoughts/，图片按内容哈希保存，以及同步的预写日志
+
+所有写入都先写临时文件再替换（atomic_write），中断时不会留下写了一半的文件。
+"""
+import hashlib
+import json
+import os
+import threading
+
+import yaml
+
+from jike_sync.files import atomic_write, read_text
+from jike_sync.images import detect_image_type
+from jike_sync.parser import thought_key
+
+
+IMAGE_EXTENSIONS = {'jpeg': '.jpg', 'png': '.png', 'gif': '.gif', 'webp': '.webp', 'avif': '.avif'}
+
+
+class ImageStore:
+    """按内容寻址的图片存储
+
+    图片以下载内容的 SHA-256 前 20 位命名（assets/thoughts/<哈希>.<扩展名>），
+    相同的图片无论被多少条动态引用都只保存一份。同目录下的 .index.json 记录
+    URL -> 文件名 以及每个文件的尺寸等元数据，随仓库提交；已知的 URL 不再下载。
+    文件名取自原始下载内容，之后即使图片被重新压缩也不会改名。
+    """
+
+    def __init__(self, images_dir, web_prefix='/assets/thoughts'):
+        self.images_dir = images_dir
+        self.web_prefix = web_prefix
+        self.index_path = os.path.join(images_dir, '.index.json')
+        self.urls = {}    # URL -> 文件名
+        self.images = {}  # 文件名 -> 元数据
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            self.urls = index.get('urls', {})
+            self.images = index.get('images', {})
+        self._dirty = False
+
+    def web_path(self, filename):
+        return f"{self.web_prefix}/{filename}"
+
+    def lookup(self, url):
+        """已经保存过的 URL 返回文件名，否则返回 None"""
+        filename = self.urls.get(url)
+        if filename and os.path.exists(os.path.join(self.images_dir, filename)):
+            return filename
+        return None
+
+    def put(self, url, data):
+        """保存下载到的图片，返回 (文件名, 本地路径, 是否是新文件)"""
+        digest = hashlib.sha256(data).hexdigest()[:20]
+        filename = digest + IMAGE_EXTENSIONS[detect_image_type(data)]
+        path = os.path.join(self.images_dir, filename)
+
+        created = not os.path.exists(path)
+        if created:
+            os.makedirs(self.images_dir, exist_ok=True)
+            with atomic_write(path, 'wb') as f:
+                f.write(data)
+
+        self.urls[url] = filename
+        self._dirty = True
+        return filename, path, created
+
+    def set_meta(self, filename, meta):
+        self.images[filename] = meta
+        self._dirty = True
+
+    def has_meta(self, filename):
+        return filename in self.images
+
+    def meta(self, filename):
+        """图片元数据的副本（避免 YAML 输出 &id 锚点），没有记录时只有 src"""
+        return dict(self.images.get(filename) or {'src': self.web_path(filename)})
+
+    def save(self):
+        if not self._dirty:
+            return
+        with atomic_write(self.index_path) as f:
+            json.dump({'urls': self.urls, 'images': self.images}, f, ensure_ascii=False, indent=1, sort_keys=True)
+        self._dirty = False
+
+
+class ThoughtStore:
+    """按月分片的 thoughts 存储
+
+    _data/thoughts/YYYY-MM.yml 每个月一个 YAML 列表，按时间正序追加，Jekyll 中通过
+    site.data.thoughts["YYYY-MM"] 读取。同目录下的 .YYYY-MM.keys 是该月的去重索引，
+    每行 "<key 哈希>\t<日期> <时间>"（点开头的文件 Jekyll 不会读取）。
+    去重只需要读取新动态所在月份的索引，保存时只追加到这些月份的分片。
+    """
+
+    def __init__(self, shard_dir):
+        self.shard_dir = shard_dir
+        self._keys = {}    # 月份 -> 已有 key 哈希集合
+        self._latest = {}  # 月份 -> 分片内最新的 "日期 时间"
+        self._pending = {}  # 月份 -> 待写入的新动态
+
+    @staticmethod
+    def month_of(thought):
+        return thought['date'][:7]
+
+    @staticmethod
+    def key_hash(thought):
+        return hashlib.sha1(thought_key(thought).encode('utf-8')).hexdigest()[:16]
+
+    def shard_path(self, month):
+        return os.path.join(self.shard_dir, f'{month}.yml')
+
+    def keys_path(self, month):
+        return os.path.join(self.shard_dir, f'.{month}.keys')
+
+    def exists(self):
+        return os.path.isdir(self.shard_dir)
+
+    def _load_keys(self, month):
+        if month in self._keys:
+            return self._keys[month]
+
+        keys = set()
+        latest = ''
+        try:
+            with open(self.keys_path(month), 'r', encoding='utf-8') as f:
+                for line in f:
+                    key, _, stamp = line.rstrip('\n').partition('\t')
+                    keys.add(key)
+                    latest = max(latest, stamp)
+        except FileNotFoundError:
+            pass
+        self._keys[month] = keys
+        self._latest[month] = latest
+        return keys
+
+    def contains(self, thought):
+        return self.key_hash(thought) in self._load_keys(self.month_of(thought))
+
+    def add(self, thought):
+        """登记一条动态，已存在返回 False"""
+        month = self.month_of(thought)
+        keys = self._load_keys(month)
+        key = self.key_hash(thought)
+        if key in keys:
+            return False
+        keys.add(key)
+        self._pending.setdefault(month, []).append((key, thought))
+        return True
+
+    def flush(self):
+        """把新动态写入对应分片，返回写入的分片列表"""
+        os.makedirs(self.shard_dir, exist_ok=True)
+        touched = []
+
+        for month, entries in sorted(self._pending.items()):
+            entries.sort(key=lambda e: stamp_of(e[1]))
+            shard_path = self.shard_path(month)
+
+            # 分片和索引都先写临时文件再替换，中断时不会留下半截 YAML。
+            # 先写分片后写索引：两者之间中断时，repair() 会按分片重建索引
+            if stamp_of(entries[0][1]) >= self._latest[month]:
+                # 常见情况：新动态都比分片里已有的晚，原样保留已有内容，追加在后面
+                existing = read_text(shard_path)
+                with atomic_write(shard_path) as f:
+                    f.write(existing if existing is not None else shard_header(month))
+                    dump_thoughts([t for _, t in entries], f)
+            else:
+                # 补到了更早的动态：重写这一个月的分片，保持时间正序
+                thoughts = load_shard(shard_path) + [t for _, t in entries]
+                thoughts.sort(key=stamp_of)
+                with atomic_write(shard_path) as f:
+                    f.write(shard_header(month))
+                    dump_thoughts(thoughts, f)
+
+            existing = read_text(self.keys_path(month))
+            with atomic_write(self.keys_path(month)) as f:
+                f.write(existing or '')
+                for key, thought in entries:
+                    f.write(f'{key}\t{stamp_of(thought)}\n')
+
+            self._latest[month] = max(self._latest[month], stamp_of(entries[-1][1]))
+            touched.append(shard_path)
+
+        self._pending = {}
+        return touched
+
+    def pending_months(self):
+        return list(self._pending)
+
+    def repair(self, months):
+        """按分片内容重建这些月份的去重索引（上次运行在写分片和写索引之间中断时使用）"""
+        for month in months:
+            shard_path = self.shard_path(month)
+            if not os.path.exists(shard_path):
+                continue
+            thoughts = load_shard(shard_path)
+            with atomic_write(self.keys_path(month)) as f:
+                for thought in thoughts:
+                    f.write(f'{self.key_hash(thought)}\t{stamp_of(thought)}\n')
+            self._keys.pop(month, None)
+            self._latest.pop(month, None)
+
+
+class RunJournal:
+    """一次同步的预写日志（JSON Lines，逐条追加并落盘）
+
+    - fetched：RSS 解析完成后写入，包含所有新动态和它们的图片 URL
+    - image：一张图片保存完成（URL -> 文件名）
+    - meta：一张图片处理完成后的元数据
+    - merge：开始写入分片，包含涉及的月份
+
+    同步成功后删除日志。下一次运行发现日志时跳过获取和解析，已保存的图片
+    不再下载，直接从中断的位置继续。解析中途中断的日志没有 fetched 记录，
+    会被丢弃重新获取，避免只合并了最新的一部分动态后被提前停止跳过更早的。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def recover(self):
+        """读取上次未完成的运行，返回状态 dict，没有可恢复的内容时返回 None"""
+        records = []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # 最后一行可能只写了一半
+                        break
+        except FileNotFoundError:
+            return None
+
+        state = None
+        for record in records:
+            op = record.get('op')
+            if op == 'fetched':
+                state = {
+                    'thoughts': [(t, urls) for t, urls in record['thoughts']],
+                    'parsed': record.get('parsed', 0),
+                    'images': {},
+                    'meta': {},
+                    'merge_months': None,
+                }
+            elif state is None:
+                continue
+            elif op == 'image':
+                state['images'][record['url']] = record['file']
+            elif op == 'meta':
+                state['meta'][record['file']] = record['meta']
+            elif op == 'merge':
+                state['merge_months'] = record['months']
+
+        if state is None:
+            self.clear()
+        return state
+
+    def _append(self, record):
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def start(self, thoughts, parsed):
+        """开始新的日志，记录解析出的新动态 [(thought, [图片 URL])]"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        record = {'op': 'fetched', 'parsed': parsed, 'thoughts': thoughts}
+        with atomic_write(self.path) as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def image_saved(self, url, filename):
+        self._append({'op': 'image', 'url': url, 'file': filename})
+
+    def image_processed(self, filename, meta):
+        self._append({'op': 'meta', 'file': filename, 'meta': meta})
+
+    def merging(self, months):
+        self._append({'op': 'merge', 'months': sorted(months)})
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def stamp_of(thought):
+    """排序用的 "日期 时间" """
+    return f"{thought.get('date', '0000-00-00')} {thought.get('time', '00:00')}"
+
+
+def shard_header(month):
+    return f"""# ============================================
+# Thoughts 数据文件 - 即刻动态 {month}
+# ============================================
+#
+# 本文件由 sync_jike_simple.py 自动生成，按时间正序追加
+# 数据来源: RSSHub (https://rsshub.app)
+#
+# ============================================
+
+"""
+
+
+def dump_thoughts(thoughts, f):
+    yaml.dump(
+        thoughts,
+        f,
+        allow_unicode=True,
+        sort_keys=False,
+        default_flow_style=False,
+        width=float('inf')
+    )
+
+
+def load_shard(path):
+    """读取一个分片（或旧版单文件），跳过注释行"""
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = [line for line in f if not line.strip().startswith('#')]
+    if not lines:
+        return []
+    return yaml.safe_load(''.join(lines)) or []
+
+
+def migrate_legacy_thoughts(legacy_file, store):
+    """把旧版 _data/thoughts.yml 拆分到按月分片，返回 (迁移条数, 留下的条数)
+
+    没有日期的动态放不进任何分片，留在旧文件里（其余的已经迁移，从旧文件中
+    去掉，站点不会读到两份），补上日期后下次运行再迁移；全部迁移后删除旧文件。
+    """
+    thoughts = load_shard(legacy_file)
+    dated = [t for t in thoughts if t.get('date')]
+    undated = [t for t in thoughts if not t.get('date')]
+    for t in sorted(dated, key=stamp_of):
+        store.add(t)
+    store.flush()
+    if undated:
+        if dated:
+            with atomic_write(legacy_file) as f:
+                f.write('# 没有日期、无法按月分片的动态，补上 date 后下次同步时迁移\n\n')
+                dump_thoughts(undated, f)
+    else:
+        os.remove(legacy_file)
+    return len(dated), len(undated)
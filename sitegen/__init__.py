@@ -0,0 +1,18 @@
+"""
+小草庐静态站点构建工具
+
+generate_all_posts.py 是命令行入口，这里放可以单独复用的构建组件。
+
+生成的页面、静态资源、搜索索引和 feed 都写到 OUTPUT_DIR（_output/，不提交）。
+Jekyll 不发布下划线开头的目录，源码树里也不会混进构建产物。
+
+需要 Python 3.11 或更新版本：sitegen.markdown 的正则用到了占有量词（*+、++）。
+"""
+import sys
+from pathlib import Path
+
+if sys.version_info < (3, 11):
+    raise ImportError('sitegen 需要 Python 3.11 或更新版本（Markdown 正则用到了占有量词）')
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+OUTPUT_DIR = PROJECT_ROOT / '_output'
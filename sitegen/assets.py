@@ -0,0 +1,295 @@
+"""
+静态资源流水线：压缩、关键 CSS 和带指纹的文件名
+
+- assets/main.css 和 assets/custom.css 压缩后合并成一个样式表，
+  _templates/site.js（深色模式、文章目录）压缩成一个脚本，图标原样复制；
+  都写到 _output/assets/build/（URL 是 /assets/build/），文件名带内容哈希
+  （main.3f9c0a1b2d.css），可以永久缓存
+- 关键 CSS：只保留首屏（导航、页头、标题和正文的第一段）模板里出现的标签、
+  class 和 id 用到的规则，内联到 <head>；目录、页脚、分页和正文里的表格、
+  代码块等留在完整样式表里，用 preload 异步加载，首次渲染不等样式表下载
+
+页面模板通过 page_values() 拿到这些插槽值。资源内容只在每个进程第一次
+使用时计算一次，源文件改动后调用 clear()。
+"""
+import hashlib
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from sitegen import OUTPUT_DIR, PROJECT_ROOT, fonts
+from sitegen.compress import SIBLING_SUFFIXES
+from sitegen.template import TEMPLATES_DIR
+
+ASSETS_DIR = PROJECT_ROOT / 'assets'
+BUILD_DIR = OUTPUT_DIR / 'assets' / 'build'
+WEB_PREFIX = '/assets/build/'
+
+# 按顺序合并的样式表、共用脚本和图标
+STYLESHEETS = ('main.css', 'custom.css')
+SCRIPT = 'site.js'
+ICONS = ('favicon-32x32.png', 'favicon-16x16.png', 'apple-touch-icon.png')
+
+# 各类页面首屏的模板，关键 CSS 从这些标记里提取：(模板, 首屏到哪段标记为止，None 表示整个模板)
+ABOVE_THE_FOLD = {
+    'post': (('post.html', '<div class="post-content">'),),
+    'list': (('list.html', '<div class="catalogue">'), ('home_header.html', None), ('tags_header.html', None),
+             ('search_header.html', None), ('catalogue_item.html', None)),
+}
+# 文章正文由 Markdown 生成，模板里看不到；首屏一般是一段文字、一个小标题或一张图
+FIRST_BLOCK_TAGS = {'p', 'a', 'h2', 'strong', 'em', 'b', 'i', 'del', 'code', 'img', 'br'}
+# 文件名中内容哈希的长度
+HASH_LENGTH = 10
+
+# 注释和字符串一起扫描，先匹配到哪个算哪个：字符串里的 /* 不是注释，注释里的引号也不是字符串。
+# CSS 字符串不能跨行：没有闭合的引号到行尾为止（连同换行符一起保留，浏览器按同样的规则解析）
+_COMMENT_OR_STRING_RE = re.compile(r'(/\*.*?\*/)|"(?:\\.|[^"\\\n])*["\n]|\'(?:\\.|[^\'\\\n])*[\'\n]', re.S)
+# 后面的 / 开始正则表达式而不是除号的关键字
+_REGEX_KEYWORDS = {'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+                   'throw', 'case', 'do', 'else', 'yield', 'await'}
+_TRAILING_WORD_RE = re.compile(r'(?<![\w$.])([a-z]+)\s*$')
+_TAG_RE = re.compile(r'<([a-zA-Z][a-zA-Z0-9]*)')
+_ATTR_RE = re.compile(r'\b(class|id)="([^"{]*)"')
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def fingerprint(name, data):
+    """main.css -> main.<内容哈希>.css"""
+    stem, dot, suffix = name.rpartition('.')
+    return f'{stem}.{content_hash(data)}{dot}{suffix}'
+
+
+def _protect_strings(text):
+    """去掉注释，把字符串字面量换成占位符，压缩时不会改动字符串内容"""
+    strings = []
+
+    def stash(m):
+        if m.group(1):
+            return ''
+        strings.append(m.group(0))
+        return f'\0{len(strings) - 1}\0'
+
+    return _COMMENT_OR_STRING_RE.sub(stash, text), strings
+
+
+def _restore_strings(text, strings):
+    return re.sub(r'\0(\d+)\0', lambda m: strings[int(m.group(1))], text)
+
+
+def minify_css(css):
+    """去掉注释和多余空白；字符串内容保持不变"""
+    css, strings = _protect_strings(css)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    # 选择器里 "a :hover" 和 "a:hover" 含义不同，只去掉冒号后面的空格
+    css = re.sub(r':\s+', ':', css)
+    css = css.replace(';}', '}')
+    return _restore_strings(css, strings).strip()
+
+
+def _after_keyword(out):
+    """已输出的内容是否以 return、typeof 这类关键字结尾，之后的 / 开始正则表达式"""
+    m = _TRAILING_WORD_RE.search(''.join(out[-16:]))
+    return m is not None and m.group(1) in _REGEX_KEYWORDS
+
+
+def minify_js(js):
+    """保守地压缩脚本：去掉注释、缩进和空行，保留换行，不改变自动分号插入的结果
+
+    逐字符扫描，字符串、模板字符串和正则表达式字面量里的内容原样保留。
+    """
+    out = []
+    i = 0
+    n = len(js)
+    last = ''  # 上一个非空白字符，用来区分除号和正则表达式
+    while i < n:
+        c = js[i]
+        if c in '"\'`':
+            j = i + 1
+            while j < n and js[j] != c:
+                j += 2 if js[j] == '\\' else 1
+            out.append(js[i:j + 1])
+            last = c
+            i = j + 1
+        elif js.startswith('//', i):
+            while i < n and js[i] != '\n':
+                i += 1
+        elif js.startswith('/*', i):
+            end = js.find('*/', i + 2)
+            i = n if end < 0 else end + 2
+        elif c == '/' and (not last or last in '(,=:[!&|?{};+-*%<>~^' or _after_keyword(out)):
+            j = i + 1
+            in_class = False
+            while j < n and (in_class or js[j] != '/'):
+                if js[j] == '\\':
+                    j += 1
+                elif js[j] == '[':
+                    in_class = True
+                elif js[j] == ']':
+                    in_class = False
+                j += 1
+            out.append(js[i:j + 1])
+            last = '/'
+            i = j + 1
+        else:
+            out.append(c)
+            if not c.isspace():
+                last = c
+            i += 1
+
+    lines = (line.strip() for line in ''.join(out).splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def _split_blocks(css):
+    """把压缩后的 CSS 切成顶层的 (前导, 块内容)，块内容不含外层花括号"""
+    blocks = []
+    pos = 0
+    while pos < len(css):
+        start = css.find('{', pos)
+        if start < 0:
+            break
+        depth = 0
+        for end in range(start, len(css)):
+            if css[end] == '{':
+                depth += 1
+            elif css[end] == '}':
+                depth -= 1
+                if depth == 0:
+                    break
+        blocks.append((css[pos:start], css[start + 1:end]))
+        pos = end + 1
+    return blocks
+
+
+def _selector_matches(selector, tags, names):
+    """选择器中出现的标签、class 和 id 是否都在页面标记里"""
+    # 去掉伪类的参数、属性选择器和伪类，只看标签、class 和 id
+    selector = re.sub(r'\([^)]*\)|\[[^\]]*\]|::?[\w-]+', '', selector)
+    for token in re.findall(r'[.#]?[\w-]+', selector):
+        if token[0] in '.#':
+            if token[1:] not in names:
+                return False
+        elif token.lower() not in tags:
+            return False
+    return True
+
+
+def critical_css(css, tags, names):
+    """只保留可能作用于给定标签和 class/id 的规则，@media 等嵌套块递归处理"""
+    kept = []
+    for prelude, body in _split_blocks(css):
+        if prelude.startswith(('@media', '@supports')):
+            inner = critical_css(body, tags, names)
+            if inner:
+                kept.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@'):
+            kept.append(f'{prelude}{{{body}}}')
+        elif any(_selector_matches(s, tags, names) for s in prelude.split(',')):
+            kept.append(f'{prelude}{{{body}}}')
+    return ''.join(kept)
+
+
+def markup_tokens(markup):
+    """模板标记里出现的标签名和 class/id"""
+    tags = {tag.lower() for tag in _TAG_RE.findall(markup)} | {'html', 'body', '*'}
+    names = set()
+    for _, value in _ATTR_RE.findall(markup):
+        names.update(value.split())
+    return tags, names
+
+
+def above_the_fold(name, fold):
+    """模板开头到 fold 标记（含）为止的标记；fold 为 None 时是整个模板"""
+    markup = (TEMPLATES_DIR / name).read_text(encoding='utf-8')
+    if fold is None:
+        return markup
+    end = markup.index(fold)
+    return markup[:end + len(fold)]
+
+
+def source_files():
+    """参与资源构建的源文件，任何一个改动都要重建引用它们的页面"""
+    return ([ASSETS_DIR / name for name in STYLESHEETS] + [TEMPLATES_DIR / SCRIPT]
+            + [ASSETS_DIR / name for name in ICONS])
+
+
+@lru_cache(maxsize=None)
+def bundle():
+    """计算所有构建产物：{'files': {文件名: 内容}, 'urls': {源文件名: URL}, 'critical': {页面类型: CSS}}"""
+    css = minify_css('\n'.join((ASSETS_DIR / name).read_text(encoding='utf-8') for name in STYLESHEETS))
+    js = minify_js((TEMPLATES_DIR / SCRIPT).read_text(encoding='utf-8'))
+
+    sources = {'main.css': css.encode('utf-8'), SCRIPT: js.encode('utf-8')}
+    for name in ICONS:
+        sources[name] = (ASSETS_DIR / name).read_bytes()
+
+    files = {}
+    urls = {}
+    for name, data in sources.items():
+        built = fingerprint(name, data)
+        files[built] = data
+        urls[name] = WEB_PREFIX + built
+
+    critical = {}
+    for kind, templates in ABOVE_THE_FOLD.items():
+        tags, names = markup_tokens(''.join(above_the_fold(name, fold) for name, fold in templates))
+        if kind == 'post':
+            tags |= FIRST_BLOCK_TAGS
+        critical[kind] = critical_css(css, tags, names)
+    return {'files': files, 'urls': urls, 'critical': critical}
+
+
+def page_values(kind):
+    """页面模板中资源相关的插槽值"""
+    built = bundle()
+    urls = built['urls']
+    return {
+        'critical_css': built['critical'][kind],
+        'stylesheet': urls['main.css'],
+        'script': urls[SCRIPT],
+        'icon_32': urls['favicon-32x32.png'],
+        'icon_16': urls['favicon-16x16.png'],
+        'apple_touch_icon': urls['apple-touch-icon.png'],
+        'fonts': fonts.head_html(),
+    }
+
+
+def write_bundle(out_dir=BUILD_DIR):
+    """写入缺少的构建产物并删除过期的旧版本，返回 (写入数, 删除数)
+
+    文件名里已经有内容哈希，同名文件一定内容相同，不必比较。
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    files = bundle()['files']
+
+    written = 0
+    for name, data in files.items():
+        path = out_dir / name
+        if path.exists():
+            continue
+        tmp_path = path.with_name(name + '.tmp')
+        tmp_path.write_bytes(data)
+        tmp_path.replace(path)
+        written += 1
+
+    removed = 0
+    for path in out_dir.iterdir():
+        # 当前文件的 .gz / .br 预压缩副本也要保留
+        name = path.name
+        for suffix in SIBLING_SUFFIXES:
+            name = name.removesuffix(suffix)
+        if path.is_file() and name not in files:
+            path.unlink()
+            if name == path.name:
+                removed += 1
+    return written, removed
+
+
+def clear():
+    """源文件改动后丢掉缓存的构建结果"""
+    bundle.cache_clear()
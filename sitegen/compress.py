@@ -0,0 +1,125 @@
+"""
+输出阶段：HTML 压缩和预压缩
+
+- minify_html() 去掉注释和缩进，连续空白合并成一个（有换行时保留一个换行），
+  <pre>、<textarea>、<script> 和 <style> 的内容以及引号里的属性值原样保留
+- precompress() 为生成的 HTML、CSS、JS 和 feed 文件写出 .gz 和 .br 副本，
+  支持预压缩的静态服务器和 CDN 可以直接发送，不必每次请求都压缩。
+  记录每个文件的 mtime 和大小，没有被改写过的文件不读取也不重新压缩
+
+brotli 是可选依赖，没有安装时只生成 .gz。
+"""
+import gzip
+import os
+import re
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 需要预压缩的文件类型（图片本身已经压缩过）
+COMPRESSIBLE_SUFFIXES = ('.html', '.css', '.js', '.json', '.xml')
+SIBLING_SUFFIXES = ('.gz', '.br')
+
+_PRESERVE_RE = re.compile(r'<(pre|textarea|script|style)\b.*?</\1\s*>', re.S | re.I)
+_COMMENT_RE = re.compile(r'<!--(?!\[if).*?-->', re.S)
+# 开始标签（属性值里可以有 >），以及其中引号括起来的属性值
+_START_TAG_RE = re.compile(r'<[a-zA-Z][^<>"\']*(?:(?:"[^"]*"|\'[^\']*\')[^<>"\']*)*>')
+_ATTR_VALUE_RE = re.compile(r'"[^"]*"|\'[^\']*\'')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def minify_html(text):
+    """安全地压缩 HTML：只改动标签之间和文本里的空白，不改变渲染结果"""
+    preserved = []
+
+    def stash(m):
+        preserved.append(m.group(0))
+        return f'\0{len(preserved) - 1}\0'
+
+    text = _PRESERVE_RE.sub(stash, text)
+    text = _COMMENT_RE.sub('', text)
+    # title、alt 等属性值里的空白是内容的一部分
+    text = _START_TAG_RE.sub(lambda m: _ATTR_VALUE_RE.sub(stash, m.group(0)), text)
+    text = _SPACE_RE.sub(lambda m: '\n' if '\n' in m.group(0) else ' ', text)
+    text = re.sub(r'\0(\d+)\0', lambda m: preserved[int(m.group(1))], text)
+    return text.strip() + '\n'
+
+
+def formats():
+    """可用的预压缩格式"""
+    return ('gzip', 'brotli') if brotli is not None else ('gzip',)
+
+
+def siblings(path):
+    path = Path(path)
+    return [path.with_name(path.name + suffix) for suffix in SIBLING_SUFFIXES]
+
+
+def remove_siblings(path):
+    """删除 path 的预压缩副本"""
+    for sibling in siblings(path):
+        try:
+            sibling.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def is_sibling(name):
+    return name.endswith(SIBLING_SUFFIXES)
+
+
+def _write(path, data):
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_bytes(data)
+    tmp_path.replace(path)
+
+
+def compress_file(path, data):
+    """写出 path.gz 和（有 brotli 时）path.br"""
+    path = Path(path)
+    gz_path, br_path = siblings(path)
+    # mtime=0：同样的内容总是得到同样的 .gz
+    _write(gz_path, gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        _write(br_path, brotli.compress(data, quality=11))
+    else:
+        # 不能留下旧内容的 .br
+        try:
+            br_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def precompress(paths, previous):
+    """为 paths 中可压缩的文件写出预压缩副本，返回 (这次的 {路径: [mtime, 大小]}, 压缩的文件数)
+
+    previous 是上次记录的 {路径: [mtime, 大小]}。构建只在内容变化时改写文件，
+    mtime 和大小都没变、副本也齐全的文件只需要 stat，不读取内容；
+    上次压缩过、这次已经不存在的文件，删除它留下的副本。
+    """
+    expected = ['.gz'] + (['.br'] if brotli is not None else [])
+    stamps = {}
+    compressed = 0
+    for path in paths:
+        path = Path(path)
+        if path.suffix not in COMPRESSIBLE_SUFFIXES:
+            continue
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        key = path.as_posix()
+        stamp = [stat.st_mtime_ns, stat.st_size]
+        stamps[key] = stamp
+        if previous.get(key) == stamp and all(os.path.exists(f'{key}{s}') for s in expected):
+            continue
+        compress_file(path, path.read_bytes())
+        compressed += 1
+
+    for key in set(previous) - set(stamps):
+        if not Path(key).exists():
+            remove_siblings(key)
+    return stamps, compressed
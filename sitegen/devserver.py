@@ -0,0 +1,226 @@
+"""
+本地预览：文件监视、带自动刷新的 HTTP 服务
+
+generate_all_posts.py --watch / --serve 使用：
+- Watcher 轮询目录里文件的 mtime 和大小，找出新增、修改和删除的文件
+  （只用标准库，不依赖 inotify；几百个文件轮询一次不到 1 ms）
+- LiveReload 把改动的 URL 推送给所有打开的页面（Server-Sent Events）
+- serve() 在后台线程里提供输出目录，输出目录里没有的文件（图片、脚本等
+  静态资源）从源码目录提供；HTML 页面注入一小段脚本订阅推送：
+  当前页面或模板、样式有改动时刷新，只改了 CSS 时只替换样式表
+"""
+import json
+import os
+import queue
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+EVENTS_PATH = '/__livereload'
+# 没有改动时定期发送注释行，及时发现已经关闭的页面
+KEEPALIVE_SECONDS = 15
+
+RELOAD_SCRIPT = """<script>
+(function() {
+  var source = new EventSource('%s');
+  source.onmessage = function(event) {
+    var urls = JSON.parse(event.data);
+    var here = decodeURIComponent(location.pathname);
+    if (urls.length && urls.every(function(url) { return /\\.css$/.test(url); })) {
+      document.querySelectorAll('link[rel="stylesheet"]').forEach(function(link) {
+        var href = new URL(link.href);
+        href.searchParams.set('livereload', Date.now());
+        link.href = href.href;
+      });
+    } else if (urls.some(function(url) { return !/\\.html$/.test(url) || url === here; })) {
+      location.reload();
+    }
+  };
+})();
+</script>
+""" % EVENTS_PATH
+
+
+class Watcher:
+    """轮询监视若干目录（递归），ignore 中的目录不监视
+
+    ignore 可以是相对路径也可以是绝对路径，比较时两边都解析成真实路径。
+    """
+
+    def __init__(self, roots, ignore=()):
+        self.roots = [os.fspath(root) for root in roots]
+        self.ignore = {os.path.realpath(path) for path in ignore}
+        self._snapshot = self.scan()
+
+    def scan(self):
+        """{路径: (mtime_ns, 大小)}"""
+        snapshot = {}
+        stack = [root for root in self.roots if os.path.isdir(root)]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir():
+                    if os.path.realpath(entry.path) not in self.ignore:
+                        stack.append(entry.path)
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self):
+        """和上次比较，返回 (新增或修改的路径, 删除的路径)"""
+        snapshot = self.scan()
+        changed = {path for path, stamp in snapshot.items() if self._snapshot.get(path) != stamp}
+        removed = set(self._snapshot) - set(snapshot)
+        self._snapshot = snapshot
+        return changed, removed
+
+    def watch(self, interval=0.05, settle=0.02, idle=1.0):
+        """每 interval 秒轮询一次，有改动时产出 (changed, removed)
+
+        编辑器保存时常常分几步写文件，检测到改动后再等 settle 秒，
+        把同一次保存的改动合并成一批。改动之后安静了 idle 秒时产出一次
+        两个空集合，调用方可以趁这时做不影响预览的收尾工作。
+        """
+        last_change = None
+        while True:
+            time.sleep(interval)
+            changed, removed = self.poll()
+            if not changed and not removed:
+                if last_change is not None and time.monotonic() - last_change >= idle:
+                    last_change = None
+                    yield set(), set()
+                continue
+            time.sleep(settle)
+            more_changed, more_removed = self.poll()
+            changed = (changed | more_changed) - more_removed
+            removed = (removed | more_removed) - more_changed
+            last_change = time.monotonic()
+            yield changed, removed
+
+
+class LiveReload:
+    """向所有订阅的页面广播改动的 URL"""
+
+    def __init__(self):
+        self._clients = []
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        events = queue.Queue()
+        with self._lock:
+            self._clients.append(events)
+        return events
+
+    def unsubscribe(self, events):
+        with self._lock:
+            if events in self._clients:
+                self._clients.remove(events)
+
+    def notify(self, urls):
+        with self._lock:
+            clients = list(self._clients)
+        for events in clients:
+            events.put(list(urls))
+        return len(clients)
+
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    """静态文件服务：HTML 注入自动刷新脚本，所有响应都不缓存
+
+    directory 里找不到的路径再到 fallback 目录里找。
+    """
+
+    def __init__(self, *args, reload=None, fallback=None, **kwargs):
+        self.reload = reload
+        self.fallback = fallback
+        super().__init__(*args, **kwargs)
+
+    def translate_path(self, path):
+        local = super().translate_path(path)
+        if self.fallback is not None and not os.path.exists(local):
+            # 父类已经去掉了 .. 等路径片段，local 一定在 directory 里
+            other = os.path.join(self.fallback, os.path.relpath(local, self.directory))
+            if os.path.exists(other):
+                return other
+        return local
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == EVENTS_PATH:
+            self.send_events()
+            return
+
+        local = self.translate_path(self.path)
+        if os.path.isdir(local):
+            local = os.path.join(local, 'index.html')
+        if local.endswith('.html') and os.path.isfile(local) and path.endswith(('/', '.html')):
+            self.send_html(local)
+            return
+        super().do_GET()
+
+    def send_html(self, local):
+        with open(local, 'rb') as f:
+            body = f.read()
+        script = RELOAD_SCRIPT.encode('utf-8')
+        index = body.rfind(b'</body>')
+        body = body[:index] + script + body[index:] if index >= 0 else body + script
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_events(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        events = self.reload.subscribe()
+        try:
+            while True:
+                try:
+                    urls = events.get(timeout=KEEPALIVE_SECONDS)
+                    message = f'data: {json.dumps(urls, ensure_ascii=False)}\n\n'
+                except queue.Empty:
+                    message = ': ping\n\n'
+                self.wfile.write(message.encode('utf-8'))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.reload.unsubscribe(events)
+
+    def end_headers(self):
+        self.send_header('Cache-Control', 'no-store')
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(directory, port, reload, host='127.0.0.1', fallback=None):
+    """在后台线程里启动预览服务，返回 server（调用 shutdown() 停止）"""
+    handler = partial(DevRequestHandler, directory=os.fspath(directory), reload=reload,
+                      fallback=os.fspath(fallback) if fallback is not None else None)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def url_for(path):
+    """站点目录下的相对路径对应的 URL"""
+    return '/' + Path(os.path.normpath(path)).as_posix()
@@ -0,0 +1,309 @@
+"""
+文章和即刻动态的 Atom / JSON Feed
+
+每个来源生成四个 feed：Atom 和 JSON Feed 各一份，全文版和摘要版各一份。
+只收录最新的若干条，生成时间不随归档变大而增长：
+- 文章取构建清单里按日期排序的最新几篇，只有需要重新序列化全文时才读取这篇文章
+- 即刻动态从最新的月度分片往前读，凑够条数就停
+
+每条 entry 序列化后的片段按内容哈希缓存在 .build/ 里，新增一篇文章或一条动态
+只序列化这一条和 feed 头部。feed 旁边写一个 .etag 文件（内容哈希），
+服务器可以用它回应条件请求；内容没变时 feed 和 .etag 都不重写。
+"""
+import datetime
+import hashlib
+import html
+import json
+import os
+from pathlib import Path
+from urllib.parse import quote, urljoin
+
+import yaml
+
+try:
+    _YAML_LOADER = yaml.CSafeLoader
+except AttributeError:
+    _YAML_LOADER = yaml.SafeLoader
+
+# 缓存的片段格式变化时加一，旧缓存全部作废
+CACHE_VERSION = 2
+JSON_FEED_VERSION = 'https://jsonfeed.org/version/1.1'
+# 摘要版里即刻动态截取的字数
+THOUGHT_SUMMARY_LENGTH = 120
+THOUGHT_TITLE_LENGTH = 30
+
+# (来源, 版本) -> (Atom 路径, JSON Feed 路径)；文章全文版沿用 jekyll-feed 的 /feed.xml
+FEED_PATHS = {
+    ('posts', 'full'): ('feed.xml', 'feed.json'),
+    ('posts', 'summary'): ('feeds/posts-summary.xml', 'feeds/posts-summary.json'),
+    ('thoughts', 'full'): ('feeds/thoughts.xml', 'feeds/thoughts.json'),
+    ('thoughts', 'summary'): ('feeds/thoughts-summary.xml', 'feeds/thoughts-summary.json'),
+}
+FEED_TITLES = {'posts': '文章', 'thoughts': '即刻动态'}
+# 没有日期的条目在缓存的片段里留下这个标记，组装 feed 时换成 feed 的更新时间
+# （转义后的内容里不会出现字面的 <）
+UPDATED_MARKER = '<updated/>'
+
+
+def feed_paths(out_dir='.'):
+    """所有 feed 的输出路径（FEED_PATHS 里是站内路径，文件写在 out_dir 下）"""
+    return [Path(out_dir) / path for pair in FEED_PATHS.values() for path in pair]
+
+
+def absolute_url(site_url, path):
+    """站内路径转成完整 URL，非 ASCII 字符按百分号编码"""
+    return urljoin(site_url, quote(path, safe='/#?=&%'))
+
+
+def rfc3339(moment):
+    return moment.isoformat(timespec='seconds')
+
+
+def parse_moment(date, time_of_day, tz):
+    """"2024-06-01" 和可选的 "10:30" 转成带时区的时间，无法解析时返回 None"""
+    if isinstance(date, datetime.datetime):
+        return date if date.tzinfo else date.replace(tzinfo=tz)
+    try:
+        day = date if isinstance(date, datetime.date) else datetime.date.fromisoformat(str(date)[:10])
+        clock = datetime.time.fromisoformat(time_of_day) if time_of_day else datetime.time()
+    except ValueError:
+        return None
+    return datetime.datetime.combine(day, clock, tzinfo=tz)
+
+
+def post_entry(key, summary, source_hash, site_url, tz, load_content):
+    """文章的 feed 条目；load_content() 返回正文 HTML，只在缓存失效时调用"""
+    return {
+        'key': f'post:{key}',
+        'hash': source_hash,
+        'id': absolute_url(site_url, summary['url']),
+        'url': absolute_url(site_url, summary['url']),
+        'title': summary['title'],
+        'moment': parse_moment(summary['date'], None, tz),
+        'tags': summary['tags'],
+        'summary': summary['excerpt'],
+        'content': load_content,
+    }
+
+
+def thought_entry(thought, site_url, tz):
+    """即刻动态的 feed 条目：正文按段落转成 HTML，图片附在后面"""
+    content = str(thought.get('content', ''))
+    date = thought.get('date', '')
+    time_of_day = thought.get('time', '')
+    # id、链接和图片地址都含站点地址，站点地址变了缓存的片段也要失效
+    data = json.dumps([site_url, thought], ensure_ascii=False, sort_keys=True, default=str)
+    link = thought.get('source_link') or ''
+
+    def load_content():
+        paragraphs = ''.join(f'<p>{html.escape(line)}</p>' for line in content.split('\n') if line.strip())
+        images = ''.join(f'<p><img src="{html.escape(absolute_url(site_url, src))}" alt=""></p>'
+                         for src in thought.get('images') or [])
+        return paragraphs + images
+
+    summary = content if len(content) <= THOUGHT_SUMMARY_LENGTH else content[:THOUGHT_SUMMARY_LENGTH].rstrip() + '…'
+    return {
+        'key': f'thought:{link or f"{date} {time_of_day}"}',
+        'hash': hashlib.sha256(data.encode('utf-8')).hexdigest(),
+        'id': link or f'{site_url}#thought-{date}-{time_of_day}',
+        'url': link or site_url,
+        'title': thought.get('topic') or content[:THOUGHT_TITLE_LENGTH],
+        'moment': parse_moment(date, time_of_day, tz),
+        'tags': [thought['topic']] if thought.get('topic') else [],
+        'summary': summary,
+        'content': load_content,
+    }
+
+
+def recent_thoughts(data_dir, limit):
+    """最新的 limit 条即刻动态（新的在前），从最新的月度分片往前读，够数就停"""
+    data_dir = Path(data_dir)
+    legacy = data_dir / 'thoughts.yml'
+    paths = sorted((data_dir / 'thoughts').glob('*.yml'), reverse=True)
+    if legacy.exists():
+        # 还没迁移的旧版单文件，不知道时间范围，只能整个读进来
+        paths.append(legacy)
+
+    thoughts = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            thoughts.extend(t for t in yaml.load(f, Loader=_YAML_LOADER) or [] if t.get('content'))
+        if len(thoughts) >= limit and path != legacy:
+            break
+    thoughts.sort(key=lambda t: f"{t.get('date', '')} {t.get('time', '')}", reverse=True)
+    return thoughts[:limit]
+
+
+def _atom_entry(entry, full):
+    parts = [
+        '<entry>',
+        f'<title>{html.escape(entry["title"])}</title>',
+        f'<link href="{html.escape(entry["url"])}" rel="alternate" type="text/html"/>',
+        f'<id>{html.escape(entry["id"])}</id>',
+    ]
+    if entry['moment'] is not None:
+        stamp = rfc3339(entry['moment'])
+        parts.append(f'<published>{stamp}</published><updated>{stamp}</updated>')
+    else:
+        # RFC 4287 要求每个 entry 都有 <updated>
+        parts.append(UPDATED_MARKER)
+    parts.extend(f'<category term="{html.escape(tag)}"/>' for tag in entry['tags'])
+    if entry['summary']:
+        parts.append(f'<summary>{html.escape(entry["summary"])}</summary>')
+    if full:
+        parts.append(f'<content type="html">{html.escape(entry["content"]())}</content>')
+    parts.append('</entry>')
+    return ''.join(parts)
+
+
+def _json_item(entry, full):
+    item = {'id': entry['id'], 'url': entry['url'], 'title': entry['title']}
+    if full:
+        item['content_html'] = entry['content']()
+        if entry['summary']:
+            item['summary'] = entry['summary']
+    else:
+        item['content_text'] = entry['summary']
+    if entry['moment'] is not None:
+        item['date_published'] = rfc3339(entry['moment'])
+    if entry['tags']:
+        item['tags'] = entry['tags']
+    return json.dumps(item, ensure_ascii=False, separators=(',', ':'))
+
+
+def serialize_entry(entry):
+    """一条 entry 的四种片段，只在缓存失效时计算；正文只取一次"""
+    content = None
+    load = entry['content']
+
+    def load_content():
+        nonlocal content
+        if content is None:
+            content = load()
+        return content
+
+    entry = dict(entry, content=load_content)
+    return {
+        'hash': entry['hash'],
+        'atom_full': _atom_entry(entry, True),
+        'atom_summary': _atom_entry(entry, False),
+        'json_full': _json_item(entry, True),
+        'json_summary': _json_item(entry, False),
+    }
+
+
+def _atom_feed(site, title, path, alternate, updated, entries):
+    feed_url = absolute_url(site['url'], path)
+    header = (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        # xml:base 让正文里的站内相对链接和图片在阅读器里也能解析
+        f'<feed xmlns="http://www.w3.org/2005/Atom" xml:lang="zh-CN" xml:base="{html.escape(site["url"])}">'
+        f'<title>{html.escape(title)}</title>'
+        f'<subtitle>{html.escape(site["description"])}</subtitle>'
+        f'<link href="{html.escape(feed_url)}" rel="self" type="application/atom+xml"/>'
+        f'<link href="{html.escape(alternate)}" rel="alternate" type="text/html"/>'
+        f'<id>{html.escape(feed_url)}</id>'
+        f'<updated>{updated}</updated>'
+        f'<author><name>{html.escape(site["author"])}</name></author>'
+    )
+    return header + ''.join(entries) + '</feed>\n'
+
+
+def _json_feed(site, title, path, alternate, entries):
+    header = {
+        'version': JSON_FEED_VERSION,
+        'title': title,
+        'home_page_url': alternate,
+        'feed_url': absolute_url(site['url'], path),
+        'description': site['description'],
+        'language': 'zh-CN',
+        'authors': [{'name': site['author']}],
+        'items': [],
+    }
+    text = json.dumps(header, ensure_ascii=False, separators=(',', ':'))
+    # 'items' 是最后一个键，把缓存的条目直接拼进空列表
+    return text[:-2] + ','.join(entries) + ']}\n'
+
+
+def load_cache(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get('version') == CACHE_VERSION:
+            return cache['entries']
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
+
+
+def save_cache(path, entries):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': CACHE_VERSION, 'entries': entries}, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def etag_path(path):
+    path = Path(path)
+    return path.with_name(path.name + '.etag')
+
+
+def write_feed(path, text):
+    """内容哈希和 .etag 记录的相同时不重写，返回是否写入"""
+    path = Path(path)
+    data = text.encode('utf-8')
+    etag = f'"{hashlib.sha256(data).hexdigest()[:32]}"'
+    tag_file = etag_path(path)
+    try:
+        if path.exists() and tag_file.read_text(encoding='utf-8').strip() == etag:
+            return False
+    except FileNotFoundError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for target, content in ((path, data), (tag_file, (etag + '\n').encode('utf-8'))):
+        tmp_path = target.with_name(target.name + '.tmp')
+        tmp_path.write_bytes(content)
+        tmp_path.replace(target)
+    return True
+
+
+def write_feeds(sources, site, cache_path, out_dir='.'):
+    """生成所有 feed，写到 out_dir 下
+
+    sources 是 {来源: [条目]}（新的在前），site 含 url、title、description、author。
+    返回 (改写的 feed 数, 重新序列化的条目数)。
+    """
+    out_dir = Path(out_dir)
+    cache = load_cache(cache_path)
+    fresh_cache = {}
+    serialized = 0
+    written = 0
+
+    for source, entries in sources.items():
+        fragments = []
+        for entry in entries:
+            cached = cache.get(entry['key'])
+            if cached is None or cached['hash'] != entry['hash']:
+                cached = serialize_entry(entry)
+                serialized += 1
+            fresh_cache[entry['key']] = cached
+            fragments.append(cached)
+
+        moments = [entry['moment'] for entry in entries if entry['moment'] is not None]
+        # feed 的更新时间取最新条目的时间，内容不变时整个 feed 字节不变
+        updated = rfc3339(max(moments)) if moments else '1970-01-01T00:00:00+00:00'
+        title = f'{site["title"]} · {FEED_TITLES.get(source, source)}'
+        alternate = site['url']
+        for variant in ('full', 'summary'):
+            atom_path, json_path = FEED_PATHS[(source, variant)]
+            atom = _atom_feed(site, title, atom_path, alternate, updated,
+                              [fragment[f'atom_{variant}'].replace(UPDATED_MARKER, f'<updated>{updated}</updated>')
+                               for fragment in fragments])
+            feed = _json_feed(site, title, json_path, alternate,
+                              [fragment[f'json_{variant}'] for fragment in fragments])
+            written += write_feed(out_dir / atom_path, atom) + write_feed(out_dir / json_path, feed)
+
+    save_cache(cache_path, fresh_cache)
+    return written, serialized
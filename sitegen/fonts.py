@@ -0,0 +1,219 @@
+"""
+自托管的子集字体
+
+页面只用到 Noto Sans SC（样式表里没有引用 Inter 和 Libre Baskerville）。完整的
+思源黑体每个字重都有好几 MB，从 fonts.googleapis.com 加载在国内又慢又不稳定。
+这里收集站点实际用到的字符（文章、即刻动态、页面模板），从 _fonts/ 中的源字体
+为每个字重生成只含这些字符的子集，写到 _output/assets/build/fonts/，文件名带内容哈希。
+页面 <head> 里内联 @font-face（font-display: swap）并预加载正文字重，不再请求第三方。
+
+源字体可以是每个字重一个文件（NotoSansSC-Regular.otf 等），也可以是一个可变字体
+（NotoSansSC-VariableFont_wght.ttf 或 NotoSansSC[wght].ttf），后者只生成一个覆盖全部字重的子集。
+
+依赖 fontTools（可选）；写 WOFF2 还需要 brotli，没有时退回 WOFF。缺少 fontTools
+或源字体时页面继续使用 Google Fonts（已生成的子集保留）。字符集和源字体都没变时不重新生成。
+子集覆盖全站所有字符，每个字重的大小写在构建日志里，字符多了可以及时发现。
+"""
+import hashlib
+import io
+import json
+import logging
+from functools import lru_cache
+from pathlib import Path
+
+from sitegen import OUTPUT_DIR, PROJECT_ROOT
+from sitegen.template import TEMPLATES_DIR
+
+try:
+    from fontTools import subset
+except ImportError:
+    subset = None
+
+try:
+    import brotli  # fontTools 写 WOFF2 时使用
+except ImportError:
+    brotli = None
+
+FONTS_DIR = PROJECT_ROOT / '_fonts'
+FONTS_OUTPUT_DIR = OUTPUT_DIR / 'assets' / 'build' / 'fonts'
+WEB_PREFIX = '/assets/build/fonts/'
+STATE_PATH = PROJECT_ROOT / '.build' / 'fonts.json'
+
+# 提取字符的来源
+CHARACTER_SOURCES = [
+    (PROJECT_ROOT / '_posts', '*.md'),
+    (PROJECT_ROOT / '_data', '**/*.yml'),
+    (TEMPLATES_DIR, '*.html'),
+]
+# 无论正文里有没有，ASCII 和常用中文标点总是保留
+BASE_CHARACTERS = (''.join(chr(c) for c in range(0x20, 0x7f))
+                   + '，。、；：？！“”‘’（）《》〈〉「」『』【】—…·～')
+
+FAMILY = 'Noto Sans SC'
+# 每个字重的源文件名（不含扩展名）；可变字体存在时优先使用
+WEIGHTS = {
+    400: 'NotoSansSC-Regular',
+    500: 'NotoSansSC-Medium',
+    600: 'NotoSansSC-SemiBold',
+    700: 'NotoSansSC-Bold',
+}
+# Google Fonts 下载包和 google/fonts 仓库里可变字体的文件名
+VARIABLE_SOURCES = ('NotoSansSC-VariableFont_wght', 'NotoSansSC[wght]')
+SOURCE_SUFFIXES = ('.ttf', '.otf')
+# 预加载的字重：正文用的常规字重，标题的粗体等用到时再下载
+PRELOAD_WEIGHTS = (400,)
+
+# 不能自托管时使用的 Google Fonts（只加载页面实际用到的 Noto Sans SC）；
+# 异步加载靠 onload 切换成样式表，禁用脚本时由 <noscript> 里的链接加载
+GOOGLE_FONTS_URL = 'https://fonts.googleapis.com/css2?family=Noto+Sans+SC:wght@400;500;600;700&display=swap'
+GOOGLE_FONTS_HTML = (
+    '<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>\n'
+    f'  <link rel="preload" href="{GOOGLE_FONTS_URL}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+    f'  <noscript><link rel="stylesheet" href="{GOOGLE_FONTS_URL}"></noscript>'
+)
+
+FORMATS = {'woff2': 'font/woff2', 'woff': 'font/woff'}
+
+
+def site_characters():
+    """站点文本里出现过的所有字符（排序后的字符串）"""
+    chars = set(BASE_CHARACTERS)
+    for directory, pattern in CHARACTER_SOURCES:
+        for path in sorted(Path(directory).glob(pattern)):
+            chars.update(path.read_text(encoding='utf-8', errors='ignore'))
+    return ''.join(sorted(c for c in chars if c.isprintable()))
+
+
+def find_source(stem):
+    for suffix in SOURCE_SUFFIXES:
+        path = FONTS_DIR / f'{stem}{suffix}'
+        if path.exists():
+            return path
+    return None
+
+
+def planned_faces():
+    """[(字重，可变字体时为 (最小, 最大)), 源文件]，没有源字体时为空"""
+    for stem in VARIABLE_SOURCES:
+        variable = find_source(stem)
+        if variable is not None:
+            return [((min(WEIGHTS), max(WEIGHTS)), variable)]
+    faces = []
+    for weight, stem in WEIGHTS.items():
+        source = find_source(stem)
+        if source is not None:
+            faces.append((weight, source))
+    return faces
+
+
+def subset_font(source, text, flavor):
+    """只保留 text 中字符的子集字体，返回字体文件内容"""
+    options = subset.Options()
+    options.flavor = flavor
+    options.layout_features = ['*']
+    # 不需要名称表里的多语言条目和提示信息
+    options.name_languages = [0x0409]
+    options.hinting = False
+    # 子集化时丢弃不认识的表会打印警告，对输出没有影响
+    logging.getLogger('fontTools').setLevel(logging.ERROR)
+    font = subset.load_font(str(source), options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(text=text)
+    subsetter.subset(font)
+    buffer = io.BytesIO()
+    subset.save_font(font, buffer, options)
+    return buffer.getvalue()
+
+
+def _weight_label(weight):
+    return f'{weight[0]}-{weight[1]}' if isinstance(weight, tuple) else str(weight)
+
+
+def load_state():
+    try:
+        with open(STATE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_fonts():
+    """生成子集字体，返回 (状态, 重新生成的文件数)；不能自托管时状态为 None
+
+    状态记录字符集哈希、源字体的 mtime 和大小、输出格式和生成的字体，
+    和上次相同且输出文件都在时直接沿用。
+    """
+    faces = planned_faces()
+    if subset is None or not faces:
+        # 页面退回 Google Fonts；输出目录里已经生成的子集不删，
+        # 只是临时缺少 fontTools 或源字体时不会把别处还在用的文件清掉
+        if STATE_PATH.exists():
+            STATE_PATH.unlink()
+        head_html.cache_clear()
+        return None, 0
+
+    text = site_characters()
+    flavor = 'woff2' if brotli is not None else 'woff'
+    key = {
+        'characters': hashlib.sha256(text.encode('utf-8')).hexdigest(),
+        'sources': {source.name: [source.stat().st_mtime_ns, source.stat().st_size] for _, source in faces},
+        'flavor': flavor,
+    }
+    state = load_state()
+    if (state.get('key') == key
+            and all((FONTS_OUTPUT_DIR / face['file']).exists() for face in state.get('faces', []))):
+        return state, 0
+
+    FONTS_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    built = []
+    for weight, source in faces:
+        data = subset_font(source, text, flavor)
+        name = f'noto-sans-sc-{_weight_label(weight)}.{hashlib.sha256(data).hexdigest()[:10]}.{flavor}'
+        (FONTS_OUTPUT_DIR / name).write_bytes(data)
+        built.append({
+            'weight': list(weight) if isinstance(weight, tuple) else weight,
+            'file': name,
+            'size': len(data),
+        })
+
+    # 删除旧的子集
+    names = {face['file'] for face in built}
+    for path in FONTS_OUTPUT_DIR.iterdir():
+        if path.name not in names:
+            path.unlink()
+
+    state = {'key': key, 'characters': len(text), 'flavor': flavor, 'faces': built}
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = STATE_PATH.with_suffix('.tmp')
+    tmp_path.write_text(json.dumps(state, ensure_ascii=False, indent=1), encoding='utf-8')
+    tmp_path.replace(STATE_PATH)
+    head_html.cache_clear()
+    return state, len(built)
+
+
+@lru_cache(maxsize=None)
+def head_html():
+    """页面 <head> 中的字体部分：预加载和内联的 @font-face，或者退回 Google Fonts
+
+    读取 build_fonts() 写下的状态，工作进程里也能得到同样的结果。
+    """
+    state = load_state()
+    if not state.get('faces'):
+        return GOOGLE_FONTS_HTML
+
+    flavor = state['flavor']
+    links = []
+    rules = []
+    for face in state['faces']:
+        url = WEB_PREFIX + face['file']
+        weight = face['weight']
+        if isinstance(weight, list):
+            weights = range(weight[0], weight[1] + 1)
+            weight = f'{weight[0]} {weight[1]}'
+        else:
+            weights = (weight,)
+        if any(w in weights for w in PRELOAD_WEIGHTS):
+            links.append(f'<link rel="preload" href="{url}" as="font" type="{FORMATS[flavor]}" crossorigin>')
+        rules.append(f"@font-face{{font-family:'{FAMILY}';font-style:normal;font-weight:{weight};"
+                     f"font-display:swap;src:url({url}) format('{flavor}')}}")
+    return '\n  '.join(links + [f'<style>{"".join(rules)}</style>'])
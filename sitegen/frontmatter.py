@@ -0,0 +1,271 @@
+"""
+Front Matter 解析
+
+文章开头第一行是 ---，到下一个单独一行的 ---（或 ...）为止是 YAML 元数据。
+- split_front_matter() 按行查找结束分隔符，正文里的 ---（Markdown 分隔线）不受影响
+- read_front_matter() 只读到结束分隔符为止，不读正文，列表页、feed 只需要元数据
+- MetadataCache 按 mtime 和大小缓存解析结果，文件没变时不再打开
+
+文章的 Front Matter 几乎都是一行一个 key: value。这种情况由快速路径直接解析，
+标量类型按 YAML 自己的规则判定，结果和 YAML 完全一致；遇到列表、多行值、
+转义等任何不确定的写法都交给 YAML，用 C 实现的 CSafeLoader（libyaml 可用时）。
+格式错误抛出带文件名和行号的 FrontMatterError，不再悄悄当成没有元数据。
+"""
+import datetime
+import json
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+
+import yaml
+
+try:
+    _YAML_LOADER = yaml.CSafeLoader
+except AttributeError:
+    _YAML_LOADER = yaml.SafeLoader
+
+DELIMITER = '---'
+# YAML 文档结束标记 ... 也可以结束 Front Matter（和 Jekyll 一致）
+CLOSING_DELIMITERS = ('---', '...')
+# read_front_matter() 第一次读取的字节数，文章的 Front Matter 一般不到 1 KB
+HEAD_BYTES = 4096
+_CLOSING_RE = re.compile(rb'^(?:---|\.\.\.)[ \t\r\f\v]*$', re.MULTILINE)
+
+_FAST_LINE_RE = re.compile(r'([A-Za-z_][\w-]*):(?:[ \t]+(.*?))?[ \t]*')
+_INT_RE = re.compile(r'[-+]?(?:0|[1-9][0-9]*)')
+_DATE_RE = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}')
+# 出现在开头时有特殊含义的字符，这样的纯量交给 YAML
+_INDICATORS = '-?:,[]{}#&*!|>\'"%@`'
+_RESOLVER = yaml.resolver.Resolver()
+_BOOL_VALUES = yaml.constructor.SafeConstructor.bool_values
+# 快速路径处理不了时的返回值
+_UNSUPPORTED = object()
+
+
+class FrontMatterError(ValueError):
+    """Front Matter 无法解析：没有结束分隔符、YAML 语法错误或者不是键值对"""
+
+    def __init__(self, path, message, line=None):
+        self.path = str(path)
+        self.line = line
+        location = f'{self.path}:{line}' if line else self.path
+        super().__init__(f'{location}: {message}')
+
+
+@lru_cache(maxsize=4096)
+def _implicit_tag(raw):
+    """纯量的隐式类型；键和常见的值反复出现，缓存起来"""
+    return _RESOLVER.resolve(yaml.ScalarNode, raw, (True, False))
+
+
+def _fast_scalar(raw):
+    """单行的值：按 YAML 的隐式类型规则转换，拿不准时返回 _UNSUPPORTED"""
+    if not raw:
+        return None
+    if raw[0] in '"\'':
+        quote = raw[0]
+        inner = raw[1:-1]
+        if len(raw) < 2 or raw[-1] != quote or quote in inner or '\\' in inner:
+            return _UNSUPPORTED
+        return inner
+    if raw[0] in _INDICATORS or ': ' in raw or ' #' in raw or '\t' in raw or raw.endswith(':'):
+        return _UNSUPPORTED
+
+    tag = _implicit_tag(raw)
+    if tag == 'tag:yaml.org,2002:str':
+        return raw
+    if tag == 'tag:yaml.org,2002:bool':
+        return _BOOL_VALUES[raw.lower()]
+    if tag == 'tag:yaml.org,2002:null':
+        return None
+    if tag == 'tag:yaml.org,2002:int' and _INT_RE.fullmatch(raw):
+        return int(raw)
+    if tag == 'tag:yaml.org,2002:timestamp' and _DATE_RE.fullmatch(raw):
+        return datetime.date.fromisoformat(raw)
+    return _UNSUPPORTED
+
+
+def _fast_load(text):
+    """只含 key: value 行的 Front Matter，其他写法返回 None"""
+    data = {}
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
+            continue
+        m = _FAST_LINE_RE.fullmatch(line)
+        if m is None:
+            return None
+        key = m.group(1)
+        value = _fast_scalar(m.group(2) or '')
+        if value is _UNSUPPORTED or _fast_scalar(key) != key:
+            return None
+        data[key] = value
+    return data
+
+
+def _load_yaml(text, path, first_line):
+    """解析 YAML，first_line 是 YAML 第一行在文件里的行号"""
+    data = _fast_load(text)
+    if data is not None:
+        return data
+    try:
+        data = yaml.load(text, Loader=_YAML_LOADER)
+    except yaml.YAMLError as e:
+        mark = getattr(e, 'problem_mark', None)
+        line = first_line + mark.line if mark is not None else None
+        problem = getattr(e, 'problem', None) or str(e)
+        raise FrontMatterError(path, f'Front Matter 格式错误: {problem}', line) from None
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise FrontMatterError(path, f'Front Matter 应该是键值对，实际是 {type(data).__name__}', first_line)
+    return data
+
+
+def split_front_matter(text, path='<string>'):
+    """拆分 Front Matter 和正文，返回 (元数据, 正文)；没有 Front Matter 时元数据为空"""
+    lines = text.split('\n', 1)
+    if lines[0].rstrip() != DELIMITER:
+        return {}, text
+    rest = lines[1] if len(lines) > 1 else ''
+
+    pos = 0
+    while pos <= len(rest):
+        end = rest.find('\n', pos)
+        line_end = len(rest) if end < 0 else end
+        if rest[pos:line_end].rstrip() in CLOSING_DELIMITERS:
+            front_matter = _load_yaml(rest[:pos], path, 2)
+            return front_matter, rest[line_end + 1:].strip()
+        if end < 0:
+            break
+        pos = end + 1
+    raise FrontMatterError(path, 'Front Matter 缺少结束的 ---')
+
+
+def read_front_matter(path):
+    """只读取文件开头的 Front Matter，不读正文
+
+    按字节读开头的 HEAD_BYTES，在里面找结束分隔符，只解码 Front Matter 部分；
+    Front Matter 比这更长时再成倍往后读。
+    """
+    with open(path, 'rb') as f:
+        head = f.read(HEAD_BYTES)
+        eof = len(head) < HEAD_BYTES
+        first_end = head.find(b'\n')
+        first = head if first_end < 0 else head[:first_end]
+        if first.rstrip() != DELIMITER.encode():
+            return {}
+
+        pos = first_end + 1
+        while first_end >= 0:
+            m = _CLOSING_RE.search(head, pos)
+            # 匹配到缓冲区末尾时这一行可能还没读完
+            if m is not None and (eof or m.end() < len(head)):
+                return _load_yaml(head[first_end + 1:m.start()].decode('utf-8'), path, 2)
+            if eof:
+                break
+            # 已经检查过的完整行不再重复查找
+            pos = max(pos, head.rfind(b'\n', 0, len(head) - 1) + 1)
+            more = f.read(len(head))
+            eof = len(more) < len(head)
+            head += more
+    raise FrontMatterError(path, 'Front Matter 缺少结束的 ---')
+
+
+def _encode(value):
+    """JSON 不支持日期，缓存时转成带标记的字符串"""
+    if isinstance(value, datetime.datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {'__date__': value.isoformat()}
+    raise TypeError(f'无法缓存的 Front Matter 值: {value!r}')
+
+
+def _decode(obj):
+    if '__datetime__' in obj:
+        return datetime.datetime.fromisoformat(obj['__datetime__'])
+    if '__date__' in obj:
+        return datetime.date.fromisoformat(obj['__date__'])
+    return obj
+
+
+def _cacheable(front_matter):
+    """能否原样存进 JSON 缓存再读回来
+
+    YAML 可以写出 JSON 表示不了或者会悄悄变样的值：集合（!!set）、二进制
+    （!!binary）、数字或元组做键等。这样的文章不缓存，每次重新解析，
+    保证缓存命中和不命中时拿到的元数据一样。
+    """
+    try:
+        text = json.dumps(front_matter, ensure_ascii=False, default=_encode)
+    except (TypeError, ValueError):
+        return False
+    return json.loads(text, object_hook=_decode) == front_matter
+
+
+class MetadataCache:
+    """按文件 mtime 和大小缓存 Front Matter，保存在 JSON 文件里"""
+
+    VERSION = 1
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = {}
+        self.dirty = False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f, object_hook=_decode)
+            if data.get('version') == self.VERSION:
+                self.entries = data['files']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def get(self, post_file):
+        """文章的 Front Matter：mtime 和大小都没变时直接用缓存"""
+        key = Path(post_file).as_posix()
+        stat = os.stat(post_file)
+        stamp = [stat.st_mtime_ns, stat.st_size]
+        entry = self.entries.get(key)
+        if entry is not None and entry['stamp'] == stamp:
+            return entry['front_matter']
+        front_matter = read_front_matter(post_file)
+        if _cacheable(front_matter):
+            self.entries[key] = {'stamp': stamp, 'front_matter': front_matter}
+            self.dirty = True
+        elif self.entries.pop(key, None) is not None:
+            self.dirty = True
+        return front_matter
+
+    def load_all(self, post_files):
+        """读取全部文章的元数据，返回 ({文件: 元数据}, [FrontMatterError])
+
+        出错的文章不中断其他文章；不在 post_files 里的缓存条目会被删掉。
+        """
+        metadata = {}
+        errors = []
+        keys = set()
+        for post_file in post_files:
+            keys.add(Path(post_file).as_posix())
+            try:
+                metadata[post_file] = self.get(post_file)
+            except (FrontMatterError, UnicodeDecodeError) as e:
+                if not isinstance(e, FrontMatterError):
+                    e = FrontMatterError(post_file, f'不是 UTF-8 文本: {e.reason}')
+                errors.append(e)
+        # 删掉已经不存在的文章
+        for key in set(self.entries) - keys:
+            del self.entries[key]
+            self.dirty = True
+        return metadata, errors
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'version': self.VERSION, 'files': self.entries},
+                               ensure_ascii=False, default=_encode, separators=(',', ':')))
+        os.replace(tmp_path, self.path)
+        self.dirty = False
@@ -0,0 +1,282 @@
+"""
+列表页：首页分页、标签页和标签云
+
+构建每篇文章时顺便生成一份摘要（标题、日期、标签、摘录、URL），存进构建清单。
+列表页只从这些摘要生成，不再读取任何源文件：
+- index.html、page2/index.html ……：按日期倒序每页 per_page 篇，精选文章（sticky）置顶
+- tags/index.html：标签云和按标签分组的全部文章
+- tags/<标签>/index.html：单个标签下的文章
+- search/index.html：站内搜索（搜索索引也只在生成的站点里有）
+
+页面都写到 _output/，不会覆盖仓库里手写的 index.html 和 Jekyll 的
+_pages/tags.html；现在发布的仍然是 Jekyll 构建的站点，生成的站点要等有
+发布 _output/ 的流程后才替代它们。
+
+plan_pages() 只算出每个页面的输入（这一页的文章摘要、页码等），write_pages()
+对比上次的输入哈希，只渲染和压缩输入变了的页面，再对比输出的内容哈希，
+只重写有变化的页面，并删除不再生成的页面。
+"""
+import hashlib
+import html
+import json
+import re
+from functools import partial
+from pathlib import Path
+
+from sitegen import assets
+from sitegen.compress import minify_html, remove_siblings
+from sitegen.search import plain_text
+from sitegen.template import load_template
+
+EXCERPT_SEPARATOR = '<!--more-->'
+# 没有摘录分隔符时，摘录取正文开头的字数
+EXCERPT_LENGTH = 120
+# 标签云的字号范围（rem），按文章数线性分布
+CLOUD_MIN_SIZE = 0.875
+CLOUD_MAX_SIZE = 1.75
+
+
+def post_tags(front_matter):
+    """Front Matter 中的 tags：列表，或者像 Jekyll 一样用空格分隔的字符串"""
+    tags = front_matter.get('tags') or []
+    if isinstance(tags, str):
+        tags = tags.split()
+    return [str(tag) for tag in tags]
+
+
+def post_summary(front_matter, content, values, url, to_html):
+    """列表页需要的文章信息，只含基本类型，可以存进构建清单
+
+    content 是 Markdown 正文，values 是 post_page_values() 的结果，
+    to_html 用来转换摘录分隔符之前的部分。
+    """
+    separator = front_matter.get('excerpt_separator') or EXCERPT_SEPARATOR
+    if separator in content:
+        excerpt = plain_text(to_html(content.split(separator, 1)[0]))
+    else:
+        excerpt = plain_text(values['content'])
+        if len(excerpt) > EXCERPT_LENGTH:
+            excerpt = excerpt[:EXCERPT_LENGTH].rstrip() + '…'
+
+    return {
+        'title': str(values['title']),
+        'date': str(values['date'])[:10],
+        'formatted_date': str(values['formatted_date']),
+        'tags': post_tags(front_matter),
+        'sticky': bool(front_matter.get('sticky')),
+        'hidden': bool(front_matter.get('hidden')),
+        'excerpt': excerpt,
+        'url': url,
+    }
+
+
+def sort_posts(summaries):
+    """按日期倒序，同一天的按 URL 倒序，保证每次构建顺序一致"""
+    return sorted(summaries, key=lambda s: (s['date'], s['url']), reverse=True)
+
+
+def tag_slug(tag):
+    return re.sub(r'[^\w\-]', '-', tag.lower())
+
+
+def tag_url(tag):
+    return f'/tags/{tag_slug(tag)}/'
+
+
+def page_url(number):
+    return '/' if number == 1 else f'/page{number}/'
+
+
+def output_for(url):
+    """页面 URL 对应的输出文件（相对输出目录）"""
+    return Path(url.strip('/')) / 'index.html'
+
+
+def group_by_tag(posts):
+    """{标签: [文章]}，标签按名称排序，文章保持传入的顺序"""
+    groups = {}
+    for post in posts:
+        for tag in post['tags']:
+            groups.setdefault(tag, []).append(post)
+    return dict(sorted(groups.items(), key=lambda item: item[0].lower()))
+
+
+def render_items(posts, pinned=False):
+    template = load_template('catalogue_item.html')
+    items = []
+    for post in posts:
+        tags = ''
+        if post['tags']:
+            spans = ''.join(f'        <span class="tag">{html.escape(tag)}</span>\n' for tag in post['tags'])
+            tags = f'      <div class="catalogue-tags">\n{spans}      </div>\n'
+        items.append(template.render(
+            url=post['url'],
+            pinned='      <div class="catalogue-pinned">📌 精选文章</div>\n' if pinned else '',
+            formatted_date=post['formatted_date'],
+            title=post['title'],
+            excerpt=post['excerpt'],
+            tags=tags,
+        ))
+    return '\n'.join(items)
+
+
+def _page_button(label, url):
+    if url is None:
+        return f'<span class="pagination-btn" disabled>{label}</span>'
+    return f'<a href="{html.escape(url)}" class="pagination-btn">{label}</a>'
+
+
+def render_pagination(number, total):
+    return load_template('pagination.html').render(
+        first=_page_button('« 首页', page_url(1) if number > 1 else None),
+        previous=_page_button('‹ 上一页', page_url(number - 1) if number > 1 else None),
+        page=number,
+        total=total,
+        next=_page_button('下一页 ›', page_url(number + 1) if number < total else None),
+        last=_page_button('末页 »', page_url(total) if number < total else None),
+    )
+
+
+def render_cloud(groups):
+    """标签云：字号随文章数线性变化"""
+    if not groups:
+        return ''
+    counts = [len(posts) for posts in groups.values()]
+    low, high = min(counts), max(counts)
+    links = []
+    for tag, posts in groups.items():
+        ratio = (len(posts) - low) / (high - low) if high > low else 0
+        size = CLOUD_MIN_SIZE + (CLOUD_MAX_SIZE - CLOUD_MIN_SIZE) * ratio
+        links.append(
+            f'      <a href="{html.escape(tag_url(tag))}" class="tag" style="font-size: {size:.2f}rem;">'
+            f'{html.escape(tag)} <sup>{len(posts)}</sup></a>'
+        )
+    return '\n'.join(links)
+
+
+def _list_page(title, description, header, items, pagination=''):
+    return load_template('list.html').render(
+        title=title,
+        description=description,
+        header=header,
+        items=items,
+        pagination=pagination,
+        **assets.page_values('list'),
+    )
+
+
+def _home_page(number, total, chunk, sticky):
+    items = render_items(chunk)
+    if sticky:
+        items = render_items(sticky, pinned=True) + '\n\n' + items
+    return _list_page(
+        '小草庐 | A Tiny House' if number == 1 else f'第 {number} 页 | 小草庐 | A Tiny House',
+        '小草庐的文章',
+        load_template('home_header.html').render(),
+        items,
+        render_pagination(number, total),
+    )
+
+
+def _tags_page(groups, cloud):
+    sections = [f'    <h3 id="{html.escape(tag_slug(tag))}">{html.escape(tag)}</h3>\n{render_items(tagged)}'
+                for tag, tagged in groups.items()]
+    return _list_page(
+        'Tags | 小草庐 | A Tiny House',
+        '按标签浏览小草庐的文章',
+        load_template('tags_header.html').render(heading='Tags', cloud=cloud),
+        '\n\n'.join(sections),
+    )
+
+
+def _tag_page(tag, tagged, cloud):
+    return _list_page(
+        f'{tag} | 小草庐 | A Tiny House',
+        f'小草庐标签为 {tag} 的文章',
+        load_template('tags_header.html').render(heading=f'标签：{tag}', cloud=cloud),
+        render_items(tagged),
+    )
+
+
+def _search_page():
+    return _list_page(
+        'Search | 小草庐 | A Tiny House',
+        '搜索小草庐的文章和动态',
+        load_template('search_header.html').render(),
+        '    <div class="search-results" data-search-results></div>',
+    )
+
+
+def plan_pages(summaries, per_page=10):
+    """所有列表页：{输出路径: (输入, 渲染函数)}
+
+    输入是决定这一页内容的全部数据，只含基本类型；模板和资源的变化由
+    write_pages() 的 version 参数负责。
+    """
+    posts = sort_posts(summaries)
+    sticky = [post for post in posts if post['sticky']]
+    # hidden 的文章不出现在按时间排列的首页里（置顶和标签页照常显示）
+    timeline = [post for post in posts if not post.get('hidden')]
+    groups = group_by_tag(posts)
+    cloud = render_cloud(groups)
+    pages = {}
+
+    total = max(1, -(-len(timeline) // per_page))
+    for number in range(1, total + 1):
+        chunk = timeline[(number - 1) * per_page:number * per_page]
+        pages[output_for(page_url(number))] = (
+            ['home', number, total, chunk, sticky],
+            partial(_home_page, number, total, chunk, sticky),
+        )
+
+    pages[output_for('/tags/')] = (['tags', cloud, groups], partial(_tags_page, groups, cloud))
+    pages[output_for('/search/')] = (['search'], _search_page)
+    for tag, tagged in groups.items():
+        pages[output_for(tag_url(tag))] = (['tag', tag, cloud, tagged], partial(_tag_page, tag, tagged, cloud))
+    return pages
+
+
+def write_pages(pages, previous, version='', out_dir='.'):
+    """渲染并写入有变化的列表页，删除上次生成、这次不再需要的页面
+
+    pages 是 plan_pages() 的结果，previous 是上次的 {输出路径: [输入哈希, 内容哈希]}，
+    version 是模板和资源的版本，页面写到 out_dir 下。输入和版本都没变的页面不渲染，
+    渲染后内容没变的页面不重写。返回 (这次的哈希表, 写入的路径, 删除的路径)，
+    路径都相对于 out_dir。
+    """
+    out_dir = Path(out_dir)
+    hashes = {}
+    written = []
+    for path, (inputs, render) in sorted(pages.items()):
+        key = path.as_posix()
+        target = out_dir / path
+        old = previous.get(key)
+        if not isinstance(old, list):
+            old = [None, None]
+        input_hash = hashlib.sha256(json.dumps([version, inputs], ensure_ascii=False).encode('utf-8')).hexdigest()
+        if old[0] == input_hash and target.exists():
+            hashes[key] = old
+            continue
+        data = minify_html(render()).encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        hashes[key] = [input_hash, digest]
+        if old[1] == digest and target.exists():
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(target.name + '.tmp')
+        tmp_path.write_bytes(data)
+        tmp_path.replace(target)
+        written.append(path)
+
+    removed = []
+    for key in sorted(set(previous) - set(hashes)):
+        target = out_dir / key
+        if target.exists():
+            target.unlink()
+            remove_siblings(target)
+            removed.append(Path(key))
+            try:
+                target.parent.rmdir()
+            except OSError:
+                pass
+    return hashes, written, removed
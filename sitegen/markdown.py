@@ -0,0 +1,315 @@
+"""
+单遍 Markdown 转换器
+
+块级元素（标题、引用、列表、代码块、分隔线、段落）逐行扫描一次完成；
+行内元素（代码、图片、链接、粗体、斜体）用一个预编译的组合正则一次匹配。
+所有片段追加到列表里，最后只 join 一次。
+
+和 kramdown 的主要差异：
+- 不支持缩进代码块（中文段落常用缩进，容易误判），只支持 ``` / ~~~ 围栏
+- 段落内的换行保留为 <br>，与原来的生成器一致
+- 原始 HTML 标签原样输出
+
+正则用到了占有量词，需要 Python 3.11+（版本检查在 sitegen/__init__.py）。
+"""
+import html
+import re
+
+_FENCE_RE = re.compile(r'^ {0,3}(`{3,}|~{3,})\s*([\w+#.-]*)')
+_HEADING_RE = re.compile(r'^ {0,3}(#{1,6})\s+(.*?)(?:\s+#+)?\s*$')
+_HR_RE = re.compile(r'^ {0,3}([-*_])(?:[ \t]*\1){2,}\s*$')
+_QUOTE_RE = re.compile(r'^ {0,3}> ?(.*)$')
+_LIST_RE = re.compile(r'^([ \t]*)([-*+]|\d{1,9}[.)])[ \t]+(.*)$')
+_HTML_BLOCK_RE = re.compile(r'^ {0,3}<(?:[a-zA-Z][\w-]*[\s/>]|/[a-zA-Z]|!--)')
+
+# 块级元素的首字符，首字符不在其中的行一定是段落，不必再逐个尝试块级正则
+_BLOCK_START_CHARS = frozenset('`~#>-*_+<0123456789')
+
+# 行内元素只可能从这些字符开始。先用字符集快速定位（sre 对字符集前缀有
+# 专门的快速扫描），再在该位置尝试组合正则，避免在每个位置逐个尝试所有分支
+_INLINE_START_RE = re.compile(r'[`<!\[*_:]')
+
+# 链接地址允许一层括号，例如 640%20(2).jpeg
+_URL = r'(?:[^()\s]|\([^()\s]*\))+'
+# 斜体内容里可以出现链接，链接地址中的 _ 和 * 不会提前结束斜体。
+# 占有量词（Python 3.11+）一路吃到下一个标记，失败时不回溯，保证线性时间
+_EM_BODY = r'(?:[^{mark}\n\[]++|\[[^\]\n]*\]\(' + _URL + r'\)|\[)*+'
+
+# 下划线强调要求两侧不是单词字符，避免把 snake_case 和 URL 里的 _ 当成斜体。
+_INLINE_RE = re.compile(r'''
+    (?P<code>(?P<ticks>`+)(?P<code_text>.+?)(?<!`)(?P=ticks)(?!`))
+  | (?P<tag><[a-zA-Z/!][^<>\n]*>)
+  | (?P<image>!\[(?P<img_alt>[^\]\n]*)\]\((?P<img_src>''' + _URL + r''')(?:[ \t]+"(?P<img_title>[^"\n]*)")?\))
+  | (?P<link>\[(?P<link_text>[^\]\n]+)\]\((?P<link_href>''' + _URL + r''')(?:[ \t]+"(?P<link_title>[^"\n]*)")?\))
+  | (?P<url>(?:(?<=http)|(?<=https))://[^\s<>()\[\]]+)
+  | (?P<strong>\*\*(?=\S)(?P<strong_star>.+?)(?<=\S)\*\*
+        | (?<!\w)__(?=\S)(?P<strong_under>.+?)(?<=\S)__(?!\w))
+  | (?P<em>\*(?P<em_star>[^\s*]''' + _EM_BODY.format(mark=r'*') + r''')(?<!\s)\*
+        | (?<!\w)_(?P<em_under>[^\s_]''' + _EM_BODY.format(mark='_') + r''')(?<!\s)_(?!\w))
+''', re.VERBOSE)
+
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_SLUG_STRIP_RE = re.compile(r'[^\w\s-]')
+_SLUG_SPACE_RE = re.compile(r'[\s-]+')
+
+
+def _attr(value):
+    return html.escape(value, quote=True)
+
+
+class Headings:
+    """转换过程中收集的标题，负责分配页面内唯一且稳定的锚点 id"""
+
+    def __init__(self):
+        self.items = []  # [(级别, id, 纯文本)]
+        self._used = {}
+
+    def add(self, level, inner_html):
+        text = html.unescape(_TAG_RE.sub('', inner_html)).strip()
+        slug = _SLUG_SPACE_RE.sub('-', _SLUG_STRIP_RE.sub('', text.lower())).strip('-') or 'section'
+
+        # 加上的序号可能和另一个标题本来的 id 相同（"A"、"A"、"A 1"），
+        # 所以生成的 id 也要登记，重复时继续往后找
+        base = slug
+        count = self._used.get(base, 0)
+        while slug in self._used:
+            count += 1
+            slug = f'{base}-{count}'
+        self._used[base] = count
+        self._used[slug] = 0
+
+        self.items.append((level, slug, text))
+        return slug
+
+
+def render_inline(text):
+    """转换行内元素"""
+    start = _INLINE_START_RE.search(text)
+    if start is None:
+        return text
+
+    parts = []
+    pos = 0
+    while start is not None:
+        m = _INLINE_RE.match(text, start.start())
+        if m is None:
+            start = _INLINE_START_RE.search(text, start.start() + 1)
+            continue
+
+        parts.append(text[pos:m.start()])
+        pos = m.end()
+        start = _INLINE_START_RE.search(text, pos)
+        kind = m.lastgroup
+
+        if kind == 'code':
+            parts.append(f"<code>{html.escape(m.group('code_text').strip(), quote=False)}</code>")
+        elif kind == 'image':
+            title = m.group('img_title')
+            title_attr = f' title="{_attr(title)}"' if title else ''
+            parts.append(f'<img src="{_attr(m.group("img_src"))}" alt="{_attr(m.group("img_alt"))}"{title_attr}>')
+        elif kind == 'link':
+            title = m.group('link_title')
+            title_attr = f' title="{_attr(title)}"' if title else ''
+            parts.append(f'<a href="{_attr(m.group("link_href"))}"{title_attr}>{render_inline(m.group("link_text"))}</a>')
+        elif kind == 'strong':
+            inner = m.group('strong_star') or m.group('strong_under')
+            parts.append(f'<strong>{render_inline(inner)}</strong>')
+        elif kind == 'em':
+            inner = m.group('em_star') or m.group('em_under')
+            parts.append(f'<em>{render_inline(inner)}</em>')
+        else:
+            # 原始 HTML 标签和裸 URL 原样保留
+            parts.append(m.group())
+
+    parts.append(text[pos:])
+    return ''.join(parts)
+
+
+def _convert_list(lines, i, out):
+    """从第 i 行开始解析列表，按缩进嵌套，返回列表之后的行号"""
+    parts = []
+    stack = []  # [(缩进, 'ul' / 'ol')]，每一层都有一个未闭合的 <li>
+    n = len(lines)
+
+    while i < n:
+        line = lines[i]
+        m = _LIST_RE.match(line)
+
+        if m and not _HR_RE.match(line):
+            indent = len(m.group(1).expandtabs(4))
+            marker = m.group(2)
+            tag = 'ol' if marker[0].isdigit() else 'ul'
+
+            if stack and indent > stack[-1][0] + 1:
+                stack.append((indent, tag))
+                parts.append(f'<{tag}>')
+            else:
+                while len(stack) > 1 and indent < stack[-1][0]:
+                    parts.append(f'</li></{stack.pop()[1]}>')
+                if stack:
+                    parts.append('</li>')
+                    if stack[-1][1] != tag:
+                        parts.append(f'</{stack[-1][1]}><{tag}>')
+                        stack[-1] = (stack[-1][0], tag)
+                else:
+                    stack.append((indent, tag))
+                    start = int(marker[:-1]) if tag == 'ol' else 1
+                    parts.append(f'<ol start="{start}">' if start != 1 else f'<{tag}>')
+
+            parts.append(f'<li>{render_inline(m.group(3).strip())}')
+            i += 1
+        elif line.strip() and line[:1] in ' \t':
+            # 缩进的续行属于当前列表项
+            parts.append(f'<br>{render_inline(line.strip())}')
+            i += 1
+        elif not line.strip():
+            # 空行之后如果还是列表项，就继续当前列表
+            j = i + 1
+            while j < n and not lines[j].strip():
+                j += 1
+            if j < n and _LIST_RE.match(lines[j]) and not _HR_RE.match(lines[j]):
+                i = j
+            else:
+                break
+        else:
+            break
+
+    while stack:
+        parts.append(f'</li></{stack.pop()[1]}>')
+    out.append(''.join(parts))
+    return i
+
+
+def _convert_blocks(lines, out, headings):
+    """逐行扫描块级元素，把生成的 HTML 块追加到 out"""
+    paragraph = []
+
+    def flush_paragraph():
+        if paragraph:
+            # 整段只做一次行内转换；行内正则不跨行匹配，换行最后统一换成 <br>
+            text = render_inline('\n'.join(paragraph))
+            out.append('<p>' + text.replace('\n', '<br>') + '</p>')
+            paragraph.clear()
+
+    i = 0
+    n = len(lines)
+    while i < n:
+        line = lines[i]
+        stripped = line.strip()
+
+        if not stripped:
+            flush_paragraph()
+            i += 1
+            continue
+
+        if stripped[0] not in _BLOCK_START_CHARS:
+            paragraph.append(stripped)
+            i += 1
+            continue
+
+        m = _FENCE_RE.match(line)
+        if m:
+            flush_paragraph()
+            fence, lang = m.group(1), m.group(2)
+            code = []
+            i += 1
+            while i < n and not lines[i].lstrip().startswith(fence):
+                code.append(lines[i])
+                i += 1
+            i += 1  # 跳过结束围栏
+            lang_attr = f' class="language-{_attr(lang)}"' if lang else ''
+            out.append(f'<pre><code{lang_attr}>' + html.escape('\n'.join(code), quote=False) + '</code></pre>')
+            continue
+
+        m = _HEADING_RE.match(line)
+        if m:
+            flush_paragraph()
+            level = len(m.group(1))
+            inner = render_inline(m.group(2))
+            slug = headings.add(level, inner)
+            out.append(f'<h{level} id="{_attr(slug)}">{inner}</h{level}>')
+            i += 1
+            continue
+
+        if _HR_RE.match(line):
+            flush_paragraph()
+            out.append('<hr>')
+            i += 1
+            continue
+
+        m = _QUOTE_RE.match(line)
+        if m:
+            flush_paragraph()
+            quoted = []
+            while i < n:
+                m = _QUOTE_RE.match(lines[i])
+                if not m:
+                    break
+                quoted.append(m.group(1))
+                i += 1
+            inner = []
+            _convert_blocks(quoted, inner, headings)
+            out.append('<blockquote>' + '\n'.join(inner) + '</blockquote>')
+            continue
+
+        if _LIST_RE.match(line):
+            flush_paragraph()
+            i = _convert_list(lines, i, out)
+            continue
+
+        if not paragraph and _HTML_BLOCK_RE.match(line):
+            # 原始 HTML 块原样保留，直到空行
+            block = []
+            while i < n and lines[i].strip():
+                block.append(lines[i])
+                i += 1
+            out.append('\n'.join(block))
+            continue
+
+        paragraph.append(stripped)
+        i += 1
+
+    flush_paragraph()
+
+
+def markdown_to_html(content, headings=None):
+    """把 Markdown 文本转换为 HTML
+
+    传入 Headings 时，文中所有标题按出现顺序记录在 headings.items 里，
+    可以直接用来生成目录。
+    """
+    out = []
+    _convert_blocks(content.splitlines(), out, headings if headings is not None else Headings())
+    return '\n\n'.join(out)
+
+
+def render_toc(headings):
+    """把收集到的标题生成嵌套的 <li> 列表，放进目录的 <ul> 里
+
+    每一项最多比上一项深一级，跳级的标题（如 h2 后直接 h4）挂在下一级。
+    """
+    parts = []
+    base = min((level for level, _, _ in headings.items), default=1)
+    depth = 0
+
+    for level, slug, text in headings.items:
+        if not parts:
+            target = 0
+        else:
+            target = min(level - base, depth + 1)
+            if target > depth:
+                parts.append('<ul>')
+            else:
+                parts.append('</li>')
+                while depth > target:
+                    parts.append('</ul></li>')
+                    depth -= 1
+        depth = target
+        slug_attr = _attr(slug)
+        parts.append(f'<li><a href="#{slug_attr}" data-target="{slug_attr}">{html.escape(text)}</a>')
+
+    if parts:
+        parts.append('</li>')
+        parts.append('</ul></li>' * depth)
+    return ''.join(parts)
@@ -0,0 +1,204 @@
+"""
+阶段耗时和计数器
+
+    with profiling.span('fetch', url=url):
+        ...
+    profiling.count('bytes_fetched', len(chunk))
+
+没有调用 enable() 时，span() 返回同一个空上下文，count() 直接返回，
+开销只是一次函数调用和一次判断，热路径里也可以放心使用。
+
+开启后记录每个 span 的开始时间、耗时、进程和线程，结束时调用 finish() 写出
+trace 文件并打印各阶段汇总：
+- jsonl：每行一个 span，最后一行是计数器
+- chrome：Chrome trace-event 格式，可以在 chrome://tracing 或 Perfetto 中打开
+
+还可以同时开启 cProfile（写出 .prof 文件）或 tracemalloc（打印分配最多的代码行）。
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+
+FORMATS = ('jsonl', 'chrome')
+CAPTURES = ('cprofile', 'tracemalloc')
+
+_NULL_SPAN = contextlib.nullcontext()
+_tracer = None
+
+
+class Tracer:
+    """收集 span 和计数器"""
+
+    def __init__(self, path, fmt='jsonl', capture=None):
+        self.path = path
+        self.format = fmt
+        self.capture = capture
+        self.events = []  # (名称, 开始 ns, 耗时 ns, pid, tid, 参数)
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._profiler = None
+
+    @contextlib.contextmanager
+    def span(self, name, args):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            event = (name, start, time.perf_counter_ns() - start, os.getpid(), threading.get_ident(), args)
+            with self._lock:
+                self.events.append(event)
+
+    def count(self, name, value):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def drain(self):
+        """取出并清空已记录的 span 和计数器（工作进程把它们交回主进程）"""
+        with self._lock:
+            events, counters = self.events, self.counters
+            self.events, self.counters = [], {}
+        return events, counters
+
+    def merge(self, drained):
+        events, counters = drained
+        with self._lock:
+            self.events.extend(events)
+            for name, value in counters.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def start_capture(self):
+        if self.capture == 'cprofile':
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.capture == 'tracemalloc':
+            import tracemalloc
+            tracemalloc.start()
+
+    def stop_capture(self):
+        if self.capture == 'cprofile' and self._profiler is not None:
+            self._profiler.disable()
+            prof_path = os.path.splitext(self.path)[0] + '.prof'
+            self._profiler.dump_stats(prof_path)
+            print(f"cProfile 结果: {prof_path}（可用 python -m pstats 或 snakeviz 查看）")
+        elif self.capture == 'tracemalloc':
+            import tracemalloc
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"内存峰值: {peak / 1024 / 1024:.1f} MB，分配最多的代码行:")
+            for stat in snapshot.statistics('lineno')[:10]:
+                print(f"  {stat}")
+
+    def write(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        base = min((event[1] for event in self.events), default=0)
+
+        with open(self.path, 'w', encoding='utf-8') as f:
+            if self.format == 'chrome':
+                trace = [{
+                    'name': name, 'ph': 'X', 'pid': pid, 'tid': tid,
+                    'ts': (start - base) / 1000, 'dur': duration / 1000, 'args': args,
+                } for name, start, duration, pid, tid, args in self.events]
+                end = max((event[1] + event[2] - base for event in self.events), default=0)
+                trace.append({
+                    'name': 'counters', 'ph': 'C', 'pid': os.getpid(), 'tid': 0,
+                    'ts': end / 1000, 'args': self.counters,
+                })
+                json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+            else:
+                for name, start, duration, pid, tid, args in self.events:
+                    f.write(json.dumps({
+                        'span': name, 'start_ms': (start - base) / 1e6, 'duration_ms': duration / 1e6,
+                        'pid': pid, 'tid': tid, 'args': args,
+                    }, ensure_ascii=False) + '\n')
+                f.write(json.dumps({'counters': self.counters}, ensure_ascii=False) + '\n')
+
+    def summary(self):
+        """按 span 名称汇总的耗时表"""
+        totals = {}
+        for name, _, duration, _, _, _ in self.events:
+            count, total = totals.get(name, (0, 0))
+            totals[name] = (count + 1, total + duration)
+
+        lines = ['阶段耗时:']
+        for name, (count, total) in sorted(totals.items(), key=lambda item: -item[1][1]):
+            lines.append(f"  {name:<16} {total / 1e6:10.1f} ms  {count:>6} 次")
+        if self.counters:
+            lines.append('计数器:')
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"  {name:<16} {value:>12}")
+        return '\n'.join(lines)
+
+
+def add_arguments(parser):
+    """给命令行加上 --profile、--profile-format、--profile-capture"""
+    parser.add_argument('--profile', metavar='PATH', nargs='?', const='.build/profile.jsonl',
+                        help='记录各阶段耗时和计数器并写出 trace（默认 .build/profile.jsonl）')
+    parser.add_argument('--profile-format', choices=FORMATS,
+                        help='trace 格式，默认按文件扩展名：.json 为 chrome，其余为 jsonl')
+    parser.add_argument('--profile-capture', choices=CAPTURES,
+                        help='同时用 cProfile 或 tracemalloc 采集（开销较大）')
+
+
+def enable_from_args(args):
+    """根据 add_arguments() 添加的参数开启记录，没有 --profile 时什么也不做"""
+    if args.profile:
+        fmt = args.profile_format or ('chrome' if args.profile.endswith('.json') else 'jsonl')
+        enable(args.profile, fmt, args.profile_capture)
+
+
+def enable(path, fmt='jsonl', capture=None):
+    global _tracer
+    _tracer = Tracer(path, fmt, capture)
+    _tracer.start_capture()
+    return _tracer
+
+
+def init_worker(on):
+    """ProcessPoolExecutor 的 initializer：工作进程里重新开始记录（或保持关闭）
+
+    fork 出来的进程会继承主进程已经记录的 span，这里清空，之后用 drain() 交回主进程。
+    """
+    global _tracer
+    _tracer = Tracer(None) if on else None
+
+
+def enabled():
+    return _tracer is not None
+
+
+def span(name, **args):
+    if _tracer is None:
+        return _NULL_SPAN
+    return _tracer.span(name, args)
+
+
+def count(name, value=1):
+    if _tracer is not None:
+        _tracer.count(name, value)
+
+
+def drain():
+    return _tracer.drain() if _tracer is not None else ([], {})
+
+
+def merge(drained):
+    if _tracer is not None:
+        _tracer.merge(drained)
+
+
+def finish():
+    """写出 trace 并打印汇总；没有开启时什么也不做"""
+    global _tracer
+    if _tracer is None:
+        return
+    tracer, _tracer = _tracer, None
+    tracer.stop_capture()
+    tracer.write()
+    print(tracer.summary())
+    print(f"trace 已写入: {tracer.path}")
@@ -0,0 +1,376 @@
+"""
+构建期全文搜索索引
+
+分词：中文（含日文假名）连续片段切成二元组（“静态站点” -> 静态 / 态站 / 站点），
+只有一个字的片段保留单字；英文和数字按单词切分并转为小写。
+
+倒排索引按词的首字符分片，写到 _output/assets/search/ 下（URL 是 /assets/search/）：
+- docs.json：文档列表和分片数，前端拿它显示结果、计算 idf
+- terms-XX.json：{词: [文档 id 增量, 词频, ...]}，XX 是首字符码位对分片数取模
+
+浏览器端（assets/js/search.js）用同样的规则分词，只下载查询词所在的分片。
+前端的分词规则必须和这里保持一致。
+
+索引由 SearchIndex 增量维护：文档 id 固定不变（删除的文档在 docs.json 里留下
+null，之后新增的文档复用），每篇文档的词频单独缓存在 .build/search/ 里，改动时
+只对比这篇文档前后的词频，只改写差异所在的分片；没有缓存时就是一次完整构建。
+"""
+import hashlib
+import html
+import json
+import os
+import re
+import shutil
+import unicodedata
+from collections import Counter
+from pathlib import Path
+
+import yaml
+
+INDEX_VERSION = 1
+SHARD_COUNT = 64
+# 标题里的词按多少次计入词频
+TITLE_WEIGHT = 3
+SNIPPET_LENGTH = 80
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+')
+_TAG_RE = re.compile(r'<[^>]+>')
+_SPACE_RE = re.compile(r'\s+')
+
+try:
+    _YAML_LOADER = yaml.CSafeLoader
+except AttributeError:
+    _YAML_LOADER = yaml.SafeLoader
+
+
+def tokenize(text):
+    """把文本切分成索引词，按出现顺序返回（可能重复）"""
+    terms = []
+    for m in _TOKEN_RE.finditer(unicodedata.normalize('NFKC', text).lower()):
+        run = m.group()
+        if run[0] < '\u3040':
+            # 英文单词只保留两个字母以上的，数字全部保留
+            if len(run) > 1 or run.isdigit():
+                terms.append(run)
+        elif len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+def plain_text(html_text):
+    """去掉标签、还原实体、合并空白"""
+    return _SPACE_RE.sub(' ', html.unescape(_TAG_RE.sub(' ', html_text))).strip()
+
+
+def shard_of(term):
+    return format(ord(term[0]) % SHARD_COUNT, '02x')
+
+
+def document(kind, title, url, date, text):
+    """生成一篇待索引的文档：显示用的元数据加上词频表
+
+    返回值只含基本类型，可以跨进程传递，也可以直接存进构建缓存。
+    """
+    terms = Counter(tokenize(text))
+    for term in tokenize(title):
+        terms[term] += TITLE_WEIGHT
+    return {
+        'kind': kind,
+        'title': title,
+        'url': url,
+        'date': str(date),
+        'snippet': text[:SNIPPET_LENGTH],
+        'terms': dict(terms),
+    }
+
+
+def doc_meta(doc):
+    """docs.json 里一篇文档的显示信息"""
+    return [doc['kind'], doc['title'], doc['url'], doc['date'], doc['snippet']]
+
+
+def doc_hash(doc):
+    return hashlib.sha256(_dump([doc_meta(doc), sorted(doc['terms'].items())]).encode('utf-8')).hexdigest()
+
+
+def thought_shards(data_dir):
+    """即刻动态的数据文件：_data/thoughts/ 下的按月分片，以及旧版 _data/thoughts.yml"""
+    data_dir = Path(data_dir)
+    paths = sorted((data_dir / 'thoughts').glob('*.yml'))
+    if (data_dir / 'thoughts.yml').exists():
+        paths.append(data_dir / 'thoughts.yml')
+    return paths
+
+
+def _thought_document(thought):
+    content = str(thought.get('content', ''))
+    if not content:
+        return None
+    title = thought.get('topic') or content[:30]
+    date = f"{thought.get('date', '')} {thought.get('time', '')}".strip()
+    return document('thought', title, thought.get('source_link', ''), date, content)
+
+
+def _encode_postings(postings):
+    """[(文档 id, 词频)]（按 id 递增）-> [id 增量, 词频, ...]，存与前一个的差值，数字更短"""
+    flat = []
+    last = 0
+    for doc_id, tf in postings:
+        flat.append(doc_id - last)
+        flat.append(tf)
+        last = doc_id
+    return flat
+
+
+def _decode_postings(flat):
+    """_encode_postings 的逆操作，返回 {文档 id: 词频}"""
+    postings = {}
+    doc_id = 0
+    for i in range(0, len(flat), 2):
+        doc_id += flat[i]
+        postings[doc_id] = flat[i + 1]
+    return postings
+
+
+def _dump(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def _replace(path, text):
+    tmp_path = path.with_suffix('.tmp')
+    tmp_path.write_text(text, encoding='utf-8')
+    tmp_path.replace(path)
+
+
+def _write_text(path, text):
+    """内容不同时才原子写入，返回是否写入"""
+    try:
+        if path.read_text(encoding='utf-8') == text:
+            return False
+    except FileNotFoundError:
+        pass
+    _replace(path, text)
+    return True
+
+
+def _docs_file(docs):
+    """docs.json 的内容；docs 里可以有 None（已删除文档留下的空位）"""
+    return {
+        'version': INDEX_VERSION,
+        'shards': SHARD_COUNT,
+        # 有空位时 docs 的长度不等于文档数，前端计算 idf 用 count
+        'count': sum(1 for d in docs if d is not None),
+        'docs': docs,
+    }
+
+
+class SearchIndex:
+    """增量维护的分片索引
+
+    缓存目录里的 index.json 记录每篇文档的 id、内容哈希和显示信息、现有的分片，
+    以及即刻动态数据文件的 mtime 和大小；terms/ 下每篇文档一个文件，保存它的词频。
+    缓存缺失或者输出目录里少了文件时，从空索引重新开始。
+    update() 只处理内容哈希变了的文档，按词频的差异改写分片。
+    """
+
+    VERSION = 2
+
+    def __init__(self, cache_dir, out_dir):
+        self.cache_dir = Path(cache_dir)
+        self.terms_dir = self.cache_dir / 'terms'
+        self.out_dir = Path(out_dir)
+        self.docs = {}      # 键 -> [id, 内容哈希, 显示信息]
+        self.sources = {}   # 即刻动态数据文件 -> {'stamp': [mtime, 大小], 'keys': [...]}
+        self.shards = set()
+        self.dirty = False
+        try:
+            with open(self.cache_dir / 'index.json', 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            expected = ['docs.json'] + [f'terms-{shard}.json' for shard in data['shards']]
+            if data.get('version') == self.VERSION and all((self.out_dir / name).exists() for name in expected):
+                self.docs = data['docs']
+                self.sources = data['sources']
+                self.shards = set(data['shards'])
+        except (OSError, ValueError, KeyError):
+            pass
+        # 没有可用的缓存时从空索引开始，不能沿用输出目录里的旧分片
+        self.fresh = not self.docs
+
+    def __contains__(self, key):
+        return key in self.docs
+
+    def __len__(self):
+        return len(self.docs)
+
+    def _terms_path(self, key):
+        return self.terms_dir / f'{hashlib.sha1(key.encode("utf-8")).hexdigest()}.json'
+
+    def _load_terms(self, key):
+        try:
+            with open(self._terms_path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def thought_documents(self, data_dir):
+        """即刻动态的文档，返回 ({键: 文档}, 全部键)
+
+        mtime 和大小都没变的数据文件不再读取，只沿用上次记下的键。
+        """
+        docs = {}
+        keys = set()
+        sources = {}
+        for path in thought_shards(data_dir):
+            name = path.as_posix()
+            stat = path.stat()
+            stamp = [stat.st_mtime_ns, stat.st_size]
+            source = self.sources.get(name)
+            if source is None or source['stamp'] != stamp:
+                with open(path, 'r', encoding='utf-8') as f:
+                    thoughts = yaml.load(f, Loader=_YAML_LOADER) or []
+                source = {'stamp': stamp, 'keys': []}
+                seen = set()
+                for i, thought in enumerate(thoughts):
+                    doc = _thought_document(thought)
+                    if doc is None:
+                        continue
+                    # 同一个链接可能对应多条动态（比如转发同一条），键里带上时间；
+                    # 连时间也相同时再加上在文件里的位置
+                    link = thought.get('source_link')
+                    key = f"thought:{link}#{doc['date']}" if link else f'thought:{name}#{i}'
+                    if key in seen:
+                        key = f'{key}#{i}'
+                    seen.add(key)
+                    docs[key] = doc
+                    source['keys'].append(key)
+            sources[name] = source
+            keys.update(source['keys'])
+        if sources != self.sources:
+            self.sources = sources
+            self.dirty = True
+        return docs, keys
+
+    def _allocate(self, used, free):
+        """新文档的 id：优先复用空位"""
+        if free:
+            return free.pop()
+        doc_id = len(used)
+        used.append(None)
+        return doc_id
+
+    def update(self, docs, keep):
+        """更新索引，返回改写的文件数
+
+        docs 是这次重新生成的 {键: 文档}，keep 是应当保留在索引里的全部键；
+        不在 keep 里的文档从索引中删除。
+        """
+        # changes: 分片 -> 词 -> {文档 id: 新词频，None 表示删除}
+        changes = {}
+        meta_changed = self.fresh
+        if self.fresh:
+            shutil.rmtree(self.terms_dir, ignore_errors=True)
+
+        def diff(doc_id, old_terms, new_terms):
+            for term in old_terms.keys() | new_terms.keys():
+                tf = new_terms.get(term)
+                if old_terms.get(term) != tf:
+                    changes.setdefault(shard_of(term), {}).setdefault(term, {})[doc_id] = tf
+
+        for key in [key for key in self.docs if key not in keep and key not in docs]:
+            doc_id = self.docs.pop(key)[0]
+            diff(doc_id, self._load_terms(key), {})
+            try:
+                self._terms_path(key).unlink()
+            except FileNotFoundError:
+                pass
+            meta_changed = True
+
+        # 已占用的 id 和空位（删除文档之后再算，同一次更新里就能复用）
+        used = [None] * (max((entry[0] for entry in self.docs.values()), default=-1) + 1)
+        for key, entry in self.docs.items():
+            used[entry[0]] = key
+        free = [doc_id for doc_id in range(len(used) - 1, -1, -1) if used[doc_id] is None]
+
+        for key, doc in docs.items():
+            digest = doc_hash(doc)
+            entry = self.docs.get(key)
+            if entry is not None and entry[1] == digest:
+                continue
+            meta = doc_meta(doc)
+            if entry is None:
+                doc_id = self._allocate(used, free)
+                used[doc_id] = key
+                old_terms = {}
+            else:
+                doc_id = entry[0]
+                old_terms = self._load_terms(key)
+            diff(doc_id, old_terms, doc['terms'])
+            if entry is None or entry[2] != meta:
+                meta_changed = True
+            self.docs[key] = [doc_id, digest, meta]
+            self.terms_dir.mkdir(parents=True, exist_ok=True)
+            self._terms_path(key).write_text(_dump(doc['terms']), encoding='utf-8')
+
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        written = 0
+        for shard, terms in changes.items():
+            path = self.out_dir / f'terms-{shard}.json'
+            encoded = {}
+            if not self.fresh:
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        encoded = json.load(f)
+                except FileNotFoundError:
+                    pass
+            for term, updates in terms.items():
+                postings = _decode_postings(encoded.get(term, []))
+                for doc_id, tf in updates.items():
+                    if tf is None:
+                        postings.pop(doc_id, None)
+                    else:
+                        postings[doc_id] = tf
+                if postings:
+                    encoded[term] = _encode_postings(sorted(postings.items()))
+                else:
+                    encoded.pop(term, None)
+            if encoded:
+                # 只有词频真的变了的分片才会走到这里，不必再和旧文件比较
+                _replace(path, _dump(dict(sorted(encoded.items()))))
+                self.shards.add(shard)
+                written += 1
+            elif path.exists():
+                path.unlink()
+                self.shards.discard(shard)
+                written += 1
+
+        if meta_changed:
+            slots = [None] * (max((entry[0] for entry in self.docs.values()), default=-1) + 1)
+            for doc_id, _, meta in self.docs.values():
+                slots[doc_id] = meta
+            written += _write_text(self.out_dir / 'docs.json', _dump(_docs_file(slots)))
+
+        if changes or meta_changed:
+            self.dirty = True
+        if self.fresh:
+            # 从空索引重建时清理旧的分片
+            for path in self.out_dir.glob('terms-*.json'):
+                if path.stem[len('terms-'):] not in changes:
+                    path.unlink()
+                    written += 1
+            self.fresh = False
+            self.dirty = True
+        return written
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.cache_dir / 'index.json'
+        tmp_path = path.with_suffix('.tmp')
+        data = {'version': self.VERSION, 'docs': self.docs, 'sources': self.sources, 'shards': sorted(self.shards)}
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(_dump(data))
+        os.replace(tmp_path, path)
+        self.dirty = False
@@ -0,0 +1,58 @@
+"""
+预编译页面模板
+
+模板文件放在 _templates/ 下，用 {{ name }} 标记插槽，默认做 HTML 转义，
+{{ name | raw }} 原样输出。模板只在第一次使用时切分成静态片段和插槽，
+之后每次渲染只是把片段和插槽值拼起来。
+"""
+import html
+import re
+from functools import lru_cache
+from pathlib import Path
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / '_templates'
+
+_SLOT_RE = re.compile(r'\{\{\s*(\w+)\s*(?:\|\s*(raw)\s*)?\}\}')
+
+
+class Template:
+    """切分好的模板：chunks 比 slots 多一个，渲染时交替输出"""
+
+    def __init__(self, source, name='<string>'):
+        self.name = name
+        self.chunks = []
+        self.slots = []  # [(插槽名, 是否转义)]
+
+        pos = 0
+        for m in _SLOT_RE.finditer(source):
+            self.chunks.append(source[pos:m.start()])
+            self.slots.append((m.group(1), m.group(2) is None))
+            pos = m.end()
+        self.chunks.append(source[pos:])
+
+    def _values(self, values):
+        """按插槽顺序取出并转义插槽值"""
+        result = []
+        for name, escape in self.slots:
+            try:
+                value = values[name]
+            except KeyError:
+                raise KeyError(f'模板 {self.name} 缺少插槽值: {name}') from None
+            value = '' if value is None else str(value)
+            result.append(html.escape(value) if escape else value)
+        return result
+
+    def render(self, **values):
+        """渲染为字符串"""
+        parts = [self.chunks[0]]
+        for value, chunk in zip(self._values(values), self.chunks[1:]):
+            parts.append(value)
+            parts.append(chunk)
+        return ''.join(parts)
+
+
+@lru_cache(maxsize=None)
+def load_template(name):
+    """读取并切分 _templates/<name>，每个进程只做一次"""
+    path = TEMPLATES_DIR / name
+    return Template(path.read_text(encoding='utf-8'), name=name)
@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# 和 benchmarks 一样直接从仓库根目录导入 sitegen、jike_sync
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
@@ -0,0 +1,87 @@
+from sitegen import assets
+from sitegen.assets import minify_css, minify_js
+
+
+def test_css_whitespace_and_comments_removed():
+    css = '/* 标题 */\nh1 ,  h2 {\n  color : red ;\n  margin: 0 auto;\n}\n'
+    assert minify_css(css) == 'h1,h2{color :red;margin:0 auto}'
+
+
+def test_css_keeps_descendant_pseudo_class_space():
+    assert minify_css('a :hover { color: red }') == 'a :hover{color:red}'
+
+
+def test_css_strings_preserved():
+    css = 'a::before { content: "  {x ; y}  "; font-family: \'Noto  Sans\' , serif; }'
+    assert minify_css(css) == 'a::before{content:"  {x ; y}  ";font-family:\'Noto  Sans\',serif}'
+
+
+def test_css_comment_markers_inside_strings_preserved():
+    css = 'a::after { content: "/* 不是注释 */"; } /* 注释 */ b { color: red }'
+    assert minify_css(css) == 'a::after{content:"/* 不是注释 */"}b{color:red}'
+
+
+def test_css_quotes_inside_comments_ignored():
+    css = "/* don't */ a { content: \"x\" } /* it's */ b { color: red }"
+    assert minify_css(css) == 'a{content:"x"}b{color:red}'
+
+
+def test_css_escaped_quotes_and_urls():
+    css = 'a { content: "say \\"hi\\"  now"; background: url("a  b.png") }'
+    assert minify_css(css) == 'a{content:"say \\"hi\\"  now";background:url("a  b.png")}'
+
+
+def test_js_comments_and_indentation_removed():
+    js = '// 开头\nfunction f() {\n    /* 块注释 */\n\n    return 1;  // 行尾\n}\n'
+    assert minify_js(js) == 'function f() {\nreturn 1;\n}'
+
+
+def test_js_strings_preserved():
+    js = 'var a = "http://example.com";\nvar b = \'/* x */\';\nvar c = `  // ${d}  `;'
+    assert minify_js(js) == js
+
+
+def test_js_escaped_quotes_in_strings():
+    js = 'var a = "say \\"// hi\\"";  // 注释'
+    assert minify_js(js) == 'var a = "say \\"// hi\\"";'
+
+
+def test_js_regex_literals_preserved():
+    js = ('var a = /\\/\\/+/g;\n'
+          'var b = s.replace(/[/*]/g, "");\n'
+          'if (/\\/*x/.test(s)) {}\n'
+          'var c = [/a\\/b/, /c/];')
+    assert minify_js(js) == js
+
+
+def test_js_regex_after_keyword():
+    js = 'function f(s) {\nreturn /[//]x/.test(s);\n}'
+    assert minify_js(js) == js
+
+
+def test_js_division_is_not_a_regex():
+    assert minify_js('var x = a / b; // 平均\nvar y = (c) / 2 / d;') == 'var x = a / b;\nvar y = (c) / 2 / d;'
+    assert minify_js('var z = obj.return / 2; // 属性名') == 'var z = obj.return / 2;'
+
+
+def test_critical_css_keeps_only_matching_rules():
+    css = assets.minify_css('''
+        :root { --c: red }
+        .nav a { color: red }
+        .pagination { margin: 0 }
+        @media (max-width: 600px) { .nav { padding: 0 } .toc { display: none } }
+        @font-face { font-family: x }
+    ''')
+    tags, names = assets.markup_tokens('<nav class="nav"><a href="/">首页</a></nav>')
+    assert assets.critical_css(css, tags, names) == (
+        ':root{--c:red}.nav a{color:red}@media (max-width:600px){.nav{padding:0}}@font-face{font-family:x}')
+
+
+def test_post_critical_css_stops_at_the_fold():
+    markup = assets.above_the_fold('post.html', assets.ABOVE_THE_FOLD['post'][0][1])
+    assert 'class="post-title"' in markup
+    # 目录和页脚在首屏之后，样式留给完整样式表
+    assert 'table-of-contents' not in markup
+    critical = assets.bundle()['critical']['post']
+    assert '.post-title' in critical
+    assert '.table-of-contents' not in critical
@@ -0,0 +1,58 @@
+import os
+
+from sitegen.devserver import Watcher
+
+
+def touch(path, text='x'):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding='utf-8')
+
+
+def test_poll_reports_changed_and_removed(tmp_path):
+    touch(tmp_path / 'a.md')
+    touch(tmp_path / 'b.md')
+    watcher = Watcher([tmp_path])
+    assert watcher.poll() == (set(), set())
+
+    touch(tmp_path / 'a.md', 'changed')
+    (tmp_path / 'b.md').unlink()
+    touch(tmp_path / 'c.md')
+    changed, removed = watcher.poll()
+    assert changed == {str(tmp_path / 'a.md'), str(tmp_path / 'c.md')}
+    assert removed == {str(tmp_path / 'b.md')}
+
+
+def test_ignore_accepts_relative_paths(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    touch(tmp_path / 'assets' / 'css' / 'main.css')
+    touch(tmp_path / 'assets' / 'build' / 'main.123.css')
+    # 调用方传入绝对路径的根目录和相对路径的忽略目录
+    watcher = Watcher([tmp_path / 'assets'], ignore=[os.path.join('assets', 'build')])
+    assert set(watcher.scan()) == {str(tmp_path / 'assets' / 'css' / 'main.css')}
+
+    touch(tmp_path / 'assets' / 'build' / 'main.456.css')
+    assert watcher.poll() == (set(), set())
+
+
+def test_ignore_accepts_absolute_paths_for_relative_roots(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    touch(tmp_path / 'site' / 'index.html')
+    touch(tmp_path / 'site' / 'build' / 'out.html')
+    watcher = Watcher(['site'], ignore=[tmp_path / 'site' / 'build'])
+    assert set(watcher.scan()) == {os.path.join('site', 'index.html')}
+
+
+def test_ignore_resolves_symlinks(tmp_path):
+    touch(tmp_path / 'real' / 'build' / 'out.html')
+    touch(tmp_path / 'real' / 'page.md')
+    os.symlink(tmp_path / 'real', tmp_path / 'link')
+    watcher = Watcher([tmp_path / 'link'], ignore=[tmp_path / 'real' / 'build'])
+    assert set(watcher.scan()) == {str(tmp_path / 'link' / 'page.md')}
+
+
+def test_hidden_entries_are_skipped(tmp_path):
+    touch(tmp_path / '.build' / 'manifest.json')
+    touch(tmp_path / '.swp')
+    touch(tmp_path / 'post.md')
+    watcher = Watcher([tmp_path])
+    assert set(watcher.scan()) == {str(tmp_path / 'post.md')}
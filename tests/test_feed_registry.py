@@ -0,0 +1,23 @@
+import pytest
+
+from jike_sync.feeds import RESERVED_STREAMS, Feed, load_feeds
+
+
+def test_load_feeds(tmp_path):
+    path = tmp_path / 'feeds.yml'
+    path.write_text('- name: jike\n  route: /jike/user/abc\n- name: blog\n  url: https://example.com/rss\n  stream: blog\n',
+                    encoding='utf-8')
+    feeds = load_feeds(path)
+    assert [(feed.name, feed.stream) for feed in feeds] == [('jike', 'thoughts'), ('blog', 'blog')]
+
+
+@pytest.mark.parametrize('stream', sorted(RESERVED_STREAMS))
+def test_reserved_streams_are_rejected(stream):
+    with pytest.raises(ValueError, match='stream'):
+        Feed('jike', route='/jike/user/abc', stream=stream)
+
+
+@pytest.mark.parametrize('stream', ['Thoughts', '../build', ''])
+def test_invalid_stream_names_are_rejected(stream):
+    with pytest.raises(ValueError):
+        Feed('jike', route='/jike/user/abc', stream=stream)
@@ -0,0 +1,110 @@
+import datetime
+import json
+
+import pytest
+
+from sitegen import feeds
+
+TZ = datetime.timezone(datetime.timedelta(hours=8))
+SITE = {'url': 'https://example.com/', 'title': '小草庐', 'description': '描述', 'author': '作者'}
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def post(number, source_hash='h1', title=None, loads=None):
+    summary = {
+        'title': title or f'文章 {number}',
+        'date': f'2024-01-{number:02d}',
+        'tags': ['读书'],
+        'excerpt': f'摘录 {number}',
+        'url': f'/2024/01/{number:02d}/post-{number}.html',
+    }
+
+    def load_content():
+        if loads is not None:
+            loads.append(number)
+        return f'<p>正文 {number}</p>'
+
+    return feeds.post_entry(summary['url'], summary, source_hash, SITE['url'], TZ, load_content)
+
+
+def thought(content, site_url=SITE['url'], date='2024-01-05'):
+    return feeds.thought_entry({'date': date, 'time': '10:00', 'content': content}, site_url, TZ)
+
+
+def build(site, posts, thoughts=()):
+    return feeds.write_feeds({'posts': posts, 'thoughts': list(thoughts)}, SITE, site / '.build' / 'feeds.json',
+                             site / '_output')
+
+
+def test_first_build_writes_every_feed(site):
+    written, serialized = build(site, [post(2), post(1)], [thought('你好')])
+    assert written == len(feeds.feed_paths())
+    assert serialized == 3
+    for path in feeds.feed_paths(site / '_output'):
+        assert path.exists()
+        assert feeds.etag_path(path).exists()
+    # 源码树里不留 feed
+    assert not (site / 'feed.xml').exists()
+    data = json.loads((site / '_output' / 'feed.json').read_text(encoding='utf-8'))
+    assert [item['title'] for item in data['items']] == ['文章 2', '文章 1']
+
+
+def test_unchanged_entries_are_not_serialized_again(site):
+    build(site, [post(2), post(1)], [thought('你好')])
+    loads = []
+    written, serialized = build(site, [post(2, loads=loads), post(1, loads=loads)], [thought('你好')])
+    assert (written, serialized) == (0, 0)
+    assert loads == []
+
+
+def test_changed_source_hash_invalidates_one_entry(site):
+    build(site, [post(2), post(1)])
+    loads = []
+    written, serialized = build(site, [post(2, 'h2', title='新标题', loads=loads), post(1, loads=loads)])
+    assert serialized == 1
+    assert loads == [2]
+    # 只有文章的四个 feed 变了
+    assert written == 4
+    assert '新标题' in (site / '_output' / 'feed.xml').read_text(encoding='utf-8')
+
+
+def test_new_entry_serializes_only_itself(site):
+    build(site, [post(1)])
+    written, serialized = build(site, [post(2), post(1)])
+    assert serialized == 1
+    assert written == 4
+
+
+def test_site_url_change_invalidates_thoughts(site):
+    build(site, [], [thought('你好')])
+    written, serialized = build(site, [], [thought('你好', site_url='https://new.example.com/')])
+    assert serialized == 1
+
+
+def test_cache_version_change_invalidates_everything(site):
+    build(site, [post(1)], [thought('你好')])
+    cache_path = site / '.build' / 'feeds.json'
+    cache = json.loads(cache_path.read_text(encoding='utf-8'))
+    cache['version'] = feeds.CACHE_VERSION - 1
+    cache_path.write_text(json.dumps(cache), encoding='utf-8')
+    _, serialized = build(site, [post(1)], [thought('你好')])
+    assert serialized == 2
+
+
+def test_removed_entries_leave_the_cache(site):
+    build(site, [post(2), post(1)])
+    build(site, [post(2)])
+    cache = json.loads((site / '.build' / 'feeds.json').read_text(encoding='utf-8'))
+    assert list(cache['entries']) == [post(2)['key']]
+
+
+def test_entry_without_date_uses_feed_updated(site):
+    build(site, [], [thought('有日期'), thought('没有日期', date='不是日期')])
+    atom = (site / '_output' / 'feeds' / 'thoughts.xml').read_text(encoding='utf-8')
+    assert feeds.UPDATED_MARKER not in atom
+    assert atom.count('<updated>2024-01-05T10:00:00+08:00</updated>') == 3
@@ -0,0 +1,87 @@
+import threading
+import time
+
+from jike_sync.fetcher import race_mirrors
+
+
+class FakeMirrors:
+    """按镜像名返回预设的结果：('ok', 延迟秒数)、('fail', 延迟秒数) 或 ('block', None)
+
+    block 的镜像一直等到 release() 才返回，模拟胜出之后才响应的慢镜像。
+    """
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.calls = []
+        self.discarded = []
+        self.gate = threading.Event()
+        self.done = threading.Event()
+
+    def fetch(self, instance):
+        self.calls.append(instance)
+        action, delay = self.plan[instance]
+        if action == 'block':
+            self.gate.wait(5)
+            return f'{instance} 的响应'
+        time.sleep(delay)
+        if action == 'fail':
+            raise OSError(f'{instance} 连接失败')
+        return f'{instance} 的响应'
+
+    def discard(self, result):
+        self.discarded.append(result)
+        self.done.set()
+
+    def release(self):
+        self.gate.set()
+
+
+def race(mirrors, instances, health, **kwargs):
+    kwargs.setdefault('initial', 2)
+    kwargs.setdefault('hedge_delay', 5)
+    return race_mirrors(instances, mirrors.fetch, health, discard=mirrors.discard, **kwargs)
+
+
+def test_first_successful_mirror_wins():
+    mirrors = FakeMirrors({'a': ('fail', 0), 'b': ('ok', 0.05), 'c': ('ok', 0.5)})
+    health = {}
+    assert race(mirrors, ['a', 'b', 'c'], health) == ('b', 'b 的响应')
+    # a 失败后补上了 c，c 在胜出之后才返回，响应被释放
+    assert sorted(mirrors.calls) == ['a', 'b', 'c']
+    assert health['a']['consecutive_failures'] == 1
+    assert health['b']['successes'] == 1
+    assert mirrors.done.wait(5)
+    assert mirrors.discarded == ['c 的响应']
+
+
+def test_hedge_delay_starts_another_mirror():
+    mirrors = FakeMirrors({'a': ('block', None), 'b': ('ok', 0)})
+    health = {}
+    # a 迟迟没有结果，不必等它失败就开始请求 b
+    assert race(mirrors, ['a', 'b'], health, initial=1, hedge_delay=0.05) == ('b', 'b 的响应')
+    assert mirrors.calls == ['a', 'b']
+    mirrors.release()
+    assert mirrors.done.wait(5)
+
+
+def test_all_mirrors_failing_returns_nothing():
+    mirrors = FakeMirrors({'a': ('fail', 0), 'b': ('fail', 0), 'c': ('fail', 0)})
+    health = {}
+    assert race(mirrors, ['a', 'b', 'c'], health) == (None, None)
+    assert sorted(mirrors.calls) == ['a', 'b', 'c']
+    assert all(health[name]['consecutive_failures'] == 1 for name in 'abc')
+    assert mirrors.discarded == []
+
+
+def test_losing_mirror_is_discarded_and_recorded():
+    mirrors = FakeMirrors({'a': ('block', None), 'b': ('ok', 0.05)})
+    health = {}
+    assert race(mirrors, ['a', 'b'], health) == ('b', 'b 的响应')
+    # a 比胜出者等得更久，按超时记一次失败
+    assert health['a']['consecutive_failures'] == 1
+    assert health['b']['consecutive_failures'] == 0
+
+    # 胜出之后才返回的响应交给 discard 释放
+    mirrors.release()
+    assert mirrors.done.wait(5)
+    assert mirrors.discarded == ['a 的响应']
@@ -0,0 +1,20 @@
+from sitegen import fonts
+
+
+def test_missing_sources_leave_existing_output(tmp_path, monkeypatch):
+    output = tmp_path / 'fonts'
+    output.mkdir()
+    existing = output / 'noto-sans-sc-400.0123456789.woff2'
+    existing.write_bytes(b'font')
+    state = tmp_path / 'fonts.json'
+    state.write_text('{"faces": [{"weight": 400, "file": "noto-sans-sc-400.0123456789.woff2"}]}', encoding='utf-8')
+    monkeypatch.setattr(fonts, 'FONTS_DIR', tmp_path / 'no-sources')
+    monkeypatch.setattr(fonts, 'FONTS_OUTPUT_DIR', output)
+    monkeypatch.setattr(fonts, 'STATE_PATH', state)
+
+    assert fonts.build_fonts() == (None, 0)
+    assert existing.read_bytes() == b'font'
+    # 页面退回 Google Fonts
+    assert not state.exists()
+    assert fonts.head_html() == fonts.GOOGLE_FONTS_HTML
+    fonts.head_html.cache_clear()
@@ -0,0 +1,89 @@
+import datetime
+
+import pytest
+import yaml
+
+from sitegen import frontmatter
+from sitegen.frontmatter import FrontMatterError, MetadataCache, read_front_matter, split_front_matter
+
+# 快速路径能处理的写法，结果必须和 YAML 一致
+FAST_CASES = [
+    'title: 你好，世界\ndate: 2024-06-01\n',
+    'layout: post\ncomments: true\nsticky: False\nhidden: ~\norder: 3\nold_bool: yes\n',
+    "title: 'C++: 入门'\nsubtitle: \"Part 1\"\n",
+    'empty:\nurl: https://example.com/a_b\n',
+    '# 注释\n\ntitle: x  \nplus: +7\n',
+    'tag_list: python, go\nratio: 1/2\n',
+]
+# 快速路径必须交给 YAML 的写法
+SLOW_CASES = [
+    'tags: [读书, 生活]\n',
+    'tags:\n  - 读书\n  - 生活\n',
+    'title: "带\\"转义\\""\n',
+    'summary: >\n  多行\n  文本\n',
+    'neg: -12\n',
+    'version: 1.0\n',
+    'title: x # 注释\n',
+    'date: 2024-06-01 10:30:00\n',
+    'big: 0x1F\n',
+]
+
+
+@pytest.mark.parametrize('text', FAST_CASES)
+def test_fast_path_matches_yaml(text):
+    data = frontmatter._fast_load(text)
+    assert data is not None
+    assert data == yaml.safe_load(text)
+    assert [type(v) for v in data.values()] == [type(v) for v in yaml.safe_load(text).values()]
+
+
+@pytest.mark.parametrize('text', SLOW_CASES)
+def test_fast_path_defers_to_yaml(text):
+    assert frontmatter._fast_load(text) is None
+    assert frontmatter._load_yaml(text, 'post.md', 2) == yaml.safe_load(text)
+
+
+def test_split_front_matter_keeps_body_rules():
+    meta, body = split_front_matter('---\ntitle: x\n---\n正文\n\n---\n\n更多\n')
+    assert meta == {'title': 'x'}
+    assert body == '正文\n\n---\n\n更多'
+
+
+def test_errors_report_file_and_line():
+    with pytest.raises(FrontMatterError) as info:
+        split_front_matter('---\ntitle: x\ntags: [a\n---\n', 'post.md')
+    assert info.value.path == 'post.md'
+    assert info.value.line is not None
+    with pytest.raises(FrontMatterError):
+        split_front_matter('---\ntitle: x\n', 'post.md')
+
+
+def test_read_front_matter_longer_than_first_read(tmp_path):
+    post = tmp_path / 'post.md'
+    long_value = '长' * frontmatter.HEAD_BYTES
+    post.write_text(f'---\ntitle: {long_value}\n...\n正文\n', encoding='utf-8')
+    assert read_front_matter(post) == {'title': long_value}
+
+
+def test_cache_round_trips_dates(tmp_path):
+    post = tmp_path / 'post.md'
+    post.write_text('---\ndate: 2024-06-01\nupdated: 2024-06-02 10:30:00\n---\n', encoding='utf-8')
+    cache = MetadataCache(tmp_path / 'cache.json')
+    first = cache.get(post)
+    cache.save()
+    again = MetadataCache(tmp_path / 'cache.json').get(post)
+    assert again == first
+    assert again['date'] == datetime.date(2024, 6, 1)
+
+
+def test_values_json_cannot_hold_are_not_cached(tmp_path):
+    post = tmp_path / 'post.md'
+    post.write_text('---\ntitle: x\nkeywords: !!set {a, b}\n1: 数字键\n---\n', encoding='utf-8')
+    cache = MetadataCache(tmp_path / 'cache.json')
+    meta = cache.get(post)
+    assert meta['keywords'] == {'a', 'b'}
+    # 不进缓存，保存不会失败，下次重新解析得到同样的结果
+    cache.save()
+    again = MetadataCache(tmp_path / 'cache.json')
+    assert again.entries == {}
+    assert again.get(post) == meta
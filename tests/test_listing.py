@@ -0,0 +1,119 @@
+from pathlib import Path
+
+import pytest
+
+from sitegen import listing
+
+
+def summary(number, tags=(), **extra):
+    post = {
+        'title': f'文章 {number}',
+        'date': f'2024-01-{number:02d}',
+        'formatted_date': f'2024 年 1 月 {number} 日',
+        'tags': list(tags),
+        'sticky': False,
+        'hidden': False,
+        'excerpt': f'摘录 {number}',
+        'url': f'/2024/01/{number:02d}/post-{number}.html',
+    }
+    post.update(extra)
+    return post
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    # 列表页默认写到当前目录
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def build(summaries, previous, version='v1', out_dir='.'):
+    return listing.write_pages(listing.plan_pages(summaries, per_page=2), previous, version, out_dir)
+
+
+def test_page_urls_do_not_collide_with_sources():
+    assert listing.output_for(listing.page_url(1)) == Path('index.html')
+    assert listing.output_for(listing.page_url(3)) == Path('page3') / 'index.html'
+    assert listing.output_for(listing.tag_url('Python')) == Path('tags') / 'python' / 'index.html'
+
+
+def test_write_pages_adds_pages(site):
+    summaries = [summary(1, ['读书']), summary(2, ['读书', '生活']), summary(3)]
+    hashes, written, removed = build(summaries, {})
+    paths = {path.as_posix() for path in written}
+    assert paths == {'index.html', 'page2/index.html', 'tags/index.html', 'search/index.html',
+                     'tags/读书/index.html', 'tags/生活/index.html'}
+    assert set(hashes) == paths
+    assert removed == []
+    assert '文章 3' in (site / 'index.html').read_text(encoding='utf-8')
+    assert '文章 1' in (site / 'page2' / 'index.html').read_text(encoding='utf-8')
+
+
+def test_unchanged_inputs_are_not_rendered(site, monkeypatch):
+    summaries = [summary(1, ['读书']), summary(2)]
+    hashes, _, _ = build(summaries, {})
+
+    def fail(*args, **kwargs):
+        raise AssertionError('不应该重新渲染')
+
+    monkeypatch.setattr(listing, 'minify_html', fail)
+    again, written, removed = build(summaries, hashes)
+    assert again == hashes
+    assert written == [] and removed == []
+
+
+def test_changed_post_rewrites_only_its_pages(site):
+    summaries = [summary(1, ['读书']), summary(2, ['生活']), summary(3, ['生活'])]
+    hashes, _, _ = build(summaries, {})
+    untouched = (site / 'tags' / '生活' / 'index.html').stat().st_mtime_ns
+
+    summaries[0] = summary(1, ['读书'], title='改过的标题')
+    _, written, _ = build(summaries, hashes)
+    assert {path.as_posix() for path in written} == {'page2/index.html', 'tags/index.html', 'tags/读书/index.html'}
+    assert (site / 'tags' / '生活' / 'index.html').stat().st_mtime_ns == untouched
+    assert '改过的标题' in (site / 'tags' / '读书' / 'index.html').read_text(encoding='utf-8')
+
+
+def test_version_change_rerenders_but_skips_identical_output(site):
+    summaries = [summary(1)]
+    hashes, _, _ = build(summaries, {})
+    again, written, _ = build(summaries, hashes, version='v2')
+    # 输入哈希变了，渲染结果一样，文件不重写
+    assert written == []
+    assert again['index.html'][0] != hashes['index.html'][0]
+    assert again['index.html'][1] == hashes['index.html'][1]
+
+
+def test_write_pages_removes_stale_pages(site):
+    summaries = [summary(1, ['读书']), summary(2, ['生活']), summary(3)]
+    hashes, _, _ = build(summaries, {})
+    (site / 'tags' / '读书' / 'index.html.gz').write_bytes(b'')
+
+    hashes, _, removed = build(summaries[1:], hashes)
+    assert {path.as_posix() for path in removed} == {'page2/index.html', 'tags/读书/index.html'}
+    assert not (site / 'page2').exists()
+    assert not (site / 'tags' / '读书').exists()
+    assert (site / 'tags' / '生活' / 'index.html').exists()
+    assert set(hashes) == {'index.html', 'tags/index.html', 'search/index.html', 'tags/生活/index.html'}
+
+
+def test_missing_output_is_rewritten(site):
+    summaries = [summary(1)]
+    hashes, _, _ = build(summaries, {})
+    (site / 'index.html').unlink()
+    _, written, _ = build(summaries, hashes)
+    assert written == [Path('index.html')]
+    assert (site / 'index.html').exists()
+
+
+def test_pages_are_written_under_out_dir(site):
+    hashes, written, _ = build([summary(1, ['读书'])], {}, out_dir='_output')
+    # 返回的路径和哈希表的键都相对于输出目录
+    assert Path('index.html') in written
+    assert (site / '_output' / 'index.html').exists()
+    assert (site / '_output' / 'search' / 'index.html').exists()
+    assert not (site / 'index.html').exists()
+
+    _, _, removed = build([summary(1)], hashes, out_dir='_output')
+    assert removed == [Path('tags') / '读书' / 'index.html']
+    assert not (site / '_output' / 'tags' / '读书').exists()
@@ -0,0 +1,59 @@
+import pytest
+
+from sitegen.markdown import Headings, markdown_to_html
+
+# (Markdown, 期望的 HTML)
+GOLDEN = {
+    'underscores_inside_words': (
+        'call some_function_name and my_var_here, but _this_ is em and __bold__ too.',
+        '<p>call some_function_name and my_var_here, but <em>this</em> is em and <strong>bold</strong> too.</p>',
+    ),
+    'underscores_in_urls': (
+        'https://example.com/a_b_c and *star_em*',
+        '<p>https://example.com/a_b_c and <em>star_em</em></p>',
+    ),
+    'nested_lists': (
+        '- one\n- two\n  - two a\n  - two b\n    1. deep\n- three\n',
+        '<ul><li>one</li><li>two<ul><li>two a</li><li>two b<ol><li>deep</li></ol></li></ul></li>'
+        '<li>three</li></ul>',
+    ),
+    'fence_keeps_content': (
+        '```python\nif a < b and c_d_e:\n    print("*not em*")\n```\n\nafter',
+        '<pre><code class="language-python">if a &lt; b and c_d_e:\n    print("*not em*")</code></pre>\n\n'
+        '<p>after</p>',
+    ),
+    'tilde_fence': (
+        '~~~\n# not heading\n~~~',
+        '<pre><code># not heading</code></pre>',
+    ),
+    'links_with_parentheses': (
+        'see [图片](https://example.com/640%20(2).jpeg) and ![alt](a_(1).png "t")',
+        '<p>see <a href="https://example.com/640%20(2).jpeg">图片</a> and '
+        '<img src="a_(1).png" alt="alt" title="t"></p>',
+    ),
+    'em_around_link': (
+        '_see [a_b](https://example.com/x_y)_',
+        '<p><em>see <a href="https://example.com/x_y">a_b</a></em></p>',
+    ),
+}
+
+
+@pytest.mark.parametrize('name', sorted(GOLDEN))
+def test_golden(name):
+    source, expected = GOLDEN[name]
+    assert markdown_to_html(source) == expected
+
+
+def heading_ids(source):
+    headings = Headings()
+    markdown_to_html(source, headings)
+    return [slug for _, slug, _ in headings.items]
+
+
+def test_repeated_headings_get_numbered_ids():
+    assert heading_ids('# Intro\n\n## Intro\n\n### Intro\n\n## 中文 标题!\n') == ['intro', 'intro-1', 'intro-2', '中文-标题']
+
+
+def test_numbered_id_does_not_collide_with_a_real_heading():
+    assert heading_ids('## A\n\n## A\n\n## A 1\n') == ['a', 'a-1', 'a-1-1']
+    assert heading_ids('## A 1\n\n## A\n\n## A\n') == ['a-1', 'a', 'a-2']
@@ -0,0 +1,65 @@
+import http.client
+
+import pytest
+
+from jike_sync import config, runner
+from jike_sync.feeds import Feed
+from jike_sync.session import Session
+from jike_sync.store import ThoughtStore
+
+FEED_URL = 'https://rss.example.com/feed.xml'
+
+
+def rss_item(day):
+    return (f'<item><title>动态 {day}</title><description>动态 {day}</description>'
+            f'<pubDate>Mon, {day:02d} Jun 2024 10:30:00 +0800</pubDate></item>')
+
+
+class TruncatedResponse:
+    """读完给定的数据块后像断开的连接一样抛出 IncompleteRead"""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.closed = False
+
+    def read(self, size=-1):
+        if self.chunks:
+            return self.chunks.pop(0)
+        raise http.client.IncompleteRead(b'', 1024)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def session(tmp_path):
+    with Session(config.Paths(str(tmp_path))) as session:
+        yield session
+
+
+def fake_open_feed(first_chunk, rest):
+    def open_feed(pool, url, cache_entry, timeout=15, limiter=None):
+        return 'ok', ({'etag': '"v1"', 'last_modified': None}, TruncatedResponse(rest), first_chunk)
+    return open_feed
+
+
+def test_truncated_stream_keeps_parsed_items(session, monkeypatch):
+    head = '<?xml version="1.0"?><rss><channel>' + rss_item(2) + rss_item(1)
+    monkeypatch.setattr(runner, 'open_feed', fake_open_feed(head.encode('utf-8'), [b'<item><title>']))
+
+    result = runner.sync(Feed('test', url=FEED_URL), session)
+    assert result['status'] == runner.OK
+    assert result['parsed'] == 2
+    assert result['added'] == 2
+    store = ThoughtStore(session.paths.shard_dir('thoughts'))
+    assert store.contains({'date': '2024-06-01', 'time': '10:30', 'content': '动态 1'})
+    # 没读完的 feed 不记录 ETag，下次重新获取
+    assert session.cache_entry(FEED_URL) == {}
+
+
+def test_stream_cut_before_first_item_fails(session, monkeypatch):
+    head = b'<?xml version="1.0"?><rss><channel><title>'
+    monkeypatch.setattr(runner, 'open_feed', fake_open_feed(head, []))
+
+    result = runner.sync(Feed('test', url=FEED_URL), session)
+    assert result['status'] == runner.FAILED
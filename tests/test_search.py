@@ -0,0 +1,29 @@
+import yaml
+
+from sitegen.search import SearchIndex
+
+
+def write_thoughts(data_dir, month, thoughts):
+    shard_dir = data_dir / 'thoughts'
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    (shard_dir / f'{month}.yml').write_text(yaml.safe_dump(thoughts, allow_unicode=True), encoding='utf-8')
+
+
+def test_thoughts_sharing_a_link_get_distinct_keys(tmp_path):
+    link = 'https://example.com/post/1'
+    write_thoughts(tmp_path / '_data', '2024-06', [
+        {'date': '2024-06-01', 'time': '10:00', 'content': '第一条', 'source_link': link},
+        {'date': '2024-06-02', 'time': '09:00', 'content': '第二条', 'source_link': link},
+        {'date': '2024-06-02', 'time': '09:00', 'content': '第三条', 'source_link': link},
+    ])
+    index = SearchIndex(tmp_path / 'cache', tmp_path / 'out')
+    docs, keys = index.thought_documents(tmp_path / '_data')
+    assert len(docs) == len(keys) == 3
+    assert sorted(doc['snippet'] for doc in docs.values()) == ['第一条', '第三条', '第二条']
+
+    index.update(docs, keys)
+    index.save()
+    # 数据文件没变时不再读取，沿用记下的键
+    again = SearchIndex(tmp_path / 'cache', tmp_path / 'out')
+    docs, same_keys = again.thought_documents(tmp_path / '_data')
+    assert docs == {} and same_keys == keys
@@ -0,0 +1,109 @@
+import os
+
+from jike_sync.store import ThoughtStore, dump_thoughts, load_shard, migrate_legacy_thoughts
+
+
+def thought(date, time, content):
+    return {'date': date, 'time': time, 'content': content}
+
+
+def shard_keys(store, month):
+    with open(store.keys_path(month), 'r', encoding='utf-8') as f:
+        return [line.split('\t')[0] for line in f]
+
+
+def test_add_deduplicates_within_a_run(tmp_path):
+    store = ThoughtStore(str(tmp_path))
+    first = thought('2024-06-01', '10:00', '你好')
+    assert store.add(first)
+    assert not store.add(dict(first))
+    assert store.contains(first)
+    store.flush()
+    assert load_shard(store.shard_path('2024-06')) == [first]
+
+
+def test_keys_persist_across_runs_and_shards(tmp_path):
+    june = thought('2024-06-30', '23:59', '六月')
+    july = thought('2024-07-01', '00:01', '七月')
+    store = ThoughtStore(str(tmp_path))
+    store.add(june)
+    store.add(july)
+    assert sorted(store.flush()) == [store.shard_path('2024-06'), store.shard_path('2024-07')]
+
+    # 新的实例只能从 .keys 索引里知道已有的动态
+    again = ThoughtStore(str(tmp_path))
+    assert again.contains(june)
+    assert again.contains(july)
+    assert not again.add(dict(june))
+    assert not again.add(dict(july))
+    assert again.add(thought('2024-07-02', '08:00', '七月'))
+    assert again.pending_months() == ['2024-07']
+    again.flush()
+
+    assert len(load_shard(again.shard_path('2024-06'))) == 1
+    assert [t['date'] for t in load_shard(again.shard_path('2024-07'))] == ['2024-07-01', '2024-07-02']
+    assert len(set(shard_keys(again, '2024-07'))) == 2
+
+
+def test_same_content_in_different_months_is_not_a_duplicate(tmp_path):
+    store = ThoughtStore(str(tmp_path))
+    assert store.add(thought('2024-06-01', '10:00', '同样的内容'))
+    assert store.add(thought('2024-07-01', '10:00', '同样的内容'))
+    store.flush()
+    assert shard_keys(store, '2024-06') != shard_keys(store, '2024-07')
+
+
+def test_backfilled_thought_keeps_shard_sorted(tmp_path):
+    store = ThoughtStore(str(tmp_path))
+    store.add(thought('2024-06-10', '12:00', '晚的'))
+    store.flush()
+
+    store = ThoughtStore(str(tmp_path))
+    store.add(thought('2024-06-01', '09:00', '早的'))
+    store.flush()
+    assert [t['content'] for t in load_shard(store.shard_path('2024-06'))] == ['早的', '晚的']
+    assert len(shard_keys(store, '2024-06')) == 2
+
+
+def test_repair_rebuilds_keys_from_shard(tmp_path):
+    store = ThoughtStore(str(tmp_path))
+    kept = thought('2024-06-01', '10:00', '已写入分片')
+    store.add(kept)
+    store.flush()
+    # 模拟写完分片、还没写索引时中断
+    open(store.keys_path('2024-06'), 'w').close()
+
+    store = ThoughtStore(str(tmp_path))
+    store.repair(['2024-06'])
+    assert store.contains(kept)
+    assert not store.add(dict(kept))
+
+
+def write_legacy(path, thoughts):
+    with open(path, 'w', encoding='utf-8') as f:
+        dump_thoughts(thoughts, f)
+
+
+def test_migration_removes_fully_migrated_legacy_file(tmp_path):
+    legacy = tmp_path / 'thoughts.yml'
+    write_legacy(legacy, [thought('2024-07-01', '08:00', '七月'), thought('2024-06-01', '10:00', '六月')])
+    store = ThoughtStore(str(tmp_path / 'thoughts'))
+    assert migrate_legacy_thoughts(str(legacy), store) == (2, 0)
+    assert not legacy.exists()
+    assert load_shard(store.shard_path('2024-06')) == [thought('2024-06-01', '10:00', '六月')]
+
+
+def test_migration_keeps_undated_thoughts_in_legacy_file(tmp_path):
+    legacy = tmp_path / 'thoughts.yml'
+    undated = {'content': '没有日期'}
+    write_legacy(legacy, [thought('2024-06-01', '10:00', '六月'), undated])
+    store = ThoughtStore(str(tmp_path / 'thoughts'))
+    assert migrate_legacy_thoughts(str(legacy), store) == (1, 1)
+    # 已迁移的动态从旧文件里去掉，没有日期的留下
+    assert load_shard(str(legacy)) == [undated]
+
+    # 补上日期后下次运行迁移，旧文件删除
+    write_legacy(legacy, [dict(undated, date='2024-06-02')])
+    assert migrate_legacy_thoughts(str(legacy), ThoughtStore(str(tmp_path / 'thoughts'))) == (1, 0)
+    assert not os.path.exists(legacy)
+    assert len(load_shard(store.shard_path('2024-06'))) == 2